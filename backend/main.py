@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 import shutil
 from pathlib import Path
 from src.services.rag_service import RAGService
+from src.services.catalog_service import CatalogService
 
 from src.api.v1.router import router as api_router
 from src.db.mongodb import MongoDB , get_database
@@ -32,6 +33,7 @@ UPLOAD_DIR = Path("temp_uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 from src.core.config import settings
+from src.core.concurrency import shutdown_executor
 
 # ==================== STARTUP/SHUTDOWN ====================
 
@@ -45,6 +47,8 @@ async def startup_event():
             api_key=settings.PINECONE_API_KEY if "chroma" == "pinecone" else None
         )
     settings.rag_service = RAGService(db=mongodb.db)
+    if settings.CATALOG_WATCH:
+        CatalogService().start_watch()
     # rag_service =   
     print(f"✅ Connected to MongoDB: {mongodb.db.name}")
 
@@ -60,6 +64,9 @@ async def shutdown_event():
     mongodb.close()
     print("✅ Disconnected from MongoDB")
 
+    # Stop the pool serving blocking provider calls
+    shutdown_executor()
+
 # ==================== HEALTH CHECK ====================
 
 @app.get("/health")
@@ -9,6 +9,7 @@ from src.services.auth import AuthService
 
 from src.repositories.car_repository import CarRepository
 from src.repositories.embedding_repository import EmbeddingRepository
+from src.repositories.catalog_snapshot import load_catalog
 from src.services.scoring_service import ScoringService
 from src.services.recommendation_service import RecommendationService
 
@@ -83,13 +84,23 @@ def get_current_user(token: str = Depends(oauth2_scheme),
     return user
 
 
-def get_car_repository() -> CarRepository:
+def require_admin(user = Depends(get_current_user)):
+    """Dependency for admin-only endpoints: the user's email must be listed in ADMIN_EMAILS."""
+    if user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code = status.HTTP_403_FORBIDDEN,
+            detail = "Admin access required",
+        )
+    return user
+
+
+def get_car_repository(catalog = None) -> CarRepository:
     """Dependency for car repository."""
-    return CarRepository()
+    return CarRepository(catalog)
 
-def get_embedding_repository() -> EmbeddingRepository:
+def get_embedding_repository(catalog = None) -> EmbeddingRepository:
     """Dependency for car repository."""
-    return EmbeddingRepository()
+    return EmbeddingRepository(catalog)
 
 def get_scoring_service() -> ScoringService:
     """Dependency for scoring service."""
@@ -101,10 +112,12 @@ def get_recommendation_service(
     scoring_service: ScoringService = None,
 ) -> RecommendationService:
     """Dependency for recommendation service."""
+    # Both repositories must see the same catalog version, even if it is swapped meanwhile
+    catalog = load_catalog()
     if car_repo is None:
-        car_repo = get_car_repository()
+        car_repo = get_car_repository(catalog)
     if embedding_repo is None:
-        embedding_repo = get_embedding_repository()
+        embedding_repo = get_embedding_repository(catalog)
     if scoring_service is None:
         scoring_service = get_scoring_service()
 
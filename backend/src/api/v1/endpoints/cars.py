@@ -1,14 +1,74 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+import base64
+import hashlib
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Literal, Optional
 from src.repositories.car_repository import CarRepository
-from src.schemas.car_requests_schemas import CarResponse
-from src.schemas.car_schemas import CarFilters
+from src.schemas.car_requests_schemas import CarResponse, FacetsResponse, Suggestion
+from src.schemas.car_schemas import Car, CarFilters, Location
 from src.api.deps import get_car_repository
 
 
 router = APIRouter(prefix="/cars", tags=["cars"])
 
 
+def _listing_filters(
+    manufacturer: Optional[str] = None,
+    type: Optional[str] = None,
+    fuel: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_year: Optional[int] = Query(None, ge=1900),
+    max_year: Optional[int] = Query(None, ge=1900),
+    min_odometer: Optional[float] = Query(None, ge=0),
+    max_odometer: Optional[float] = Query(None, ge=0),
+    user_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    user_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    max_distance_km: Optional[float] = Query(None, ge=0)
+) -> tuple[CarFilters, Optional[Location]]:
+    """Filter query parameters shared by the listing and its facets."""
+    filters = CarFilters(
+        min_price=min_price,
+        max_price=max_price,
+        min_year=min_year,
+        max_year=max_year,
+        min_odometer=min_odometer,
+        max_odometer=max_odometer,
+        manufacturers=[manufacturer] if manufacturer else None,
+        types=[type] if type else None,
+        fuel_types=[fuel] if fuel else None,
+        states=[state] if state else None,
+        max_distance_km=max_distance_km
+    )
+
+    user_location = None
+    if user_latitude is not None and user_longitude is not None:
+        user_location = Location(latitude=user_latitude, longitude=user_longitude)
+    return filters, user_location
+
+
+@router.get("/facets", response_model=FacetsResponse)
+def get_facets(query: tuple[CarFilters, Optional[Location]] = Depends(_listing_filters)):
+    """
+    Counts per manufacturer, type, fuel and state plus price/year histograms
+    of the cars matching the filters (same parameters as the listing).
+    """
+    filters, user_location = query
+    repo = get_car_repository()
+    return FacetsResponse(**repo.get_facets(filters, user_location), catalog_version=repo.get_catalog_version())
+
+
+@router.get("/suggest", response_model=list[Suggestion])
+def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Autocomplete manufacturers and models, most listed first."""
+    repo = get_car_repository()
+    return [Suggestion(**suggestion) for suggestion in repo.suggest(prefix, limit)]
+
+
 @router.get("/{car_id}", response_model=CarResponse)
 def get_car(car_id: str):
     """Get car details by ID."""
@@ -17,6 +77,53 @@ def get_car(car_id: str):
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
     
+    return _to_car_response(car)
+
+
+@router.get("/", response_model=list[CarResponse])
+def list_cars(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (replaces skip)"),
+    sort_by: Optional[Literal["price", "year", "odometer"]] = None,
+    order: Literal["asc", "desc"] = "asc",
+    query: tuple[CarFilters, Optional[Location]] = Depends(_listing_filters)
+):
+    """
+    List cars with optional filters (max_distance_km needs the user location).
+    The X-Next-Cursor response header holds an opaque cursor for the next
+    page: pass it back as `cursor` with the same filters and sort, deep pages
+    then cost the same as the first one.
+    """
+    filters, user_location = query
+    repo = get_car_repository()
+
+    descending = order == "desc"
+    if cursor is not None or skip == 0:
+        after = -1
+        if cursor is not None:
+            after = _decode_cursor(
+                cursor, repo.get_catalog_version(), sort_by, descending, _filters_digest(filters, user_location)
+            )
+        cars, last = repo.find_page(
+            filters=filters, after=after, limit=limit, user_location=user_location,
+            sort_by=sort_by, descending=descending
+        )
+        if last is not None:
+            response.headers["X-Next-Cursor"] = _encode_cursor(
+                repo.get_catalog_version(), sort_by, descending, _filters_digest(filters, user_location), last
+            )
+    else:
+        cars = repo.find_all(
+            filters=filters, skip=skip, limit=limit, user_location=user_location,
+            sort_by=sort_by, descending=descending
+        )
+    
+    return [_to_car_response(car) for car in cars]
+
+
+def _to_car_response(car: Car) -> CarResponse:
     return CarResponse(
         car_id=car.car_id,
         url=car.url,
@@ -36,44 +143,42 @@ def get_car(car_id: str):
     )
 
 
+def _filters_digest(filters: CarFilters, user_location: Optional[Location]) -> str:
+    """
+    Short sha256 of the canonical filters (the user location counts only with
+    max_distance_km, the one filter it changes): a cursor position is only
+    meaningful for the candidate set it was issued for.
+    """
+    canonical = json.dumps({
+        "filters": filters.model_dump(exclude_none=True),
+        "location": [user_location.latitude, user_location.longitude]
+        if user_location and filters.max_distance_km else None,
+    }, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_cursor(catalog_version: str, sort_by: Optional[str], descending: bool,
+                   filters_digest: str, position: int) -> str:
+    payload = json.dumps({"v": catalog_version, "s": sort_by, "d": descending, "f": filters_digest, "p": position},
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
 
-@router.get("/", response_model=list[CarResponse])
-def list_cars(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
-    manufacturer: Optional[str] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None
-):
-    """List cars with optional filters."""
-    repo = get_car_repository()
-    
-    filters = CarFilters(
-        min_price=min_price,
-        max_price=max_price,
-        manufacturers=[manufacturer] if manufacturer else None
-    )
-    
-    cars = repo.find_all(filters=filters, skip=skip, limit=limit)
-    
-    return [
-        CarResponse(
-            car_id=car.car_id,
-            url=car.url,
-            price=car.price,
-            year=car.year,
-            manufacturer=car.manufacturer,
-            model=car.model,
-            condition=car.condition,
-            fuel=car.fuel,
-            odometer=car.odometer,
-            transmission=car.transmission,
-            type=car.type,
-            paint_color=car.paint_color,
-            state=car.state,
-            latitude=car.location.latitude if car.location else None,
-            longitude=car.location.longitude if car.location else None
-        )
-        for car in cars
-    ]
 
+def _decode_cursor(cursor: str, catalog_version: str, sort_by: Optional[str], descending: bool,
+                   filters_digest: str) -> int:
+    """
+    Position encoded in a cursor; positions are only meaningful for the
+    catalog version, sort and filters they came from.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        position = int(payload["p"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if payload.get("s") != sort_by or payload.get("d") != descending:
+        raise HTTPException(status_code=400, detail="Cursor was issued for another sort order")
+    if payload.get("f") != filters_digest:
+        raise HTTPException(status_code=400, detail="Cursor was issued for other filters")
+    if payload.get("v") != catalog_version:
+        raise HTTPException(status_code=409, detail="Catalog changed since this cursor was issued, restart from the first page")
+    return position
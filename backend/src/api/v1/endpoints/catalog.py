@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, Depends
+from src.services.catalog_service import CatalogService
+from src.schemas.car_requests_schemas import CatalogChangesRequest, CatalogJobResponse
+from src.api.deps import require_admin
+
+router = APIRouter(prefix="/admin/catalog", tags=["catalog-admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/cars", response_model=CatalogJobResponse, status_code=202)
+def update_cars(request: CatalogChangesRequest):
+    """
+    Add, update and remove cars. The changes are built into a new catalog
+    version in the background and swapped in atomically once ready.
+    """
+    if not request.upserts and not request.removals:
+        raise HTTPException(status_code=400, detail="No changes given")
+
+    upserts = []
+    for car in request.upserts:
+        metadata = car.model_dump(exclude={"car_id", "latitude", "longitude"})
+        metadata.update(id=car.car_id, lat=car.latitude, long=car.longitude)
+        upserts.append(metadata)
+
+    return CatalogService().submit_changes(upserts, request.removals)
+
+
+@router.delete("/cars/{car_id}", response_model=CatalogJobResponse, status_code=202)
+def remove_car(car_id: str):
+    """Remove one car (applied in the background like any other change)."""
+    return CatalogService().submit_changes([], [car_id])
+
+
+@router.post("/reload", response_model=CatalogJobResponse, status_code=202)
+def reload_catalog():
+    """Rebuild the catalog from the JSON data file in the background."""
+    return CatalogService().submit_reload()
+
+
+@router.get("/jobs/{job_id}", response_model=CatalogJobResponse)
+def get_job(job_id: str):
+    """Status of a catalog build job."""
+    job = CatalogService().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/status")
+def catalog_status():
+    """Current catalog version and recent build jobs."""
+    return CatalogService().status()
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException , Depends
 from src.schemas.config_schema import ProviderConfig, CurrentConfigResponse
 from src.core.config import settings
 from src.services.rag_service import RAGService
+from src.services.recommendation_service import RecommendationService
 from src.db.mongodb import get_database
 from src.core.config import settings
 
@@ -53,6 +54,9 @@ async def configure_providers(
             vectordb_provider=_current_config["vectordb_provider"],
             db=db
         )
+        # Cached query embeddings belong to the previous embedding model
+        RecommendationService.clear_query_embedding_cache()
+        RecommendationService.clear_result_cache()
         
         
         return {
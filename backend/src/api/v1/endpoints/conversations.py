@@ -12,7 +12,7 @@ from src.api.deps import get_conversation_service , get_current_user
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
 @router.post('/' , response_model = ConversationResponse)
-async def create_conversation(
+def create_conversation(
     conversation : ConversationCreate ,
     current_user = Depends(get_current_user),
       db=Depends(get_database),
@@ -34,7 +34,7 @@ async def create_conversation(
 
 
 @router.get('' , response_model = List[ConversationResponse])
-async def list_conversations(
+def list_conversations(
     db=Depends(get_database),
     current_user = Depends(get_current_user),
     conversation_service: ConversationService = Depends(get_conversation_service)
@@ -56,7 +56,7 @@ async def list_conversations(
 
 
 @router.get('/{conversation_id}' , response_model = ConversationResponse)
-async def get_conversation(conversation_id:str,current_user = Depends(get_current_user),db=Depends(get_database)):
+def get_conversation(conversation_id:str,current_user = Depends(get_current_user),db=Depends(get_database)):
     """Get a specific conversation"""
     try:
         service = ConversationService(db)
@@ -75,7 +75,7 @@ async def get_conversation(conversation_id:str,current_user = Depends(get_curren
     
 
 @router.delete('/{conversation_id}' )
-async def get_conversation(conversation_id:str,current_user = Depends(get_current_user),db=Depends(get_database)):
+def get_conversation(conversation_id:str,current_user = Depends(get_current_user),db=Depends(get_database)):
     """Delete a conversation and its associated data"""
     try:
         service = ConversationService(db)
@@ -86,7 +86,7 @@ async def get_conversation(conversation_id:str,current_user = Depends(get_curren
 
 
 @router.get("/{conversation_id}/messages", response_model=List[MessageResponse])
-async def list_messages(conversation_id: str,current_user = Depends(get_current_user), limit: int = 20, db=Depends(get_database)):
+def list_messages(conversation_id: str,current_user = Depends(get_current_user), limit: int = 20, db=Depends(get_database)):
     """List messages in a conversation"""
     try :
         service = ConversationService(db)
@@ -104,7 +104,7 @@ async def list_messages(conversation_id: str,current_user = Depends(get_current_
 
 
 @router.post("/{conversation_id}/messages")
-async def add_message(conversation_id: str, body: MessageCreate,current_user = Depends(get_current_user), db=Depends(get_database)):
+def add_message(conversation_id: str, body: MessageCreate,current_user = Depends(get_current_user), db=Depends(get_database)):
     """Add a message to a conversation"""
     try:
         if body.conversation_id != conversation_id:
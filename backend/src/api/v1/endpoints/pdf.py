@@ -1,14 +1,16 @@
+import hashlib
+import tempfile
 from typing import List
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form , Depends , APIRouter
 from src.schemas.pdf_schema import PDFUploadResponse , PDFInfo 
 from src.services.rag_service import RAGService
 from src.services.pdf_service import PdfService
 from typing import Optional 
-import shutil
 from pathlib import Path
 from src.db.mongodb import get_database
 from src.api.deps import get_pdf_service , get_rag_service
 from src.core.config import settings
+from src.core.concurrency import run_blocking
 
 router = APIRouter(prefix="/pdfs", tags=["pdfs"])
 
@@ -29,19 +31,17 @@ async def upload_pdf(
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        # Save temporarily
-        temp_path = UPLOAD_DIR / file.filename
-        with temp_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save temporarily under a unique name (the client's filename is only metadata)
+        temp_path, content_hash = await run_blocking(_save_upload, file)
         
         # Process PDF
         service = settings.rag_service
         # service = RAGService(db)
-        pdf_id = service.upload_pdf(str(temp_path), conversation_id)
-        
-        print("helloooo")
-        # Cleanup
-        temp_path.unlink()
+        try:
+            pdf_id = await service.aupload_pdf(str(temp_path), conversation_id, content_hash, file.filename)
+        finally:
+            # Cleanup
+            temp_path.unlink(missing_ok=True)
         
         return PDFUploadResponse(
             pdf_id=pdf_id,
@@ -77,12 +77,11 @@ async def upload_pdfs_batch(
                 continue
             
             try:
-                temp_path = UPLOAD_DIR / file.filename
-                with temp_path.open("wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-                
-                pdf_id = service.upload_pdf(str(temp_path), conversation_id)
-                temp_path.unlink()
+                temp_path, content_hash = await run_blocking(_save_upload, file)
+                try:
+                    pdf_id = await service.aupload_pdf(str(temp_path), conversation_id, content_hash, file.filename)
+                finally:
+                    temp_path.unlink(missing_ok=True)
                 
                 results.append({
                     "filename": file.filename,
@@ -102,7 +101,7 @@ async def upload_pdfs_batch(
 
 
 @router.get("/conversation/{conversation_id}", response_model=List[PDFInfo])
-async def get_conversation_pdfs(conversation_id: str,
+def get_conversation_pdfs(conversation_id: str,
                             # db = Depends(get_database),
                             pdf_service : PdfService = Depends(get_pdf_service)
                                 ):
@@ -123,7 +122,7 @@ async def get_conversation_pdfs(conversation_id: str,
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/global", response_model=List[PDFInfo])
-async def get_global_pdfs(
+def get_global_pdfs(
     db=Depends(get_database),
     pdf_service : PdfService = Depends(get_pdf_service)
     ):
@@ -145,7 +144,7 @@ async def get_global_pdfs(
     #     raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{pdf_id}")
-async def get_pdf_info(
+def get_pdf_info(
     pdf_id: str , 
     pdf_service:PdfService=Depends(get_pdf_service),
     
@@ -172,12 +171,26 @@ async def delete_pdf(
     pdf_id: str , 
     db=Depends(get_database),
     pdf_service:PdfService=Depends(get_pdf_service),
-    rag_service:RAGService=Depends(get_rag_service)
     ):
     """Delete a specific PDF"""
     try:
         # service = RAGService(db)
-        rag_service.delete_pdf(pdf_id)
+        await settings.rag_service.adelete_pdf(pdf_id)
         return {"message": "PDF deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _save_upload(file: UploadFile) -> tuple[Path, str]:
+    """
+    Copy an upload to a uniquely named file in UPLOAD_DIR (blocking file I/O,
+    run on the blocking pool), hashing it on the way. Returns the path and the
+    sha256 (hex) uploads are deduplicated on. The client's filename never
+    becomes a path, so concurrent uploads of the same name cannot collide.
+    """
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix="upload_", suffix=".pdf", delete=False) as buffer:
+        for block in iter(lambda: file.file.read(1024 * 1024), b""):
+            digest.update(block)
+            buffer.write(block)
+    return Path(buffer.name), digest.hexdigest()
@@ -1,5 +1,7 @@
-from typing import List
+import json
+from typing import AsyncIterator, List
 from fastapi import HTTPException , Depends , APIRouter
+from fastapi.responses import StreamingResponse
 from src.schemas.chat_schema import ChatRequest , ChatResponse
 from src.schemas.query_schema import QueryRequest , QueryResponse
 from src.db.connection import get_database
@@ -12,7 +14,7 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 async def chat(request: ChatRequest , db = Depends(get_database)):
     try:
         service = settings.rag_service
-        result = service.chat(
+        result = await service.achat(
             conversation_id=request.conversation_id,
             message=request.message,
             top_k=request.top_k,
@@ -27,6 +29,23 @@ async def chat(request: ChatRequest , db = Depends(get_database)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest , db = Depends(get_database)):
+    """
+    Chat with the answer streamed as server-sent events:
+    start {user_message_id}, token {text} per chunk, done {assistant_message_id, answer}
+    (or error {detail}). The assistant message is saved when the stream completes.
+    """
+    service = settings.rag_service
+    events = service.achat_stream(
+        conversation_id=request.conversation_id,
+        message=request.message,
+        top_k=request.top_k,
+        history_limit=request.history_limit
+    )
+    return _event_stream(events)
+
 # ==================== QUERY ENDPOINTS ====================
 
 @router.post("/query", response_model=QueryResponse)
@@ -34,7 +53,7 @@ async def query_rag(request: QueryRequest , db=Depends(get_database)):
     """Query the RAG system (global or conversation-specific)"""
     # try:
     service = settings.rag_service
-    answer = service.query(
+    answer = await service.aquery(
         question=request.question,
         conversation_id=request.conversation_id,
         top_k=request.top_k
@@ -46,3 +65,38 @@ async def query_rag(request: QueryRequest , db=Depends(get_database)):
     # except Exception as e:
     #     raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/query/stream")
+async def query_rag_stream(request: QueryRequest , db=Depends(get_database)):
+    """Query the RAG system with the answer streamed as server-sent events: token {text}..., done {answer}"""
+    service = settings.rag_service
+
+    async def events() -> AsyncIterator[dict]:
+        chunks = []
+        async for text in service.aquery_stream(
+            question=request.question,
+            conversation_id=request.conversation_id,
+            top_k=request.top_k
+        ):
+            chunks.append(text)
+            yield {"event": "token", "text": text}
+        yield {"event": "done", "answer": "".join(chunks).strip(), "conversation_id": request.conversation_id}
+
+    return _event_stream(events())
+
+
+def _event_stream(events: AsyncIterator[dict]) -> StreamingResponse:
+    """Serve events as text/event-stream, straight from the async RAG pipeline."""
+    async def encode() -> AsyncIterator[str]:
+        try:
+            async for event in events:
+                name = event.pop("event")
+                yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        encode(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
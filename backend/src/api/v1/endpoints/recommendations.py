@@ -3,8 +3,11 @@ from src.services.recommendation_service import RecommendationService
 from src.schemas.car_requests_schemas import (
     RecommendByIdRequest,
     RecommendByTextRequest,
+    BatchRecommendByIdRequest,
+    BatchRecommendByTextRequest,
     RecommendationResponse,
     RecommendationsResponse,
+    BatchRecommendationsResponse,
     CarResponse
 )
 from src.schemas.car_schemas import Location , CarFilters
@@ -32,7 +35,8 @@ def recommand_by_car_id(request:RecommendByIdRequest):
             max_year=request.max_year,
             manufacturers=request.manufacturers,
             types=request.types,
-            states=request.states
+            states=request.states,
+            max_distance_km=request.max_distance_km
         )
 
         recommendations = service.recommend_by_car_id(
@@ -41,51 +45,22 @@ def recommand_by_car_id(request:RecommendByIdRequest):
             user_location=user_location,
             filters=filters,
             similarity_weight=request.similarity_weight,
-            distance_weight=request.distance_weight
+            distance_weight=request.distance_weight,
+            price_weight=request.price_weight,
+            recency_weight=request.recency_weight
         )
 
-        response_recs = []
-        for rec in recommendations:
-            car_response = CarResponse(
-                car_id = rec.car.car_id,
-                url = rec.car.url,
-                price = rec.car.price,
-                year = rec.car.year,
-                manufacturer = rec.car.manufacturer,
-                model = rec.car.model,
-                condition = rec.car.condition,
-                fuel = rec.car.fuel,
-                odometer=rec.car.odometer,
-                transmission=rec.car.transmission,
-                type=rec.car.type,
-                paint_color=rec.car.paint_color,
-                state=rec.car.state,
-                latitude=rec.car.location.latitude if rec.car.location else None,
-                longitude=rec.car.location.longitude if rec.car.location else None
-            )
-
-            response_recs.append(RecommendationResponse(
-                car=car_response,
-                similarity_score=rec.similarity_score,
-                distance_score=rec.distance_score,
-                final_score=rec.final_score,
-                distance_km=rec.distance_km,
-                rank=rec.rank
-            ))
-
-        return RecommendationsResponse(
-            recommendations=response_recs,
-            total = len(response_recs),
-            query_info =  {
-                "type" : "by_id",
-                "car_id" : request.car_id,
-                "user_location": user_location.model_dump() if user_location else None,
-                "weights": {
-                    "similarity": request.similarity_weight or 0.7,
-                    "distance": request.distance_weight or 0.3
-                }
+        return _to_recommendations_response(recommendations, {
+            "type" : "by_id",
+            "car_id" : request.car_id,
+            "user_location": user_location.model_dump() if user_location else None,
+            "weights": {
+                "similarity": request.similarity_weight or 0.7,
+                "distance": request.distance_weight or 0.3,
+                "price": request.price_weight,
+                "recency": request.recency_weight
             }
-        )
+        })
 
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -108,7 +83,8 @@ def recommend_by_text(request: RecommendByTextRequest):
             min_year= request.min_year,
             max_year= request.max_year,
             manufacturers=request.manufacturers,
-            types=request.types
+            types=request.types,
+            max_distance_km=request.max_distance_km
         )
 
         recommendations = service.recommend_by_text(
@@ -117,50 +93,155 @@ def recommend_by_text(request: RecommendByTextRequest):
             user_location=user_location,
             filters=filters,
             similarity_weight=request.similarity_weight,
-            distance_weight=request.distance_weight
+            distance_weight=request.distance_weight,
+            search_mode=request.search_mode,
+            price_weight=request.price_weight,
+            recency_weight=request.recency_weight
         )
 
-        response_recs = []
-        for rec in recommendations:
-            car_response = CarResponse(
-                car_id=rec.car.car_id,
-                url=rec.car.url,
-                price=rec.car.price,
-                year=rec.car.year,
-                manufacturer=rec.car.manufacturer,
-                model=rec.car.model,
-                condition=rec.car.condition,
-                fuel=rec.car.fuel,
-                odometer=rec.car.odometer,
-                transmission=rec.car.transmission,
-                type=rec.car.type,
-                paint_color=rec.car.paint_color,
-                state=rec.car.state,
-                latitude=rec.car.location.latitude if rec.car.location else None,
-                longitude=rec.car.location.longitude if rec.car.location else None
-            )
+        return _to_recommendations_response(recommendations, {
+            "type": "by_text",
+            "query": request.query,
+            "search_mode": request.search_mode,
+            "user_location": user_location.model_dump() if user_location else None,
+            "weights": {
+                "similarity": request.similarity_weight,
+                "distance": request.distance_weight,
+                "price": request.price_weight,
+                "recency": request.recency_weight
+            }
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
-            response_recs.append(RecommendationResponse(
-                car=car_response,
-                similarity_score=rec.similarity_score,
-                distance_score=rec.distance_score,
-                final_score=rec.final_score,
-                distance_km=rec.distance_km,
-                rank=rec.rank
-            ))
-        return RecommendationsResponse(
-            recommendations=response_recs,
-            total=len(response_recs),
-            query_info={
-                "type": "by_text",
-                "query": request.query,
+
+def _batch_location_and_filters(request):
+    """Shared user location and filters of a batch request."""
+    user_location = None
+    if request.user_latitude and request.user_longitude:
+        user_location = Location(latitude=request.user_latitude, longitude=request.user_longitude)
+
+    filters = CarFilters(
+        min_price=request.min_price,
+        max_price=request.max_price,
+        min_year=request.min_year,
+        max_year=request.max_year,
+        manufacturers=request.manufacturers,
+        types=request.types,
+        states=request.states,
+        max_distance_km=request.max_distance_km
+    )
+    return user_location, filters
+
+
+def _to_recommendations_response(recommendations, query_info: dict) -> RecommendationsResponse:
+    response_recs = []
+    for rec in recommendations:
+        car_response = CarResponse(
+            car_id=rec.car.car_id,
+            url=rec.car.url,
+            price=rec.car.price,
+            year=rec.car.year,
+            manufacturer=rec.car.manufacturer,
+            model=rec.car.model,
+            condition=rec.car.condition,
+            fuel=rec.car.fuel,
+            odometer=rec.car.odometer,
+            transmission=rec.car.transmission,
+            type=rec.car.type,
+            paint_color=rec.car.paint_color,
+            state=rec.car.state,
+            latitude=rec.car.location.latitude if rec.car.location else None,
+            longitude=rec.car.location.longitude if rec.car.location else None
+        )
+
+        response_recs.append(RecommendationResponse(
+            car=car_response,
+            similarity_score=rec.similarity_score,
+            relevance_score=rec.relevance_score,
+            distance_score=rec.distance_score,
+            final_score=rec.final_score,
+            distance_km=rec.distance_km,
+            rank=rec.rank
+        ))
+    return RecommendationsResponse(recommendations=response_recs, total=len(response_recs), query_info=query_info)
+
+
+@router.post("/by-id/batch", response_model=BatchRecommendationsResponse)
+def recommend_batch_by_car_id(request: BatchRecommendByIdRequest):
+    """Get car recommendations for several reference car IDs in one pass over the catalog."""
+    try:
+        service = get_recommendation_service()
+        user_location, filters = _batch_location_and_filters(request)
+
+        batch = service.recommend_batch_by_car_ids(
+            car_ids=request.car_ids,
+            top_n=request.top_n,
+            user_location=user_location,
+            filters=filters,
+            similarity_weight=request.similarity_weight,
+            distance_weight=request.distance_weight,
+            price_weight=request.price_weight,
+            recency_weight=request.recency_weight
+        )
+
+        results = []
+        for car_id, recommendations in zip(request.car_ids, batch):
+            query_info = {
+                "type": "by_id",
+                "car_id": car_id,
                 "user_location": user_location.model_dump() if user_location else None,
                 "weights": {
-                    "similarity": request.similarity_weight,
-                    "distance": request.distance_weight
+                    "similarity": request.similarity_weight or 0.7,
+                    "distance": request.distance_weight or 0.3,
+                    "price": request.price_weight,
+                    "recency": request.recency_weight
                 }
             }
+            if recommendations is None:
+                query_info["error"] = f"No embedding found for car_id: {car_id}"
+            results.append(_to_recommendations_response(recommendations or [], query_info))
+
+        return BatchRecommendationsResponse(results=results, total=len(results))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+
+
+@router.post("/by-text/batch", response_model=BatchRecommendationsResponse)
+def recommend_batch_by_text(request: BatchRecommendByTextRequest):
+    """Get car recommendations for several text queries, embedded in one call."""
+    try:
+        service = get_recommendation_service()
+        user_location, filters = _batch_location_and_filters(request)
+
+        batch = service.recommend_batch_by_text(
+            queries=request.queries,
+            top_n=request.top_n,
+            user_location=user_location,
+            filters=filters,
+            similarity_weight=request.similarity_weight,
+            distance_weight=request.distance_weight,
+            price_weight=request.price_weight,
+            recency_weight=request.recency_weight
         )
+
+        results = [
+            _to_recommendations_response(recommendations, {
+                "type": "by_text",
+                "query": query,
+                "user_location": user_location.model_dump() if user_location else None,
+                "weights": {
+                    "similarity": request.similarity_weight or 0.7,
+                    "distance": request.distance_weight or 0.3,
+                    "price": request.price_weight,
+                    "recency": request.recency_weight
+                }
+            })
+            for query, recommendations in zip(request.queries, batch)
+        ]
+        return BatchRecommendationsResponse(results=results, total=len(results))
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
@@ -168,4 +249,9 @@ def recommend_by_text(request: RecommendByTextRequest):
 @router.get("/health")
 def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "recommendations"}
+    return {
+        "status": "healthy",
+        "service": "recommendations",
+        "query_embedding_cache": RecommendationService.query_embedding_cache_stats(),
+        "result_cache": RecommendationService.result_cache_stats()
+    }
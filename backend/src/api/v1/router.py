@@ -3,7 +3,7 @@ API v1 router configuration
 """
 from fastapi import APIRouter
 from src.core.config import settings
-from src.api.v1.endpoints import auth , conversations , pdf , query , stats , config , prediction , cars , recommendations
+from src.api.v1.endpoints import auth , conversations , pdf , query , stats , config , prediction , cars , recommendations , catalog
 
 # Create the v1 router
 router = APIRouter(prefix="/v1")
@@ -17,6 +17,7 @@ router.include_router(config.router)
 router.include_router(prediction.router)
 router.include_router(cars.router)
 router.include_router(recommendations.router)
+router.include_router(catalog.router)
 
 
 
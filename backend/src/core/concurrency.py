@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from src.core.config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_DONE = object()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Process-wide pool for blocking work (sync SDK clients, local models,
+    pymongo) awaited from async code. Bounded by BLOCKING_POOL_SIZE, so a
+    burst of slow calls queues here instead of spawning threads without limit.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BLOCKING_POOL_SIZE, thread_name_prefix="blocking"
+                )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call on the bounded pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+async def iterate_blocking(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Drive a blocking iterator (e.g. a streaming SDK response) from the pool,
+    one item per hop. The iterator is closed when the consumer stops early;
+    if it is cancelled mid-hop, the in-flight next() is allowed to return
+    first, so close() never runs concurrently with it.
+    """
+    iterator = iter(iterator)
+    loop = asyncio.get_running_loop()
+    pending = None
+    try:
+        while True:
+            pending = loop.run_in_executor(get_executor(), next, iterator, _DONE)
+            item = await asyncio.shield(pending)
+            pending = None
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        if pending is not None:
+            await asyncio.gather(pending, return_exceptions=True)
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await run_blocking(close)
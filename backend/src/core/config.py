@@ -25,6 +25,22 @@ class Settings:
     # Models
     LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-pro")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+    # Gemini embeddings (REST batchEmbedContents; the base URL can point at a local fake)
+    GEMINI_EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "models/embedding-001")
+    GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # at most 100
+    # Batches in flight at once for one embed call
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    # Rate-limited / unavailable batches are retried with exponential backoff
+    EMBEDDING_MAX_RETRIES: int = 5
+    EMBEDDING_RETRY_BASE_SECONDS: float = 1.0
+    EMBEDDING_RETRY_MAX_SECONDS: float = 30.0
+    # Persistent document embedding cache keyed by (model, sha256 of the text): disk | mongo | off
+    EMBEDDING_CACHE: str = os.getenv("EMBEDDING_CACHE", "disk")
+    EMBEDDING_CACHE_DIR: str = "src/data/embedding_cache"
+    # Least recently used entries are evicted beyond this many embeddings (0 = unbounded)
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
     
     # Text splitting
     CHUNK_SIZE = 1000
@@ -34,22 +50,80 @@ class Settings:
     SECRET_KEY = os.getenv("SECRET_KEY", "ihebmbarek99360644")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    # Comma-separated emails allowed to use the catalog admin API
+    ADMIN_EMAILS: list[str] = [email.strip() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()]
 
     # rag service
     rag_service = None
+    # Threads for blocking provider, model and database calls made from async endpoints
+    BLOCKING_POOL_SIZE: int = int(os.getenv("BLOCKING_POOL_SIZE", "32"))
 
     # Data Source
     DATA_FILE_PATH: str = "src/data/cars_embeddings.json"
+    # Binary catalog snapshots (built by src/scripts/build_catalog_snapshot.py)
+    CATALOG_SNAPSHOT_DIR: str = "src/data/catalog"
+    # Snapshot versions kept on disk after a catalog update
+    CATALOG_KEEP_VERSIONS: int = 3
+    # Watch mode: follow snapshots published by other workers and rebuild when DATA_FILE_PATH changes
+    CATALOG_WATCH: bool = os.getenv("CATALOG_WATCH", "false").lower() == "true"
+    CATALOG_WATCH_INTERVAL_SECONDS: float = float(os.getenv("CATALOG_WATCH_INTERVAL_SECONDS", "5"))
+
+    # Embedding Storage
+    EMBEDDING_STORAGE_MODE: str = os.getenv("EMBEDDING_STORAGE_MODE", "float32")  # float32 | float16 | int8
+    EMBEDDING_RESCORE_FACTOR: int = int(os.getenv("EMBEDDING_RESCORE_FACTOR", "4"))
+    # Rows scored per block when walking the (memory-mapped) embedding matrix
+    EMBEDDING_BLOCK_SIZE: int = int(os.getenv("EMBEDDING_BLOCK_SIZE", "65536"))
+
+    # Vector Index (flat = exact search, hnsw / ivf = approximate)
+    VECTOR_INDEX_PROVIDER: str = os.getenv("VECTOR_INDEX_PROVIDER", "flat")
+    VECTOR_INDEX_DIR: str = "src/data/indexes"
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    IVF_N_LISTS: int = int(os.getenv("IVF_N_LISTS", "0"))  # 0 = 4 * sqrt(n_cars)
+    IVF_NPROBE: int = int(os.getenv("IVF_NPROBE", "8"))
+    # Filtered searches over at most this many rows skip the approximate index
+    ANN_EXACT_FILTER_ROWS: int = 50_000
+    # Precomputed item-to-item neighbours (built by src/scripts/build_neighbor_table.py)
+    USE_NEIGHBOR_TABLE: bool = os.getenv("USE_NEIGHBOR_TABLE", "true").lower() == "true"
+    NEIGHBOR_TABLE_K: int = 200
+    # BM25 index over combined_text, built with each catalog version (needed by hybrid / keyword search)
+    LEXICAL_INDEX: bool = os.getenv("LEXICAL_INDEX", "true").lower() == "true"
+    # Hybrid search: hits taken from each ranking before reciprocal rank fusion
+    HYBRID_CANDIDATE_POOL: int = 200
+    RRF_K: int = 60
 
     # Scoring Weights
     SIMILARITY_WEIGHT: float = 0.7
     DISTANCE_WEIGHT: float = 0.3
+    # Optional terms of the final score: cheaper (price percentile) and newer (year percentile) cars
+    PRICE_WEIGHT: float = float(os.getenv("PRICE_WEIGHT", "0"))
+    RECENCY_WEIGHT: float = float(os.getenv("RECENCY_WEIGHT", "0"))
     MAX_DISTANCE_KM: float = 500.0
+    # haversine = vectorized spherical distance, geodesic = exact distance for returned cars
+    DISTANCE_MODE: str = os.getenv("DISTANCE_MODE", "haversine")
+    # Grid cell size of the spatial index used for max_distance_km prefiltering
+    SPATIAL_CELL_DEGREES: float = 0.5
+
+    # Car objects kept per catalog version (the catalog itself stays columnar)
+    CAR_CACHE_SIZE: int = int(os.getenv("CAR_CACHE_SIZE", "2048"))
 
     # Recommendation Settings
     DEFAULT_TOP_N: int = 10
     MAX_TOP_N: int = 100
     SIMILARITY_THRESHOLD: float = 0.5
+    # Candidates are ranked on the blended final score over every car above the
+    # similarity threshold. Only with an approximate index (and a candidate set too
+    # large for exact search) is the ranking limited to this many nearest cars
+    RANKING_MAX_CANDIDATES: int = int(os.getenv("RANKING_MAX_CANDIDATES", "2000"))
+    # Query-text embedding cache for recommend_by_text (per process)
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+    # Recommendation result cache (per process, keyed by request and catalog version)
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+    # Requests whose user locations round to the same value at this many decimal
+    # degrees (4 = ~11 m) share a cached ranking; reported distances stay exact
+    RESULT_CACHE_LOCATION_DECIMALS: int = int(os.getenv("RESULT_CACHE_LOCATION_DECIMALS", "4"))
 
 settings = Settings()
 
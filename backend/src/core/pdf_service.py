@@ -1,3 +1,4 @@
+import hashlib
 import PyPDF2
 from typing import List
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -22,3 +23,11 @@ class PDFService:
     
     def split_text(self, text: str) -> List[str]:
         return self.text_splitter.split_text(text)
+
+    def content_hash(self, pdf_path: str) -> str:
+        """sha256 (hex) of the file bytes, the key uploads are deduplicated on"""
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
@@ -22,6 +22,12 @@ class MongoDB:
         """Create necessary indexes for collections"""
         self._db['pdfs'].create_index("pdf_id", unique=True)
         self._db['pdfs'].create_index("conversation_id")
+        # Uploads of identical bytes are deduplicated by this hash. Not unique: references
+        # share their original's hash, and shared blobs and vectors are reference counted
+        # through blob_pdf_id / vectors_pdf_id instead
+        self._db['pdfs'].create_index("content_hash")
+        self._db['pdfs'].create_index("blob_pdf_id", sparse=True)
+        self._db['pdfs'].create_index("vectors_pdf_id")
         self._db['conversations'].create_index("conversation_id", unique=True)
         self._db['messages'].create_index([("conversation_id", 1), ("created_at", 1)])
         self._db['chunks'].create_index("chunk_id")
@@ -0,0 +1,316 @@
+import bisect
+import numpy as np
+from typing import Optional
+from src.schemas.car_schemas import CarFilters
+
+# Above this fraction of the catalog, one vectorized pass over the columns
+# beats gathering rows through an index
+FULL_SCAN_FRACTION = 0.25
+
+FACET_COLUMNS = ('manufacturer', 'type', 'fuel', 'state')
+# Lower bucket edges; the last bucket is open-ended
+PRICE_BUCKET_EDGES = (0, 5_000, 10_000, 15_000, 20_000, 25_000, 30_000, 40_000, 50_000, 75_000, 100_000)
+YEAR_BUCKET_SIZE = 5
+
+
+class SortedIndex:
+    """
+    Rows of a numeric column in ascending value order (NaN last). Answers
+    range queries with two binary searches and doubles as the precomputed
+    sort permutation for listings.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.order = np.argsort(values, kind="stable").astype(np.int32)
+        self.sorted_values = np.asarray(values)[self.order]
+        self.n_valid = int(np.count_nonzero(~np.isnan(self.sorted_values))) \
+            if self.sorted_values.dtype.kind == "f" else len(values)
+        self._ranks = {}
+
+    def _bounds(self, low: Optional[float], high: Optional[float]) -> tuple[int, int]:
+        valid = self.sorted_values[:self.n_valid]
+        start = 0 if low is None else int(np.searchsorted(valid, low, side="left"))
+        end = self.n_valid if high is None else int(np.searchsorted(valid, high, side="right"))
+        return start, max(start, end)
+
+    def count(self, low: Optional[float], high: Optional[float], include_missing: bool = False) -> int:
+        start, end = self._bounds(low, high)
+        return end - start + (len(self.order) - self.n_valid if include_missing else 0)
+
+    def rows(self, low: Optional[float], high: Optional[float], include_missing: bool = False) -> np.ndarray:
+        """Sorted row indices with low <= value <= high (plus NaN rows if include_missing)."""
+        start, end = self._bounds(low, high)
+        rows = self.order[start:end]
+        if include_missing:
+            rows = np.concatenate([rows, self.order[self.n_valid:]])
+        return np.sort(rows).astype(np.int64)
+
+    def percentiles(self, values: np.ndarray) -> np.ndarray:
+        """Fraction (0-1) of the catalog's values below each value; equal values share a percentile."""
+        valid = self.sorted_values[:self.n_valid]
+        below = np.searchsorted(valid, values, side="left")
+        return np.clip(below / max(self.n_valid - 1, 1), 0.0, 1.0)
+
+    def permutation(self, descending: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (rows in sort order, rank of every row in that order). NaN stays
+        last in both directions. Built lazily, once per direction.
+        """
+        if descending not in self._ranks:
+            order = self.order
+            if descending:
+                order = np.concatenate([order[:self.n_valid][::-1], order[self.n_valid:]])
+            ranks = np.empty(len(order), dtype=np.int32)
+            ranks[order] = np.arange(len(order), dtype=np.int32)
+            self._ranks[descending] = (order, ranks)
+        return self._ranks[descending]
+
+
+class InvertedIndex:
+    """Posting lists of a dictionary-encoded column: the rows holding each code."""
+
+    def __init__(self, codes: np.ndarray, n_values: int):
+        # Code -1 (missing) is shifted to slot 0
+        self.order = np.argsort(codes, kind="stable").astype(np.int32)
+        self.counts = np.bincount(np.asarray(codes) + 1, minlength=n_values + 1)
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)])
+
+    def count(self, codes: list[int]) -> int:
+        return int(sum(self.counts[code + 1] for code in codes))
+
+    def rows(self, codes: list[int]) -> np.ndarray:
+        """Sorted row indices holding any of the codes."""
+        postings = [self.order[self.starts[code + 1]:self.starts[code + 2]] for code in codes]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        rows = postings[0] if len(postings) == 1 else np.sort(np.concatenate(postings))
+        return rows.astype(np.int64)
+
+
+class PrefixIndex:
+    """
+    Autocomplete over manufacturer, model and "manufacturer model": the
+    lowercased keys are kept in one sorted list, so the entries starting
+    with a prefix are a contiguous slice found by two binary searches.
+    There is one entry per (key, kind): spellings that only differ in case
+    or spacing add up their counts and show the most listed spelling.
+    """
+
+    def __init__(self, manufacturer_codes: np.ndarray, model_codes: np.ndarray,
+                 manufacturers: list[str], models: list[str]):
+        entries = {}
+
+        def add(key: str, kind: str, manufacturer: Optional[str], model: Optional[str], count: int):
+            key = " ".join(key.lower().split())
+            if not key or not count:
+                return
+            total, best, names = entries.get((key, kind), (0, 0, None))
+            if count > best:
+                best, names = count, (manufacturer, model)
+            entries[(key, kind)] = (total + count, best, names)
+
+        for code, count in enumerate(np.bincount(manufacturer_codes[manufacturer_codes >= 0],
+                                                 minlength=len(manufacturers))):
+            add(manufacturers[code], "manufacturer", manufacturers[code], None, int(count))
+        for code, count in enumerate(np.bincount(model_codes[model_codes >= 0], minlength=len(models))):
+            add(models[code], "model", None, models[code], int(count))
+
+        both = (manufacturer_codes >= 0) & (model_codes >= 0)
+        pairs, counts = np.unique(
+            manufacturer_codes[both].astype(np.int64) * len(models) + model_codes[both], return_counts=True
+        )
+        for pair, count in zip(pairs, counts):
+            manufacturer, model = manufacturers[pair // len(models)], models[pair % len(models)]
+            add(f"{manufacturer} {model}", "manufacturer_model", manufacturer, model, int(count))
+
+        ordered = sorted(entries)
+        self.keys = [key for key, _ in ordered]
+        self.entries = [(kind, *entries[key, kind][2], entries[key, kind][0]) for key, kind in ordered]
+        self.counts = np.array([entry[3] for entry in self.entries], dtype=np.int64)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[dict]:
+        """Entries whose key starts with prefix, most listed first."""
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\U0010ffff", start)
+        counts = self.counts[start:end]
+        best = np.argpartition(-counts, limit - 1)[:limit] if len(counts) > limit else np.arange(len(counts))
+        best = best[np.lexsort((best, -counts[best]))]
+
+        suggestions = []
+        for position in best:
+            kind, manufacturer, model, count = self.entries[start + position]
+            suggestions.append({"text": self.keys[start + position], "kind": kind,
+                                "manufacturer": manufacturer, "model": model, "count": count})
+        return suggestions
+
+
+class _RangePredicate:
+    def __init__(self, column: str, low: Optional[float], high: Optional[float], missing_passes: bool):
+        self.column = column
+        self.low = low
+        self.high = high
+        self.missing_passes = missing_passes
+
+    def estimate(self, indexes: "CarIndexes") -> int:
+        return indexes.sorted[self.column].count(self.low, self.high, self.missing_passes)
+
+    def rows(self, indexes: "CarIndexes") -> np.ndarray:
+        return indexes.sorted[self.column].rows(self.low, self.high, self.missing_passes)
+
+    def probe(self, columns: dict, rows: np.ndarray) -> np.ndarray:
+        values = columns[self.column][rows]
+        keep = np.ones(len(rows), dtype=bool)
+        # NaN comparisons are False, so ~(v < low) lets missing values through
+        if self.low is not None:
+            keep &= ~(values < self.low) if self.missing_passes else values >= self.low
+        if self.high is not None:
+            keep &= ~(values > self.high) if self.missing_passes else values <= self.high
+        return keep
+
+
+class _SetPredicate:
+    def __init__(self, column: str, codes: list[int], n_values: int):
+        self.column = column
+        self.codes = codes
+        # Lookup table over codes shifted by one (slot 0 = missing)
+        self.lookup = np.zeros(n_values + 1, dtype=bool)
+        self.lookup[np.asarray(codes, dtype=np.int64) + 1] = True
+
+    def estimate(self, indexes: "CarIndexes") -> int:
+        return indexes.inverted[self.column].count(self.codes)
+
+    def rows(self, indexes: "CarIndexes") -> np.ndarray:
+        return indexes.inverted[self.column].rows(self.codes)
+
+    def probe(self, columns: dict, rows: np.ndarray) -> np.ndarray:
+        return self.lookup[columns[self.column][rows] + 1]
+
+
+class CarIndexes:
+    """
+    Secondary indexes over one catalog version plus a small query planner:
+    the most selective predicate is answered from its index, the others are
+    probed against the column values of the surviving rows only.
+    """
+
+    SORTED_COLUMNS = ('price', 'year', 'odometer')
+    INVERTED_COLUMNS = ('manufacturer', 'type', 'state', 'fuel', 'transmission')
+
+    def __init__(self, columns: dict[str, np.ndarray], vocabularies: dict[str, dict[str, int]]):
+        self.columns = columns
+        self.vocabularies = vocabularies
+        self.n_rows = len(columns['price'])
+        self.sorted = {column: SortedIndex(columns[column]) for column in self.SORTED_COLUMNS}
+        self.inverted = {
+            column: InvertedIndex(columns[column], len(vocabularies[column]))
+            for column in self.INVERTED_COLUMNS
+        }
+        self._values = {column: list(vocabularies[column]) for column in FACET_COLUMNS}
+        self._price_edges = np.array(PRICE_BUCKET_EDGES, dtype=np.float64)
+        years = self.sorted['year'].sorted_values
+        first_year = int(years[0]) // YEAR_BUCKET_SIZE * YEAR_BUCKET_SIZE if len(years) else 0
+        last_year = int(years[-1]) if len(years) else 0
+        self._year_edges = np.arange(first_year, last_year + 1, YEAR_BUCKET_SIZE, dtype=np.float64)
+        # Facets of the unfiltered catalog: the sidebar's initial state
+        self._catalog_facets = self._count_facets(None)
+        self.prefix = PrefixIndex(
+            columns['manufacturer'], columns['model'],
+            list(vocabularies['manufacturer']), list(vocabularies['model'])
+        )
+
+    def predicates(self, filters: Optional[CarFilters]) -> list:
+        """
+        Active predicates of a filter set. Same semantics as
+        CarRepository.build_filter_mask: falsy bounds are ignored and cars
+        without an odometer reading pass odometer filters.
+        """
+        if filters is None:
+            return []
+        predicates = []
+        for column, low, high, missing_passes in (
+            ('price', filters.min_price, filters.max_price, False),
+            ('year', filters.min_year, filters.max_year, False),
+            ('odometer', filters.min_odometer, filters.max_odometer, True),
+        ):
+            if low or high:
+                predicates.append(_RangePredicate(column, low or None, high or None, missing_passes))
+
+        for column, values in (
+            ('manufacturer', filters.manufacturers),
+            ('type', filters.types),
+            ('fuel', filters.fuel_types),
+            ('transmission', filters.transmissions),
+            ('state', filters.states),
+        ):
+            if values:
+                vocabulary = self.vocabularies[column]
+                codes = sorted({vocabulary[value] for value in values if value in vocabulary})
+                predicates.append(_SetPredicate(column, codes, len(vocabulary)))
+        return predicates
+
+    def find_rows(self, filters: Optional[CarFilters],
+                  base_rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Sorted rows matching filters (within base_rows when given), or None
+        when neither filters nor base_rows restrict the catalog.
+        """
+        predicates = self.predicates(filters)
+        if not predicates:
+            return base_rows
+
+        if base_rows is None:
+            predicates.sort(key=lambda predicate: predicate.estimate(self))
+            driver = predicates[0]
+            if driver.estimate(self) > FULL_SCAN_FRACTION * self.n_rows:
+                return None  # not selective: the caller's vectorized scan is cheaper
+            rows = driver.rows(self)
+            predicates = predicates[1:]
+        else:
+            rows = base_rows
+
+        for predicate in predicates:
+            if len(rows) == 0:
+                break
+            rows = rows[predicate.probe(self.columns, rows)]
+        return rows
+
+    def facets(self, rows: Optional[np.ndarray] = None) -> dict:
+        """
+        Value counts of the facet columns and price/year histograms over rows
+        (None = the whole catalog, precomputed for this version).
+        """
+        if rows is None:
+            return self._catalog_facets
+        return self._count_facets(rows)
+
+    def _count_facets(self, rows: Optional[np.ndarray]) -> dict:
+        def take(column: str) -> np.ndarray:
+            return self.columns[column] if rows is None else self.columns[column][rows]
+
+        facets = {}
+        for column in FACET_COLUMNS:
+            values = self._values[column]
+            # Slot 0 counts missing values (code -1)
+            counts = np.bincount(take(column) + 1, minlength=len(values) + 1)[1:]
+            present = np.flatnonzero(counts)
+            present = present[np.argsort(-counts[present], kind="stable")]
+            facets[column] = [{"value": values[code], "count": int(counts[code])} for code in present]
+
+        histograms = {}
+        for column, edges in (('price', self._price_edges), ('year', self._year_edges)):
+            if len(edges) == 0:
+                histograms[column] = []
+                continue
+            buckets = np.searchsorted(edges, take(column), side="right") - 1
+            counts = np.bincount(buckets[buckets >= 0], minlength=len(edges))
+            upper = list(edges[1:]) + [None]
+            histograms[column] = [
+                {"min": float(low), "max": None if high is None else float(high), "count": int(count)}
+                for low, high, count in zip(edges, upper, counts)
+            ]
+
+        total = self.n_rows if rows is None else len(rows)
+        return {"total": total, "facets": facets, "histograms": histograms}
@@ -1,103 +1,289 @@
-import json
+import threading
+import numpy as np
 from typing import List, Optional
 from pathlib import Path
 from src.schemas.car_schemas import Car , CarFilters , Location
+from src.repositories.catalog_snapshot import load_catalog, CatalogSnapshot, CATEGORICAL_COLUMNS, TEXT_COLUMNS
+from src.repositories.spatial_index import SpatialIndex
+from src.repositories.car_indexes import CarIndexes
+from src.repositories.text_index import BM25Index
 from src.core.config import settings
+from src.core.cache import LRUCache
 from pathlib import Path
 
 class CarRepository :
-    """Repository for car data operations - reads from JSON file."""
+    """
+    Repository for car data operations - reads from the shared catalog snapshot.
+    An instance is bound to the catalog version current when it was created,
+    so a request keeps seeing one version even if the catalog is swapped.
+    """
 
-    _data_cache = None
-    _cars_cache = None
+    # Views built per catalog version (the current one and the one being swapped in)
+    _views = {}
+    _views_lock = threading.Lock()
     _current_dir = Path.cwd()
 
 
-    def __init__(self):
+    def __init__(self, catalog: Optional[CatalogSnapshot] = None):
         self.settings = settings
         self.data_file = CarRepository._current_dir / self.settings.DATA_FILE_PATH
         # self.data_file = Path(self.settings.DATA_FILE_PATH or "data/cars.json")
-        if CarRepository._data_cache is  None:
-            self._load_data()
-
-    def _load_data(self):
-        """Load data from JSON file once."""
-        print(f"Loading data from {self.data_file}")
-        with open(self.data_file,'r',encoding="utf-8") as f :
-            CarRepository._data_cache = json.load(f)
-
-        # Build cars cache
-        CarRepository._cars_cache = {}
-        for car_id , car_data in CarRepository._data_cache['embeddings'].items():
-            metadata = car_data['metadata']
-
-            location = None
-            if metadata.get('lat') and metadata.get('long'):
-                try : 
-                    location = Location(
-                        latitude=float(metadata['lat']),
-                        longitude=float(metadata['long']),
-                    )
-                
-                except :
-                    pass
-
-                car = Car(
-                car_id=str(metadata['id']),
-                url=metadata.get('url'),
-                region=metadata.get('region'),
-                price=float(metadata['price']),
-                year=int(metadata['year']),
-                manufacturer=metadata['manufacturer'],
-                model=metadata['model'],
-                condition=metadata.get('condition'),
-                cylinders=metadata.get('cylinders'),
-                fuel=metadata.get('fuel'),
-                odometer=float(metadata['odometer']) if metadata.get('odometer') else None,
-                title_status=metadata.get('title_status'),
-                transmission=metadata.get('transmission'),
-                vin=metadata.get('vin'),
-                drive=metadata.get('drive'),
-                size=metadata.get('size'),
-                type=metadata.get('type'),
-                paint_color=metadata.get('paint_color'),
-                image_url=metadata.get('image_url'),
-                description=metadata.get('description'),
-                state=metadata.get('state'),
-                location=location,
-                combined_text=metadata.get('combined_text')
+        self.catalog = catalog or load_catalog()
+        views = CarRepository._views.get(self.catalog.version)
+        if views is None:
+            with CarRepository._views_lock:
+                views = CarRepository._views.get(self.catalog.version)
+                if views is None:
+                    views = self._load_data(self.catalog)
+                    CarRepository._views[self.catalog.version] = views
+                    while len(CarRepository._views) > 2:
+                        CarRepository._views.pop(next(iter(CarRepository._views)))
+
+        self._ids = self.catalog.ids
+        self._cars_cache = views['cars']
+        self._columns = views['columns']
+        self._vocabularies = views['vocabularies']
+        self._spatial_index = views['spatial_index']
+        self._indexes = views['indexes']
+        self._text_index = views['text_index']
+
+    def _load_data(self, catalog: CatalogSnapshot) -> dict:
+        """Build the columnar views over a catalog version."""
+        # Numeric columns plus dictionary-encoded category codes (-1 = missing)
+        columns = {**catalog.numeric, **catalog.codes}
+        vocabularies = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in catalog.vocabularies.items()
+        }
+        views = {
+            # Car objects are only built for rows that are actually requested,
+            # and only the most recently used ones are kept
+            'cars': LRUCache(self.settings.CAR_CACHE_SIZE),
+            'columns': columns,
+            'vocabularies': vocabularies,
+            'spatial_index': SpatialIndex(
+                columns['latitude'],
+                columns['longitude'],
+                cell_degrees=self.settings.SPATIAL_CELL_DEGREES
+            ),
+            # Sorted / inverted secondary indexes, also the listing sort permutations
+            'indexes': CarIndexes(columns, vocabularies),
+        }
+        views['text_index'] = None
+        if self.settings.LEXICAL_INDEX:
+            combined_text = catalog.text['combined_text']
+            views['text_index'] = BM25Index(combined_text.get(row) for row in range(len(combined_text)))
+        print(f"✅ Car repository ready ({len(catalog)} cars, catalog {catalog.version})")
+        return views
+
+    def _build_car(self, row: int) -> Car:
+        """Build a Car from one catalog row."""
+        catalog = self.catalog
+        numeric = catalog.numeric
+
+        location = None
+        if not np.isnan(numeric['latitude'][row]):
+            location = Location(
+                latitude=float(numeric['latitude'][row]),
+                longitude=float(numeric['longitude'][row]),
             )
-            CarRepository._cars_cache[str(metadata['id'])] = car
 
-        print(f"✅ Loaded {len(CarRepository._cars_cache)} cars from JSON")
+        odometer = numeric['odometer'][row]
+        return Car(
+            car_id=str(catalog.ids[row]),
+            price=float(numeric['price'][row]),
+            year=int(numeric['year'][row]),
+            odometer=None if np.isnan(odometer) else float(odometer),
+            location=location,
+            **{column: catalog.get_category(column, row) for column in CATEGORICAL_COLUMNS},
+            **{column: catalog.text[column].get(row) for column in TEXT_COLUMNS},
+        )
 
     def find_by_id(self , car_id:str)->Optional[Car]:
         """Find car by ID."""
-        return CarRepository._cars_cache.get(car_id)
+        row = self.catalog.row_of(car_id)
+        if row is None:
+            return None
+        return self.find_by_row(row)
     
-    def find_all(self , filters:Optional[CarFilters]=None , skip :int = 0 , limit : int = 100) -> List[Car]:
-        """Find all cars with filters."""
-        cars = list(CarRepository._cars_cache.values())
-
-        #Apply filters
-        if filters :
-            cars = [car for car in cars if self._matches_filters(car , filters)]
-        
+    def find_by_row(self, row: int) -> Car:
+        """Find car by catalog row index."""
+        row = int(row)
+        car = self._cars_cache.get(row)
+        if car is None:
+            car = self._build_car(row)
+            self._cars_cache.set(row, car)
+        return car
+
+    def find_all(self , filters:Optional[CarFilters]=None , skip :int = 0 , limit : int = 100,
+                 user_location: Optional[Location] = None, sort_by: Optional[str] = None,
+                 descending: bool = False) -> List[Car]:
+        """Find all cars with filters (offset pagination, prefer find_page for deep pages)."""
+        rows = self.find_candidate_rows(filters, user_location)
+        if sort_by:
+            permutation, ranks = self._indexes.sorted[sort_by].permutation(descending)
+            rows = permutation if rows is None else rows[np.argsort(ranks[rows])]
+        elif rows is None:
+            rows = np.arange(len(self._ids))
+
         #Apply pagination
-        return cars[skip:skip+limit]
+        return [self.find_by_row(row) for row in rows[skip:skip+limit]]
+
+    def find_page(self, filters: Optional[CarFilters] = None, after: int = -1, limit: int = 100,
+                  user_location: Optional[Location] = None, sort_by: Optional[str] = None,
+                  descending: bool = False) -> tuple[List[Car], Optional[int]]:
+        """
+        Keyset pagination: the first `limit` matching cars positioned after
+        `after` in the listing order (catalog order, or the precomputed sort
+        permutation of sort_by). Returns the cars and the position of the
+        last one to resume from, or None when there is nothing left.
+        Cost depends on the filtered set and the page size, not on the depth.
+        """
+        rows = self.find_candidate_rows(filters, user_location)
+        permutation = ranks = None
+        if sort_by:
+            permutation, ranks = self._indexes.sorted[sort_by].permutation(descending)
+
+        if rows is None:
+            # Unfiltered: positions are a plain slice of the listing order
+            positions = np.arange(after + 1, min(after + 1 + limit, len(self._ids)))
+        else:
+            positions = rows if ranks is None else ranks[rows]
+            positions = positions[positions > after]
+            if len(positions) > limit:
+                positions = np.partition(positions, limit - 1)[:limit]
+            positions = np.sort(positions)
+
+        page = positions if permutation is None else permutation[positions]
+        cars = [self.find_by_row(row) for row in page]
+        last = int(positions[-1]) if len(positions) == limit else None
+        return cars, last
     
-    def count(self, filters:Optional[CarFilters]=None)->int:
+    def count(self, filters:Optional[CarFilters]=None, user_location: Optional[Location] = None)->int:
         """Count cars matching filters."""
-        if not filters :
-            return len(CarRepository._cars_cache)
-        
-        cars = list(CarRepository._cars_cache.values())
-        filtred = [car for car in cars if self._matches_filters(car , filters)]
-        return len(filtred)
+        rows = self.find_candidate_rows(filters, user_location)
+        if rows is None :
+            return len(self._ids)
+        return len(rows)
+
+    def find_rows(self, filters: Optional[CarFilters] = None,
+                  user_location: Optional[Location] = None) -> np.ndarray:
+        """Row indices of the cars matching filters, in catalog order."""
+        rows = self.find_candidate_rows(filters, user_location)
+        if rows is None:
+            return np.arange(len(self._ids))
+        return rows
+
+    def find_candidate_rows(self, filters: Optional[CarFilters],
+                            user_location: Optional[Location] = None) -> Optional[np.ndarray]:
+        """
+        Sorted row indices matching filters, or None when nothing filters the catalog.
+        max_distance_km (with a user location) is answered by the spatial index
+        first, so attribute filters only run on the cars in range. Otherwise
+        the planner drives the query from the most selective secondary index.
+        """
+        if filters is not None and filters.max_distance_km and user_location is not None:
+            rows = self._spatial_index.query_radius(
+                user_location.latitude, user_location.longitude, filters.max_distance_km
+            )
+            return self._indexes.find_rows(filters, base_rows=rows)
+
+        # Selective filters go through the secondary indexes, broad ones through one vectorized scan
+        rows = self._indexes.find_rows(filters)
+        if rows is None:
+            mask = self.build_filter_mask(filters)
+            return None if mask is None else np.flatnonzero(mask)
+        return rows
+
+    def search_text(self, query: str, top_k: int,
+                    candidates: Optional[np.ndarray] = None) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        BM25 keyword search over combined_text: (rows, scores) best first,
+        restricted to candidates when given. None when LEXICAL_INDEX is off.
+        """
+        if self._text_index is None:
+            return None
+        return self._text_index.search(query, top_k, candidates)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[dict]:
+        """Manufacturer / model / "manufacturer model" completions of prefix, ranked by listing count."""
+        return self._indexes.prefix.suggest(prefix, limit)
+
+    def get_facets(self, filters: Optional[CarFilters] = None,
+                   user_location: Optional[Location] = None) -> dict:
+        """Facet counts and price/year histograms of the cars matching filters."""
+        return self._indexes.facets(self.find_candidate_rows(filters, user_location))
+
+    def get_catalog_version(self) -> str:
+        """Version of the loaded catalog snapshot."""
+        return self.catalog.version
+
+    def get_ids(self) -> np.ndarray:
+        """Get car IDs aligned with the catalog rows."""
+        return self._ids
+
+    def get_column(self, name: str) -> np.ndarray:
+        """Get a columnar attribute array (categorical columns hold vocabulary codes)."""
+        return self._columns[name]
+
+    def get_percentiles(self, name: str, rows: np.ndarray) -> np.ndarray:
+        """Catalog percentile (0-1) of a price / year / odometer value for each row."""
+        return self._indexes.sorted[name].percentiles(self._columns[name][rows])
+
+    def build_filter_mask(self, filters: Optional[CarFilters]) -> Optional[np.ndarray]:
+        """
+        Compile attribute filters into a boolean mask over the catalog rows.
+        Returns None when no filter is active. Same semantics as _matches_filters;
+        max_distance_km needs a user location and is handled by find_candidate_rows.
+        """
+        if filters is None:
+            return None
+
+        columns = self._columns
+        mask = np.ones(len(self._ids), dtype=bool)
+        active = False
+
+        if filters.min_price:
+            mask &= columns['price'] >= filters.min_price
+            active = True
+        if filters.max_price:
+            mask &= columns['price'] <= filters.max_price
+            active = True
+        if filters.min_year:
+            mask &= columns['year'] >= filters.min_year
+            active = True
+        if filters.max_year:
+            mask &= columns['year'] <= filters.max_year
+            active = True
+        # Cars without an odometer reading pass odometer filters (NaN comparisons are False)
+        if filters.min_odometer:
+            mask &= ~(columns['odometer'] < filters.min_odometer)
+            active = True
+        if filters.max_odometer:
+            mask &= ~(columns['odometer'] > filters.max_odometer)
+            active = True
+
+        for column, values in (
+            ('manufacturer', filters.manufacturers),
+            ('type', filters.types),
+            ('fuel', filters.fuel_types),
+            ('transmission', filters.transmissions),
+            ('state', filters.states),
+        ):
+            if values:
+                vocabulary = self._vocabularies[column]
+                codes = [vocabulary[value] for value in values if value in vocabulary]
+                mask &= np.isin(columns[column], codes)
+                active = True
+
+        return mask if active else None
     
     def get_all_cars(self) -> dict[str, Car]:
-        """Get all cars as dictionary."""
-        return CarRepository._cars_cache
+        """
+        Get all cars as dictionary. Builds a Car for every row (and bypasses
+        the car cache) - avoid on large catalogs, prefer find_all with paging.
+        """
+        return {str(car_id): self._build_car(row) for row, car_id in enumerate(self._ids)}
     
 
     def _matches_filters(self, car: Car, filters: CarFilters) -> bool:
@@ -0,0 +1,519 @@
+import json
+import hashlib
+import os
+import shutil
+import threading
+import numpy as np
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from src.core.config import settings
+from src.stores.vectorindex.utils import l2_normalize, quantize_storage
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent workers may build the same snapshot twice
+    fcntl = None
+
+FORMAT_VERSION = 2
+
+# Quantized copies of the (normalized) embeddings written next to the float32 rows
+QUANTIZED_MODES = ('float16', 'int8')
+
+NUMERIC_COLUMNS = {
+    'price': np.float64,
+    'year': np.int32,
+    'odometer': np.float64,   # NaN when unknown
+    'latitude': np.float64,   # NaN when unknown
+    'longitude': np.float64,  # NaN when unknown
+}
+# Low-cardinality strings, dictionary-encoded as int32 codes (-1 = missing)
+CATEGORICAL_COLUMNS = (
+    'manufacturer', 'model', 'type', 'fuel', 'transmission', 'state', 'region',
+    'condition', 'cylinders', 'title_status', 'drive', 'size', 'paint_color',
+)
+# Free text, stored as one UTF-8 blob plus row offsets per column
+TEXT_COLUMNS = ('url', 'vin', 'image_url', 'description', 'combined_text')
+
+
+class StringColumn:
+    """Variable-length strings packed in one UTF-8 buffer with row offsets."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, nulls: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+        self.nulls = nulls
+
+    @classmethod
+    def from_values(cls, values: list[Optional[str]]) -> "StringColumn":
+        encoded = [value.encode('utf-8') if value is not None else b'' for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        nulls = np.array([value is None for value in values], dtype=bool)
+        return cls(blob, offsets, nulls)
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+    def get(self, row: int) -> Optional[str]:
+        if self.nulls[row]:
+            return None
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf-8')
+
+    def take(self, rows: np.ndarray) -> "StringColumn":
+        """New column holding the given rows, in order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = np.asarray(self.offsets[rows], dtype=np.int64)
+        lengths = np.asarray(self.offsets[rows + 1], dtype=np.int64) - starts
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return StringColumn(np.asarray(self.blob[positions]), offsets, np.asarray(self.nulls[rows]))
+
+    def concat(self, other: "StringColumn") -> "StringColumn":
+        offsets = np.concatenate([self.offsets[:-1], other.offsets + self.offsets[-1]])
+        return StringColumn(np.concatenate([self.blob, other.blob]), offsets,
+                            np.concatenate([self.nulls, other.nulls]))
+
+
+class CatalogSnapshot:
+    """
+    Immutable columnar view of the car catalog shared by CarRepository and
+    EmbeddingRepository. Row i is the same car in every array.
+    Embeddings are stored L2-normalized. source_version is the version of the
+    JSON catalog it was built from (kept through incremental changes), and
+    source_stamp the (size, mtime_ns) that file had, so an unchanged file is
+    recognized without hashing it.
+    """
+
+    def __init__(self, version: str, ids: np.ndarray, embeddings: np.ndarray,
+                 numeric: dict[str, np.ndarray], codes: dict[str, np.ndarray],
+                 vocabularies: dict[str, list[str]], text: dict[str, StringColumn],
+                 path: Optional[Path] = None, id_order: Optional[np.ndarray] = None,
+                 sorted_ids: Optional[np.ndarray] = None,
+                 quantized: Optional[dict[str, tuple]] = None,
+                 source_version: Optional[str] = None,
+                 source_stamp: Optional[tuple[int, int]] = None):
+        self.version = version
+        self.source_version = source_version
+        self.source_stamp = source_stamp
+        self.ids = ids
+        self.embeddings = embeddings
+        self.numeric = numeric
+        self.codes = codes
+        self.vocabularies = vocabularies
+        self.text = text
+        self.path = path
+        self.quantized = quantized or {}
+
+        # Sorted ids give O(log n) id -> row lookups without a per-row dict
+        self.id_order = np.argsort(ids, kind='stable') if id_order is None else id_order
+        self.sorted_ids = ids[self.id_order] if sorted_ids is None else sorted_ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, car_id: str) -> Optional[int]:
+        """Row index of a car, or None."""
+        position = int(np.searchsorted(self.sorted_ids, car_id))
+        if position < len(self.sorted_ids) and self.sorted_ids[position] == car_id:
+            return int(self.id_order[position])
+        return None
+
+    def get_category(self, column: str, row: int) -> Optional[str]:
+        code = self.codes[column][row]
+        return self.vocabularies[column][code] if code >= 0 else None
+
+    def embedding_storage(self, storage_mode: str) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        """(vectors, int8 scales or None) in a storage mode, quantized on first use if not on disk."""
+        if storage_mode == 'float32':
+            return self.embeddings, None
+        if storage_mode not in self.quantized:
+            self.quantized[storage_mode] = quantize_storage(np.asarray(self.embeddings), storage_mode)
+        return self.quantized[storage_mode]
+
+
+def json_catalog_version(data_file: Path) -> str:
+    """Catalog version of a JSON file: a digest of its bytes."""
+    digest = hashlib.sha256()
+    with open(data_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def json_file_stamp(data_file: Path) -> tuple[int, int]:
+    """(size, mtime_ns) of a JSON catalog file: cheap to read, changes whenever the file is rewritten."""
+    stat = data_file.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _parse_records(records: list[dict], dimension: int = 0):
+    """
+    Columns of car records shaped like cars_embeddings.json entries
+    ({'metadata': {...}, 'embedding': [...]}). Categorical columns are
+    returned as raw value lists, embeddings as L2-normalized float32 rows.
+    """
+    n_cars = len(records)
+    ids, rows = [], []
+    numeric = {name: np.full(n_cars, np.nan, dtype=np.float64) for name in NUMERIC_COLUMNS}
+    categories = {name: [] for name in CATEGORICAL_COLUMNS}
+    texts = {name: [] for name in TEXT_COLUMNS}
+
+    for row, car_data in enumerate(records):
+        metadata = car_data['metadata']
+        ids.append(str(metadata['id']))
+        rows.append(car_data['embedding'])
+
+        numeric['price'][row] = float(metadata['price'])
+        numeric['year'][row] = int(metadata['year'])
+        if metadata.get('odometer'):
+            numeric['odometer'][row] = float(metadata['odometer'])
+        if metadata.get('lat') and metadata.get('long'):
+            try:
+                latitude, longitude = float(metadata['lat']), float(metadata['long'])
+                if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                    numeric['latitude'][row] = latitude
+                    numeric['longitude'][row] = longitude
+            except (TypeError, ValueError):
+                pass
+
+        for name in CATEGORICAL_COLUMNS:
+            categories[name].append(metadata.get(name))
+        for name in TEXT_COLUMNS:
+            texts[name].append(metadata.get(name))
+
+    if rows:
+        embeddings = np.array(rows, dtype=np.float32).reshape(n_cars, -1)
+    else:
+        embeddings = np.empty((0, dimension), dtype=np.float32)
+    numeric = {name: column.astype(NUMERIC_COLUMNS[name]) for name, column in numeric.items()}
+    return ids, np.ascontiguousarray(l2_normalize(embeddings)), numeric, categories, texts
+
+
+def _encode(values: list[Optional[str]], vocabulary: dict[str, int]) -> np.ndarray:
+    """Dictionary-encode values, growing the vocabulary with unseen ones."""
+    column = np.full(len(values), -1, dtype=np.int32)
+    for row, value in enumerate(values):
+        if value is not None:
+            column[row] = vocabulary.setdefault(value, len(vocabulary))
+    return column
+
+
+def snapshot_from_json(data_file: Path, version: Optional[str] = None) -> CatalogSnapshot:
+    """Parse cars_embeddings.json into a columnar (in-memory) snapshot."""
+    print(f"📂 Loading catalog from {data_file}...")
+    stamp = json_file_stamp(data_file)
+    version = version or json_catalog_version(data_file)
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    ids, embeddings, numeric, categories, texts = _parse_records(list(data['embeddings'].values()))
+    del data
+
+    codes, vocabularies = {}, {}
+    for name, values in categories.items():
+        vocabulary = {}
+        codes[name] = _encode(values, vocabulary)
+        vocabularies[name] = list(vocabulary)
+
+    return CatalogSnapshot(
+        version=version,
+        ids=np.array(ids),
+        embeddings=embeddings,
+        numeric=numeric,
+        codes=codes,
+        vocabularies=vocabularies,
+        text={name: StringColumn.from_values(values) for name, values in texts.items()},
+        source_version=version,
+        source_stamp=stamp,
+    )
+
+
+def apply_changes(catalog: CatalogSnapshot, upserts: list[dict], removals: list[str]) -> CatalogSnapshot:
+    """
+    New in-memory catalog version with cars added/updated (records shaped
+    like cars_embeddings.json entries) and removed by id. The input catalog
+    is left untouched; unchanged rows keep their relative order and updated
+    cars move to the end. A car upserted more than once keeps its last record.
+    """
+    upserts = list({str(car_data['metadata']['id']): car_data for car_data in upserts}.values())
+    dimension = catalog.embeddings.shape[1]
+    for car_data in upserts:
+        if len(car_data['embedding']) != dimension:
+            raise ValueError(f"Embedding of car {car_data['metadata']['id']} must have {dimension} dimensions")
+
+    ids, embeddings, numeric, categories, texts = _parse_records(upserts, dimension)
+    replaced = set(ids) | {str(car_id) for car_id in removals}
+    keep = np.flatnonzero(~np.isin(catalog.ids, list(replaced)))
+
+    vocabularies, codes = {}, {}
+    for name in CATEGORICAL_COLUMNS:
+        vocabulary = {value: code for code, value in enumerate(catalog.vocabularies[name])}
+        codes[name] = np.concatenate([catalog.codes[name][keep], _encode(categories[name], vocabulary)])
+        vocabularies[name] = list(vocabulary)
+
+    payload = json.dumps({'parent': catalog.version, 'upserts': upserts, 'removals': sorted(removals)},
+                         sort_keys=True, default=str)
+    return CatalogSnapshot(
+        version=hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16],
+        ids=np.concatenate([np.asarray(catalog.ids[keep]), np.array(ids, dtype=str)]),
+        embeddings=np.concatenate([np.asarray(catalog.embeddings[keep]), embeddings]),
+        numeric={name: np.concatenate([catalog.numeric[name][keep], numeric[name]]) for name in NUMERIC_COLUMNS},
+        codes=codes,
+        vocabularies=vocabularies,
+        text={name: catalog.text[name].take(keep).concat(StringColumn.from_values(texts[name]))
+              for name in TEXT_COLUMNS},
+        source_version=catalog.source_version,
+        source_stamp=catalog.source_stamp,
+    )
+
+
+def write_snapshot(catalog: CatalogSnapshot, snapshot_dir: Path) -> Path:
+    """
+    Write a catalog as <snapshot_dir>/<version>/ and point CURRENT at it.
+    The version directory is written under a temporary name and renamed,
+    so readers never see a partial snapshot.
+    """
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    target = snapshot_dir / catalog.version
+    staging = snapshot_dir / f".{catalog.version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+
+    np.save(staging / 'ids.npy', catalog.ids)
+    np.save(staging / 'id_order.npy', catalog.id_order)
+    np.save(staging / 'sorted_ids.npy', catalog.sorted_ids)
+    np.save(staging / 'embeddings.npy', np.asarray(catalog.embeddings, dtype=np.float32))
+    for mode in QUANTIZED_MODES:
+        vectors, scales = catalog.embedding_storage(mode)
+        np.save(staging / f'embeddings_{mode}.npy', vectors)
+        if scales is not None:
+            np.save(staging / f'embeddings_{mode}_scales.npy', scales)
+    for name, column in catalog.numeric.items():
+        np.save(staging / f'num_{name}.npy', column)
+    for name, column in catalog.codes.items():
+        np.save(staging / f'cat_{name}.npy', column)
+    for name, column in catalog.text.items():
+        np.save(staging / f'text_{name}_blob.npy', column.blob)
+        np.save(staging / f'text_{name}_offsets.npy', column.offsets)
+        np.save(staging / f'text_{name}_nulls.npy', column.nulls)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'catalog_version': catalog.version,
+        'source_version': catalog.source_version,
+        'source_stamp': catalog.source_stamp,
+        'n_cars': len(catalog),
+        'dimension': int(catalog.embeddings.shape[1]) if len(catalog) else 0,
+        'created_at': datetime.utcnow().isoformat(),
+        'vocabularies': catalog.vocabularies,
+    }
+    with open(staging / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+
+    point_current(snapshot_dir, catalog.version)
+    print(f"💾 Wrote catalog snapshot {catalog.version} ({len(catalog)} cars) to {target}")
+    return target
+
+
+def point_current(snapshot_dir: Path, version: str):
+    """Atomically point CURRENT at an existing snapshot version."""
+    pointer = snapshot_dir / '.CURRENT.tmp'
+    pointer.write_text(version)
+    os.replace(pointer, snapshot_dir / 'CURRENT')
+
+
+def read_snapshot(path: Path) -> CatalogSnapshot:
+    """Memory-map a snapshot version directory."""
+    with open(path / 'manifest.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported catalog snapshot format: {manifest['format_version']}")
+
+    def load(name: str) -> np.ndarray:
+        return np.load(path / name, mmap_mode='r')
+
+    quantized = {}
+    for mode in QUANTIZED_MODES:
+        scales = path / f'embeddings_{mode}_scales.npy'
+        quantized[mode] = (load(f'embeddings_{mode}.npy'), load(scales.name) if scales.exists() else None)
+
+    return CatalogSnapshot(
+        version=manifest['catalog_version'],
+        ids=load('ids.npy'),
+        embeddings=load('embeddings.npy'),
+        numeric={name: load(f'num_{name}.npy') for name in NUMERIC_COLUMNS},
+        codes={name: load(f'cat_{name}.npy') for name in CATEGORICAL_COLUMNS},
+        vocabularies=manifest['vocabularies'],
+        text={
+            name: StringColumn(load(f'text_{name}_blob.npy'), load(f'text_{name}_offsets.npy'),
+                               load(f'text_{name}_nulls.npy'))
+            for name in TEXT_COLUMNS
+        },
+        path=path,
+        id_order=load('id_order.npy'),
+        sorted_ids=load('sorted_ids.npy'),
+        quantized=quantized,
+        # Snapshots written before source_version was recorded were built from the JSON file
+        source_version=manifest.get('source_version', manifest['catalog_version']),
+        source_stamp=tuple(manifest['source_stamp']) if manifest.get('source_stamp') else None,
+    )
+
+
+def record_source_stamp(catalog: CatalogSnapshot, stamp: tuple[int, int]):
+    """
+    Note in a snapshot's manifest that its source JSON now has this stamp
+    (the file was touched or restored, its bytes still match source_version),
+    so the next start skips hashing it. Best effort; the manifest is replaced atomically.
+    """
+    catalog.source_stamp = stamp
+    if catalog.path is None:
+        return
+    try:
+        with open(catalog.path / 'manifest.json', 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest['source_stamp'] = stamp
+        staging = catalog.path / '.manifest.json.tmp'
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(staging, catalog.path / 'manifest.json')
+    except OSError as e:
+        print(f"⚠️ Could not update snapshot {catalog.version} manifest: {e}")
+
+
+@contextmanager
+def snapshot_build_lock(snapshot_dir: Path):
+    """Cross-process lock so only one worker builds a catalog version at a time."""
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    with open(snapshot_dir / '.lock', 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def current_version(snapshot_dir: Path) -> Optional[str]:
+    """Version CURRENT points at, or None."""
+    pointer = snapshot_dir / 'CURRENT'
+    return pointer.read_text().strip() if pointer.exists() else None
+
+
+def read_current(snapshot_dir: Path) -> Optional[CatalogSnapshot]:
+    version = current_version(snapshot_dir)
+    if version is None:
+        return None
+    try:
+        return read_snapshot(snapshot_dir / version)
+    except ValueError as e:
+        print(f"⚠️ Ignoring catalog snapshot: {e}")
+        return None
+
+
+def publish_json_snapshot(snapshot_dir: Path, data_file: Path, version: Optional[str] = None) -> CatalogSnapshot:
+    """
+    Snapshot of the JSON catalog as it is now, made CURRENT: an existing
+    snapshot of that version is reused, otherwise the file is converted.
+    Call under snapshot_build_lock.
+    """
+    version = version or json_catalog_version(data_file)
+    if (snapshot_dir / version).exists():
+        try:
+            catalog = read_snapshot(snapshot_dir / version)
+            stamp = json_file_stamp(data_file)
+            if catalog.source_stamp != stamp:
+                record_source_stamp(catalog, stamp)
+            point_current(snapshot_dir, version)
+            return catalog
+        except ValueError as e:
+            print(f"⚠️ Rebuilding catalog snapshot {version}: {e}")
+    return read_snapshot(write_snapshot(snapshot_from_json(data_file, version), snapshot_dir))
+
+
+def prune_snapshots(snapshot_dir: Path, keep: int):
+    """
+    Delete all but the `keep` newest snapshot versions (never CURRENT).
+    Processes still mapping a deleted version keep reading it until they
+    swap, since unlinked files stay alive while mapped.
+    """
+    current = current_version(snapshot_dir)
+    versions = sorted(
+        (path for path in snapshot_dir.iterdir() if path.is_dir() and not path.name.startswith('.')),
+        key=lambda path: path.stat().st_mtime, reverse=True
+    )
+    for path in versions[keep:]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def load_catalog() -> CatalogSnapshot:
+    """
+    Load the catalog once per process by memory-mapping the CURRENT binary
+    snapshot. Read-only maps of the same files are shared by every worker
+    through the page cache. Without a snapshot, or when cars_embeddings.json
+    no longer matches the version CURRENT was built from, the first worker
+    converts the file and the others wait for it and map the result; if the
+    snapshot directory is not writable the JSON catalog stays in memory.
+    The file is only hashed when its size or mtime differ from the ones
+    recorded in the snapshot.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            base_dir = Path.cwd()
+            snapshot_dir = base_dir / settings.CATALOG_SNAPSHOT_DIR
+            data_file = base_dir / settings.DATA_FILE_PATH
+            stamp = json_file_stamp(data_file) if data_file.exists() else None
+            json_version = None
+
+            def stale(catalog: Optional[CatalogSnapshot]) -> bool:
+                nonlocal json_version
+                if catalog is None:
+                    return True
+                if stamp is None or catalog.source_stamp == stamp:
+                    return False
+                if json_version is None:
+                    json_version = json_catalog_version(data_file)
+                if catalog.source_version != json_version:
+                    return True
+                record_source_stamp(catalog, stamp)
+                return False
+
+            _catalog = read_current(snapshot_dir)
+            if stale(_catalog):
+                if _catalog is not None:
+                    print(f"📂 {data_file} changed since snapshot {_catalog.version} was built, rebuilding the catalog")
+                try:
+                    with snapshot_build_lock(snapshot_dir):
+                        _catalog = read_current(snapshot_dir)
+                        if stale(_catalog):
+                            _catalog = publish_json_snapshot(snapshot_dir, data_file, json_version)
+                except OSError as e:
+                    print(f"⚠️ Could not write catalog snapshot, keeping the JSON catalog in memory: {e}")
+                    _catalog = snapshot_from_json(data_file, json_version)
+            print(f"✅ Catalog {_catalog.version} ready ({len(_catalog)} cars, "
+                  f"{'memory-mapped' if _catalog.path else 'in memory'})")
+        return _catalog
+
+
+def set_catalog(catalog: CatalogSnapshot):
+    """
+    Make catalog the version returned by load_catalog(). Repositories bind
+    to a catalog when they are constructed, so requests already running
+    keep the version they started with.
+    """
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
@@ -1,42 +1,217 @@
-import json
+import threading
 import numpy as np
 from typing import Optional
 from pathlib import Path
 from src.core.config import settings
-import os
-from pathlib import Path
+from src.repositories.catalog_snapshot import load_catalog, CatalogSnapshot
+from src.repositories.neighbor_table import load_neighbor_table
+from src.stores.vectorindex.providers import FlatIndex
+from src.stores.vectorindex.vectorindex_factory import VectorIndexFactory
 
 
 class EmbeddingRepository:
-    """Repository for embedding data operations - reads from JSON file."""
-    
-    _embeddings_cache = None
+    """
+    Repository for embedding data operations - reads from the shared catalog snapshot.
+    Like CarRepository, an instance is bound to one catalog version.
+    """
+
+    # Indexes built per catalog version (the current one and the one being swapped in)
+    _views = {}
+    _views_lock = threading.Lock()
     _current_dir = Path.cwd()
 
-    def __init__(self):
+    def __init__(self, catalog: Optional[CatalogSnapshot] = None):
         self.settings = settings
         self.data_file = EmbeddingRepository._current_dir / self.settings.DATA_FILE_PATH
-        if EmbeddingRepository._embeddings_cache is None:
-            self._load_embeddings()
-
-    def _load_embeddings(self):
-        """Load embeddings from JSON file once."""
-        print(f"📂 Loading embeddings from {self.data_file}...")
-        with open(self.data_file,'r',encoding='utf-8')  as f:
-            data = json.load(f)
-
-        EmbeddingRepository._embeddings_cache = {}
-        for car_id , car_data in data['embeddings'].items():
-            embedding = np.array(car_data['embedding'],dtype=np.float32)
-            EmbeddingRepository._embeddings_cache[car_id] = embedding
-        
-        print(f"✅ Loaded {len(EmbeddingRepository._embeddings_cache)} embeddings")
+        self._catalog = catalog or load_catalog()
+        views = EmbeddingRepository._views.get(self._catalog.version)
+        if views is None:
+            with EmbeddingRepository._views_lock:
+                views = EmbeddingRepository._views.get(self._catalog.version)
+                if views is None:
+                    views = self._load_embeddings(self._catalog)
+                    EmbeddingRepository._views[self._catalog.version] = views
+                    while len(EmbeddingRepository._views) > 2:
+                        EmbeddingRepository._views.pop(next(iter(EmbeddingRepository._views)))
+
+        self._ids = self._catalog.ids
+        self._index = views['index']
+        self._ann_index = views['ann_index']
+        self._neighbors = views['neighbors']
+
+    def _load_embeddings(self, catalog: CatalogSnapshot) -> dict:
+        """
+        Serve embeddings straight from the shared catalog in the configured
+        storage mode. Snapshot arrays are read-only memory maps, so no
+        per-worker copy is made; quantized modes rescore against the float32 map.
+        """
+        storage_mode = self.settings.EMBEDDING_STORAGE_MODE
+        vectors, scales = catalog.embedding_storage(storage_mode)
+        index = FlatIndex(
+            vectors,
+            storage_mode=storage_mode,
+            scales=scales,
+            rescore_vectors=catalog.embeddings if storage_mode != "float32" else None,
+            rescore_factor=self.settings.EMBEDDING_RESCORE_FACTOR,
+            block_size=self.settings.EMBEDDING_BLOCK_SIZE
+        )
+        print(f"✅ Loaded {len(index)} embeddings ({index.storage_mode}, {index.nbytes / 1e6:.1f} MB)")
+
+        neighbors = None
+        if self.settings.USE_NEIGHBOR_TABLE:
+            neighbors = load_neighbor_table(catalog.path)
+            if neighbors is not None:
+                print(f"✅ Loaded neighbour table (top-{neighbors.k})")
+
+        return {
+            'index': index,
+            'ann_index': self._load_ann_index(catalog.embeddings, catalog.version),
+            'neighbors': neighbors,
+        }
+
+    def _load_ann_index(self, matrix: np.ndarray, catalog_version: str):
+        """Load (or build and persist) the configured approximate index; None means exact search."""
+        provider = self.settings.VECTOR_INDEX_PROVIDER
+        if provider == "flat":
+            return None
+
+        # Index files are keyed by the catalog version and the build parameters,
+        # so a stale index is never reused (ef_search / nprobe are query-time only)
+        if provider == "hnsw":
+            build = f"m{self.settings.HNSW_M}_ef{self.settings.HNSW_EF_CONSTRUCTION}"
+        else:
+            build = f"lists{self.settings.IVF_N_LISTS or 'auto'}"
+        index_path = (EmbeddingRepository._current_dir / self.settings.VECTOR_INDEX_DIR /
+                      f"{provider}_{catalog_version}_{build}.bin")
+        try:
+            return VectorIndexFactory.create(
+                provider,
+                matrix,
+                index_path=str(index_path),
+                m=self.settings.HNSW_M,
+                ef_construction=self.settings.HNSW_EF_CONSTRUCTION,
+                ef_search=self.settings.HNSW_EF_SEARCH,
+                n_lists=self.settings.IVF_N_LISTS,
+                nprobe=self.settings.IVF_NPROBE
+            )
+        except Exception as e:
+            print(f"⚠️ Could not load {provider} index, falling back to exact search: {e}")
+            return None
 
     def get_embedding(self , car_id:str) -> Optional[np.array]:
-        """Get embedding for a car."""
-        return EmbeddingRepository._embeddings_cache.get(car_id)
-    
+        """Get the (normalized) embedding for a car."""
+        index = self.get_index(car_id)
+        if index is None:
+            return None
+        return self._index.get_vector(index)
+
+    def get_index(self, car_id: str) -> Optional[int]:
+        """Get the row index of a car."""
+        return self._catalog.row_of(car_id)
+
+    def get_ids(self) -> np.ndarray:
+        """Get car IDs aligned with the embedding rows."""
+        return self._ids
+
+    def search(self, query_embedding, top_k: int,
+               exclude_index: Optional[int] = None, exact: bool = False,
+               candidates: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row indices, cosine similarities) of the top_k most similar cars.
+        Uses the approximate index when one is configured, unless exact=True.
+        candidates restricts the search to pre-filtered rows: small candidate
+        sets are scored exactly, large ones go through the approximate index
+        with oversampling and fall back to exact search if it comes up short.
+        """
+        ann_index = self._ann_index
+        if ann_index is None or exact:
+            return self._index.search(query_embedding, top_k, exclude_index, candidates)
+        if candidates is None:
+            return ann_index.search(query_embedding, top_k, exclude_index)
+        if len(candidates) <= self.settings.ANN_EXACT_FILTER_ROWS:
+            return self._index.search(query_embedding, top_k, exclude_index, candidates)
+
+        oversample = int(np.ceil(top_k * len(self._ids) / len(candidates)))
+        rows, scores = ann_index.search(query_embedding, oversample, exclude_index)
+        keep = np.isin(rows, candidates)
+        if np.count_nonzero(keep) >= top_k:
+            return rows[keep][:top_k], scores[keep][:top_k]
+        return self._index.search(query_embedding, top_k, exclude_index, candidates)
+
+    def search_batch(self, query_embeddings, top_k: int,
+                     exclude_indices: Optional[np.ndarray] = None, exact: bool = False,
+                     candidates: Optional[np.ndarray] = None) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Batched search returning one (row indices, cosine similarities) pair per query.
+        Exact search scores all queries in one matrix-matrix pass over the
+        catalog; with an approximate index, queries that would use it are
+        searched one by one.
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if exclude_indices is None:
+            exclude_indices = np.full(len(queries), -1, dtype=np.int64)
+
+        use_exact = (self._ann_index is None or exact or
+                     (candidates is not None and len(candidates) <= self.settings.ANN_EXACT_FILTER_ROWS))
+        if use_exact:
+            return self._index.search_batch(queries, top_k, exclude_indices, candidates)
+        return [
+            self.search(query, top_k, int(exclude) if exclude >= 0 else None, candidates=candidates)
+            for query, exclude in zip(queries, exclude_indices)
+        ]
+
+    def search_above(self, query_embeddings, min_cosine: float,
+                     exclude_indices: Optional[np.ndarray] = None,
+                     candidates: Optional[np.ndarray] = None) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        (row indices, cosine similarities) of every car whose similarity to a
+        query is at least min_cosine, one pair per query, in row order. The
+        (pre-filtered) rows are scored in one exact pass. With an approximate
+        index, candidate sets too large for exact search only keep the
+        RANKING_MAX_CANDIDATES nearest cars the index finds (approximate).
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if exclude_indices is None:
+            exclude_indices = np.full(len(queries), -1, dtype=np.int64)
+
+        use_exact = (self._ann_index is None or
+                     (candidates is not None and len(candidates) <= self.settings.ANN_EXACT_FILTER_ROWS))
+        if use_exact:
+            return self._index.search_above(queries, min_cosine, exclude_indices, candidates)
+
+        results = []
+        for query, exclude in zip(queries, exclude_indices):
+            rows, cosines = self.search(
+                query, self.settings.RANKING_MAX_CANDIDATES, int(exclude) if exclude >= 0 else None,
+                candidates=candidates
+            )
+            keep = cosines >= min_cosine
+            results.append((rows[keep], cosines[keep]))
+        return results
+
+    def get_similarities(self, query_embedding, rows: np.ndarray) -> np.ndarray:
+        """Cosine similarities of a query to the given rows, in float32."""
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1.0)
+        return self._index.get_vectors(rows) @ query
+
+    def get_neighbors(self, index: int) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        (row indices, cosine similarities) of a car's precomputed neighbours,
+        rescored in float32 and best first. Every car outside the list scores
+        at most the last cosine. Returns None without a neighbour table.
+        """
+        table = self._neighbors
+        if table is None:
+            return None
+        rows, _ = table.neighbors(index)
+        cosines = self._index.get_vectors(rows) @ self._index.get_vector(index)
+        order = np.argsort(-cosines, kind="stable")
+        return rows[order], cosines[order]
+
     def get_all_embeddings(self) ->dict[str, np.array]:
-        """Get all embeddings."""
-        print(self.data_file)
-        return EmbeddingRepository._embeddings_cache
\ No newline at end of file
+        """Get all embeddings (materializes a float32 copy of every row)."""
+        return {
+            str(car_id): self._index.get_vector(i)
+            for i, car_id in enumerate(self._ids)
+        }
@@ -0,0 +1,208 @@
+import os
+import numpy as np
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Optional
+from src.repositories.catalog_snapshot import CatalogSnapshot, read_snapshot
+from src.stores.vectorindex.providers import FlatIndex
+from src.stores.vectorindex.utils import top_k_indices
+
+ROWS_FILE = 'neighbors_rows.npy'
+SCORES_FILE = 'neighbors_scores.npy'
+
+
+class NeighborTable:
+    """
+    Precomputed exact top-K neighbours of every car: row i of `rows` holds
+    the catalog rows most similar to car i (best first, int32, -1 = padding)
+    and `scores` their cosine similarities (float16).
+    """
+
+    def __init__(self, rows: np.ndarray, scores: np.ndarray):
+        self.rows = rows
+        self.scores = scores
+        self.k = rows.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def neighbors(self, row: int) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, cosines) of one car's neighbours, best first."""
+        rows = np.asarray(self.rows[row], dtype=np.int64)
+        valid = rows >= 0
+        return rows[valid], np.asarray(self.scores[row], dtype=np.float32)[valid]
+
+
+def load_neighbor_table(snapshot_path: Optional[Path]) -> Optional[NeighborTable]:
+    """Memory-map the neighbour table stored with a catalog snapshot, if it was built."""
+    if snapshot_path is None or not (snapshot_path / ROWS_FILE).exists():
+        return None
+    return NeighborTable(
+        np.load(snapshot_path / ROWS_FILE, mmap_mode='r'),
+        np.load(snapshot_path / SCORES_FILE, mmap_mode='r')
+    )
+
+
+_worker_index = None
+
+
+def _init_worker(snapshot_path: Path, block_size: int):
+    # Every worker maps the same snapshot files, so the matrix is shared through the page cache
+    global _worker_index
+    catalog = read_snapshot(snapshot_path)
+    _worker_index = FlatIndex(catalog.embeddings, block_size=block_size)
+
+
+def _neighbors_of_chunk(task: tuple[int, int, int]) -> tuple[int, np.ndarray, np.ndarray]:
+    start, end, k = task
+    queries = np.asarray(_worker_index.vectors[start:end], dtype=np.float32)
+    results = _worker_index.search_batch(queries, k, exclude_indices=np.arange(start, end))
+
+    rows = np.full((end - start, k), -1, dtype=np.int32)
+    scores = np.zeros((end - start, k), dtype=np.float16)
+    for i, (found, cosines) in enumerate(results):
+        rows[i, :len(found)] = found
+        scores[i, :len(found)] = cosines
+    return start, rows, scores
+
+
+def build_neighbor_table(snapshot_path: Path, k: int = 200, workers: Optional[int] = None,
+                         chunk_size: int = 256, block_size: int = 65536) -> NeighborTable:
+    """
+    Compute the exact top-k neighbours of every car of a snapshot, spread over
+    worker processes, and store them in the snapshot directory.
+    """
+    snapshot_path = Path(snapshot_path)
+    n_cars = len(read_snapshot(snapshot_path))
+    k = min(k, max(n_cars - 1, 0))
+    workers = workers or os.cpu_count() or 1
+
+    staging_rows = snapshot_path / f'.{ROWS_FILE}.tmp'
+    staging_scores = snapshot_path / f'.{SCORES_FILE}.tmp'
+    rows = np.lib.format.open_memmap(staging_rows, mode='w+', dtype=np.int32, shape=(n_cars, k))
+    scores = np.lib.format.open_memmap(staging_scores, mode='w+', dtype=np.float16, shape=(n_cars, k))
+
+    tasks = [(start, min(start + chunk_size, n_cars), k) for start in range(0, n_cars, chunk_size)]
+    print(f"🔨 Computing top-{k} neighbours of {n_cars} cars with {workers} workers...")
+    with Pool(workers, initializer=_init_worker, initargs=(snapshot_path, block_size)) as pool:
+        for done, (start, chunk_rows, chunk_scores) in enumerate(pool.imap_unordered(_neighbors_of_chunk, tasks), 1):
+            rows[start:start + len(chunk_rows)] = chunk_rows
+            scores[start:start + len(chunk_scores)] = chunk_scores
+            if done % 100 == 0:
+                print(f"  {done}/{len(tasks)} chunks")
+
+    rows.flush()
+    scores.flush()
+    del rows, scores
+    os.replace(staging_rows, snapshot_path / ROWS_FILE)
+    os.replace(staging_scores, snapshot_path / SCORES_FILE)
+    print(f"💾 Saved neighbour table to {snapshot_path}")
+    return load_neighbor_table(snapshot_path)
+
+
+def update_neighbor_table(previous: CatalogSnapshot, catalog: CatalogSnapshot,
+                          max_changed_fraction: float = 0.1, chunk_size: int = 4096,
+                          block_size: int = 65536) -> Optional[NeighborTable]:
+    """
+    Derive the neighbour table of a new catalog version from the previous
+    version's table instead of recomputing it, and store it in the new
+    snapshot directory.
+
+    Cars whose id and embedding are unchanged keep their surviving neighbours
+    (rows renumbered, removed or changed cars dropped), so each list stays the
+    exact top-m of the new catalog for some m <= k. A changed car joins a list
+    only if it scores at least the list's last surviving neighbour; such lists
+    are rescored exactly and cut back to k. Lists that lose every neighbour
+    are left empty (recommend_by_car_id scans for those cars), and added or
+    changed cars get an exact search. Returns None (no table, so by-id
+    recommendations scan) when the previous version has no table or more
+    than max_changed_fraction of the cars changed: rebuild with
+    build_neighbor_table.py then.
+    """
+    if catalog.path is None or previous.path is None or len(previous) == 0:
+        return None
+    if (catalog.path / ROWS_FILE).exists():
+        return load_neighbor_table(catalog.path)
+    table = load_neighbor_table(previous.path)
+    if table is None:
+        return None
+
+    n_cars, k = len(catalog), table.k
+    embeddings = catalog.embeddings
+    positions = np.minimum(np.searchsorted(previous.sorted_ids, catalog.ids), len(previous) - 1)
+    old_rows = np.asarray(previous.id_order[positions], dtype=np.int64)
+    unchanged = np.asarray(previous.sorted_ids[positions] == catalog.ids)
+    for start in range(0, n_cars, block_size):
+        end = min(start + block_size, n_cars)
+        same = np.all(np.asarray(embeddings[start:end]) == previous.embeddings[old_rows[start:end]], axis=1)
+        unchanged[start:end] &= same
+    changed = np.flatnonzero(~unchanged)
+    if len(changed) > max_changed_fraction * n_cars:
+        print(f"⚠️ {len(changed)} of {n_cars} cars changed, not deriving a neighbour table "
+              f"(run build_neighbor_table.py)")
+        return None
+
+    kept = np.flatnonzero(unchanged)
+    old_to_new = np.full(len(previous), -1, dtype=np.int64)
+    old_to_new[old_rows[kept]] = kept
+    complete = len(previous) - 1
+
+    staging_rows = catalog.path / f'.{ROWS_FILE}.tmp'
+    staging_scores = catalog.path / f'.{SCORES_FILE}.tmp'
+    rows = np.lib.format.open_memmap(staging_rows, mode='w+', dtype=np.int32, shape=(n_cars, k))
+    scores = np.lib.format.open_memmap(staging_scores, mode='w+', dtype=np.float16, shape=(n_cars, k))
+    rows[:] = -1
+
+    # Added and changed cars: exact search over the new catalog
+    index = FlatIndex(embeddings, block_size=block_size)
+    for start in range(0, len(changed), chunk_size):
+        chunk = changed[start:start + chunk_size]
+        results = index.search_batch(np.asarray(embeddings[chunk]), k, exclude_indices=chunk)
+        for row, (found, cosines) in zip(chunk, results):
+            rows[row, :len(found)] = found
+            scores[row, :len(found)] = cosines
+
+    changed_vectors = np.asarray(embeddings[changed], dtype=np.float32)
+    merged = 0
+    for start in range(0, len(kept), chunk_size):
+        chunk = kept[start:start + chunk_size]
+        listed = np.asarray(table.rows[old_rows[chunk]], dtype=np.int64)
+        stored = np.asarray(table.scores[old_rows[chunk]])
+        was_complete = (listed >= 0).sum(axis=1) >= complete
+        listed = np.where(listed >= 0, old_to_new[listed], -1)
+
+        # Surviving neighbours first, keeping their order
+        order = np.argsort(listed < 0, axis=1, kind='stable')
+        listed = np.take_along_axis(listed, order, axis=1)
+        stored = np.take_along_axis(stored, order, axis=1)
+        n_listed = (listed >= 0).sum(axis=1)
+        rows[chunk] = listed
+        scores[chunk] = np.where(listed >= 0, stored, 0)
+        if len(changed) == 0:
+            continue
+
+        # Changed cars scoring at least a list's last survivor (whose true cosine
+        # bounds every car outside the old list) belong in it
+        queries = np.asarray(embeddings[chunk], dtype=np.float32)
+        last = listed[np.arange(len(chunk)), np.maximum(n_listed - 1, 0)]
+        floor = np.einsum('ij,ij->i', queries, np.asarray(embeddings[np.maximum(last, 0)], dtype=np.float32))
+        floor = np.where(was_complete, -np.inf, np.where(n_listed > 0, floor, np.inf))
+        joins = (queries @ changed_vectors.T) >= floor[:, None]
+        for i in np.flatnonzero(joins.any(axis=1)):
+            candidates = np.concatenate([listed[i, :n_listed[i]], changed[joins[i]]])
+            cosines = np.asarray(embeddings[candidates], dtype=np.float32) @ queries[i]
+            best = top_k_indices(cosines, k)
+            rows[chunk[i]] = -1
+            rows[chunk[i], :len(best)] = candidates[best]
+            scores[chunk[i]] = 0
+            scores[chunk[i], :len(best)] = cosines[best]
+            merged += 1
+
+    rows.flush()
+    scores.flush()
+    del rows, scores
+    os.replace(staging_rows, catalog.path / ROWS_FILE)
+    os.replace(staging_scores, catalog.path / SCORES_FILE)
+    print(f"💾 Derived neighbour table of {catalog.version} from {previous.version} "
+          f"({len(changed)} cars searched, {merged} lists merged)")
+    return load_neighbor_table(catalog.path)
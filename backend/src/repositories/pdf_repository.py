@@ -1,44 +1,100 @@
 from pymongo.database import Database
 from datetime import datetime
-from typing import List , Dict , Optional
+from typing import List , Dict , Optional , Set
 from bson import Binary
 
 class PDFRepository:
     def __init__(self, db: Database):
         self.collection = db["pdfs"]
 
-    def create(self, pdf_id: str, filename: str, content: bytes, 
-               conversation_id: Optional[str] = None) -> str:
+    def create(self, pdf_id: str, filename: str, content: bytes,
+               conversation_id: Optional[str] = None, content_hash: Optional[str] = None) -> str:
         doc = {
             "pdf_id": pdf_id,
             "filename": filename,
             "content": Binary(content),
+            "content_hash": content_hash,
+            # Chunks are stored in the vector DB under this pdf_id (shared by duplicates)
+            "vectors_pdf_id": pdf_id,
             "conversation_id": conversation_id,
             "uploaded_at": datetime.utcnow()
         }
         result = self.collection.insert_one(doc)
         return str(result.inserted_id)
-    
+
+    def create_reference(self, pdf_id: str, filename: str, existing: Dict,
+                         conversation_id: Optional[str] = None) -> str:
+        """Record a duplicate upload: it shares the blob and the vectors of an existing PDF."""
+        doc = {
+            "pdf_id": pdf_id,
+            "filename": filename,
+            "content": None,
+            "content_hash": existing["content_hash"],
+            "blob_pdf_id": existing.get("blob_pdf_id") or existing["pdf_id"],
+            "vectors_pdf_id": existing.get("vectors_pdf_id", existing["pdf_id"]),
+            "conversation_id": conversation_id,
+            "uploaded_at": datetime.utcnow()
+        }
+        result = self.collection.insert_one(doc)
+        return str(result.inserted_id)
+
     def find_by_id(self, pdf_id: str) -> Optional[Dict]:
         return self.collection.find_one({"pdf_id": pdf_id})
-    
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[Dict]:
+        """A stored PDF with these bytes (without its content), or None."""
+        return self.collection.find_one({"content_hash": content_hash}, {"content": 0})
+
     def find_by_conversation(self, conversation_id: str) -> List[Dict]:
         return list(self.collection.find({"conversation_id": conversation_id}))
-    
+
     def find_global_pdfs(self) -> List[Dict]:
         return list(self.collection.find({"conversation_id": ""}))
-    
-    def delete(self, pdf_id: str) -> int:
-        result = self.collection.delete_one({"pdf_id": pdf_id})
-        if result.deleted_count > 0:
-            self.rag_service.vectordb.delete_by_pdf_id(pdf_id)
-        return result.deleted_count
-    
-    def delete_by_conversation(self, conversation_id: str) -> int:
-        result = self.collection.delete_many({"conversation_id": conversation_id})
-        if result.deleted_count > 0:
-            self.rag_service.vectordb.delete_by_conversation_id(conversation_id)
-        return result.deleted_count
-    
+
+    def find_vector_ids(self, conversation_id: str, include_global: bool = False) -> Set[str]:
+        """pdf_ids under which the chunks of a conversation's PDFs (and global ones) are stored."""
+        conversations = [conversation_id, "", None] if include_global else [conversation_id]
+        docs = self.collection.find(
+            {"conversation_id": {"$in": conversations}}, {"pdf_id": 1, "vectors_pdf_id": 1}
+        )
+        return {doc.get("vectors_pdf_id") or doc["pdf_id"] for doc in docs}
+
+    def delete(self, pdf_id: str) -> Optional[str]:
+        """
+        Delete a PDF. Duplicates share one blob and one set of vectors, reference
+        counted through blob_pdf_id and vectors_pdf_id (not content_hash: two
+        concurrent uploads of the same bytes may each store their own). The blob
+        moves to a remaining PDF that references it, and the pdf_id of the vectors
+        is returned (for the caller to delete them) only once no PDF uses them.
+        """
+        doc = self.collection.find_one({"pdf_id": pdf_id}, {"content": 0})
+        if doc is None:
+            return None
+
+        if not doc.get("blob_pdf_id"):
+            heir = self.collection.find_one({"blob_pdf_id": pdf_id}, {"pdf_id": 1})
+            if heir is not None:
+                # The deleted document holds the bytes: hand them over to a PDF referencing them
+                content = self.collection.find_one({"pdf_id": pdf_id}, {"content": 1})["content"]
+                self.collection.update_one(
+                    {"pdf_id": heir["pdf_id"]}, {"$set": {"content": content}, "$unset": {"blob_pdf_id": ""}}
+                )
+                self.collection.update_many({"blob_pdf_id": pdf_id}, {"$set": {"blob_pdf_id": heir["pdf_id"]}})
+
+        self.collection.delete_one({"pdf_id": pdf_id})
+        vectors_pdf_id = doc.get("vectors_pdf_id") or doc["pdf_id"]
+        if self.collection.count_documents({"vectors_pdf_id": vectors_pdf_id}, limit=1):
+            return None
+        return vectors_pdf_id
+
+    def delete_by_conversation(self, conversation_id: str) -> List[str]:
+        """Delete a conversation's PDFs; returns the pdf_ids of vectors no PDF uses anymore."""
+        orphaned = []
+        for doc in list(self.collection.find({"conversation_id": conversation_id}, {"pdf_id": 1})):
+            vectors_pdf_id = self.delete(doc["pdf_id"])
+            if vectors_pdf_id:
+                orphaned.append(vectors_pdf_id)
+        return orphaned
+
     def count_all(self) -> int:
-        return self.collection.count_documents({})
\ No newline at end of file
+        return self.collection.count_documents({})
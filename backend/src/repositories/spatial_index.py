@@ -0,0 +1,80 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat: float, lon: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of coordinates (NaN stays NaN)."""
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    lat2 = np.radians(latitudes)
+    lon2 = np.radians(longitudes)
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class SpatialIndex:
+    """
+    Grid-bucket index over car locations.
+    Rows are sorted by lat/lon grid cell, so a radius query only gathers the
+    cells overlapping the query's bounding box and checks those rows exactly.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell_degrees: float = 0.5):
+        self.cell_degrees = cell_degrees
+        self.n_lon_cells = int(np.ceil(360 / cell_degrees))
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+
+        rows = np.flatnonzero(~np.isnan(latitudes) & ~np.isnan(longitudes))
+        keys = self._cell_keys(latitudes[rows], longitudes[rows])
+        order = np.argsort(keys, kind="stable")
+
+        self.rows = rows[order]
+        self.cell_keys, self.cell_starts = np.unique(keys[order], return_index=True)
+        self.cell_ends = np.append(self.cell_starts[1:], len(self.rows))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Sorted row indices of the cars within radius_km of (lat, lon)."""
+        lat_delta = radius_km / KM_PER_DEGREE
+        lat_min, lat_max = max(lat - lat_delta, -90.0), min(lat + lat_delta, 90.0)
+
+        # Longitude span widens with latitude; near the poles every longitude qualifies
+        widest = np.cos(np.radians(max(abs(lat_min), abs(lat_max))))
+        lon_delta = 180.0 if widest < 1e-6 else min(radius_km / (KM_PER_DEGREE * widest), 180.0)
+
+        lat_cells = np.arange(self._lat_cell(lat_min), self._lat_cell(lat_max) + 1)
+        if lon_delta >= 180.0:
+            lon_cells = np.arange(self.n_lon_cells)
+        else:
+            first, last = self._lon_cell(lon - lon_delta), self._lon_cell(lon + lon_delta)
+            span = (last - first) % self.n_lon_cells
+            lon_cells = (first + np.arange(span + 1)) % self.n_lon_cells
+
+        keys = (lat_cells[:, None] * self.n_lon_cells + lon_cells[None, :]).ravel()
+        positions = np.searchsorted(self.cell_keys, keys)
+        in_range = positions < len(self.cell_keys)
+        positions, keys = positions[in_range], keys[in_range]
+        positions = positions[self.cell_keys[positions] == keys]
+        if len(positions) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = np.concatenate([
+            self.rows[self.cell_starts[p]:self.cell_ends[p]] for p in positions
+        ])
+        distances = haversine_km(lat, lon, self.latitudes[candidates], self.longitudes[candidates])
+        return np.sort(candidates[distances <= radius_km])
+
+    def _lat_cell(self, lat):
+        return np.floor((np.asarray(lat) + 90.0) / self.cell_degrees).astype(np.int64)
+
+    def _lon_cell(self, lon):
+        return np.floor(((np.asarray(lon) + 180.0) % 360.0) / self.cell_degrees).astype(np.int64)
+
+    def _cell_keys(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        return self._lat_cell(latitudes) * self.n_lon_cells + self._lon_cell(longitudes)
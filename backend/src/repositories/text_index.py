@@ -0,0 +1,85 @@
+import re
+from array import array
+import numpy as np
+from typing import Iterable, Optional
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Lowercased alphanumeric tokens ("TRD Pro 4x4" -> ["trd", "pro", "4x4"])."""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an in-memory inverted index. Posting lists are stored as
+    CSR arrays (term -> sorted rows) together with the per-posting BM25 term
+    weight, so a query only sums idf * weight over the postings of its terms.
+    """
+
+    def __init__(self, texts: Iterable[Optional[str]], k1: float = 1.2, b: float = 0.75):
+        vocabulary = {}
+        terms = array('i')
+        lengths = array('i')
+        for text in texts:
+            tokens = tokenize(text)
+            terms.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+            lengths.append(len(tokens))
+
+        self.vocabulary = vocabulary
+        self.n_docs = len(lengths)
+        doc_lengths = np.frombuffer(lengths, dtype=np.int32).astype(np.float32)
+        terms = np.frombuffer(terms, dtype=np.int32).astype(np.int64)
+        docs = np.repeat(np.arange(self.n_docs, dtype=np.int64), doc_lengths.astype(np.int64))
+
+        # One posting per (term, doc) with its term frequency, grouped by term then doc
+        keys, frequencies = np.unique(terms * max(self.n_docs, 1) + docs, return_counts=True)
+        posting_terms = keys // max(self.n_docs, 1)
+        self.rows = (keys % max(self.n_docs, 1)).astype(np.int32)
+        document_frequency = np.bincount(posting_terms, minlength=len(vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(document_frequency)])
+
+        average_length = float(doc_lengths.mean()) if self.n_docs else 0.0
+        norm = k1 * (1 - b + b * doc_lengths[self.rows] / max(average_length, 1e-9))
+        self.weights = (frequencies * (k1 + 1) / (frequencies + norm)).astype(np.float32)
+        self.idf = np.log1p(
+            (self.n_docs - document_frequency + 0.5) / (document_frequency + 0.5)
+        ).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def search(self, query: str, top_k: int,
+               candidates: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return (rows, BM25 scores) of the top_k best matching documents,
+        best first. candidates (sorted rows) restricts the result to them.
+        """
+        term_ids = [self.vocabulary[token] for token in dict.fromkeys(tokenize(query)) if token in self.vocabulary]
+        if not term_ids or top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = np.concatenate([self.rows[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        scores = np.concatenate([
+            self.idf[t] * self.weights[self.offsets[t]:self.offsets[t + 1]] for t in term_ids
+        ])
+        if candidates is not None:
+            positions = np.searchsorted(candidates, rows)
+            positions[positions == len(candidates)] = 0
+            keep = candidates[positions] == rows if len(candidates) else np.zeros(len(rows), dtype=bool)
+            rows, scores = rows[keep], scores[keep]
+
+        if len(rows) > self.n_docs // 8:
+            # Common terms: accumulate into a dense per-document array instead of sorting postings
+            dense = np.bincount(rows, weights=scores, minlength=self.n_docs)
+            rows = np.flatnonzero(dense)
+            scores = dense[rows]
+        else:
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores, minlength=len(rows))
+        if len(rows) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows, scores = rows[best], scores[best]
+        order = np.lexsort((rows, -scores))
+        return rows[order].astype(np.int64), scores[order].astype(np.float32)
@@ -1,8 +1,17 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 
 
-class RecommendByIdRequest(BaseModel):
+class ScoreTermWeights(BaseModel):
+    """
+    Optional final score terms shared by the recommendation requests:
+    cheaper cars (price percentile) and newer cars (year percentile).
+    """
+    price_weight: Optional[float] = Field(None, ge=0, le=1)
+    recency_weight: Optional[float] = Field(None, ge=0, le=1)
+
+
+class RecommendByIdRequest(ScoreTermWeights):
     """Request for recommendations by car ID."""
     car_id: str
     top_n: int = Field(10, ge=1, le=100)
@@ -17,9 +26,10 @@ class RecommendByIdRequest(BaseModel):
     manufacturers: Optional[list[str]] = None
     types: Optional[list[str]] = None
     states: Optional[list[str]] = None
+    max_distance_km: Optional[float] = Field(None, ge=0)
 
 
-class RecommendByTextRequest(BaseModel):
+class RecommendByTextRequest(ScoreTermWeights):
     """Request for recommendations by text query."""
     query: str = Field(..., min_length=1)
     top_n: int = Field(10, ge=1, le=100)
@@ -33,6 +43,45 @@ class RecommendByTextRequest(BaseModel):
     max_year: Optional[int] = None
     manufacturers: Optional[list[str]] = None
     types: Optional[list[str]] = None
+    max_distance_km: Optional[float] = Field(None, ge=0)
+    # semantic = embeddings only, hybrid = BM25 + embeddings (RRF), keyword = BM25 candidates re-ranked by embeddings
+    search_mode: Literal["semantic", "hybrid", "keyword"] = "semantic"
+
+
+class BatchRecommendByIdRequest(ScoreTermWeights):
+    """Request for recommendations for several car IDs sharing the same filters and weights."""
+    car_ids: list[str] = Field(..., min_length=1, max_length=100)
+    top_n: int = Field(10, ge=1, le=100)
+    user_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    user_longitude: Optional[float] = Field(None, ge=-180, le=180)
+    similarity_weight: Optional[float] = Field(None, ge=0, le=1)
+    distance_weight: Optional[float] = Field(None, ge=0, le=1)
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_year: Optional[int] = None
+    max_year: Optional[int] = None
+    manufacturers: Optional[list[str]] = None
+    types: Optional[list[str]] = None
+    states: Optional[list[str]] = None
+    max_distance_km: Optional[float] = Field(None, ge=0)
+
+
+class BatchRecommendByTextRequest(ScoreTermWeights):
+    """Request for recommendations for several text queries sharing the same filters and weights."""
+    queries: list[str] = Field(..., min_length=1, max_length=100)
+    top_n: int = Field(10, ge=1, le=100)
+    user_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    user_longitude: Optional[float] = Field(None, ge=-180, le=180)
+    similarity_weight: Optional[float] = Field(None, ge=0, le=1)
+    distance_weight: Optional[float] = Field(None, ge=0, le=1)
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_year: Optional[int] = None
+    max_year: Optional[int] = None
+    manufacturers: Optional[list[str]] = None
+    types: Optional[list[str]] = None
+    states: Optional[list[str]] = None
+    max_distance_km: Optional[float] = Field(None, ge=0)
 
 
 class CarResponse(BaseModel):
@@ -54,10 +103,41 @@ class CarResponse(BaseModel):
     longitude: Optional[float]
 
 
+class FacetCount(BaseModel):
+    """Number of matching cars with one value of a facet."""
+    value: str
+    count: int
+
+
+class HistogramBucket(BaseModel):
+    """Number of matching cars with min <= value < max (max None = open-ended)."""
+    min: float
+    max: Optional[float]
+    count: int
+
+
+class FacetsResponse(BaseModel):
+    """Facet counts for the filter sidebar."""
+    total: int
+    facets: dict[str, list[FacetCount]]
+    histograms: dict[str, list[HistogramBucket]]
+    catalog_version: str
+
+
+class Suggestion(BaseModel):
+    """Search box completion."""
+    text: str
+    kind: str  # manufacturer | model | manufacturer_model
+    manufacturer: Optional[str]
+    model: Optional[str]
+    count: int
+
+
 class RecommendationResponse(BaseModel):
     """Recommendation response schema."""
     car: CarResponse
     similarity_score: float
+    relevance_score: float
     distance_score: float
     final_score: float
     distance_km: Optional[float]
@@ -69,3 +149,56 @@ class RecommendationsResponse(BaseModel):
     recommendations: list[RecommendationResponse]
     total: int
     query_info: dict
+
+
+class BatchRecommendationsResponse(BaseModel):
+    """Ranked recommendations for each query of a batch, in request order."""
+    results: list[RecommendationsResponse]
+    total: int
+
+
+class CarUpsert(BaseModel):
+    """A car to add to the catalog or replace in it."""
+    car_id: str
+    price: float = Field(..., gt=0)
+    year: int
+    manufacturer: str
+    model: str
+    url: Optional[str] = None
+    region: Optional[str] = None
+    condition: Optional[str] = None
+    cylinders: Optional[str] = None
+    fuel: Optional[str] = None
+    odometer: Optional[float] = None
+    title_status: Optional[str] = None
+    transmission: Optional[str] = None
+    vin: Optional[str] = None
+    drive: Optional[str] = None
+    size: Optional[str] = None
+    type: Optional[str] = None
+    paint_color: Optional[str] = None
+    image_url: Optional[str] = None
+    description: Optional[str] = None
+    state: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    combined_text: Optional[str] = None
+    # Computed from combined_text with the configured embedding provider when omitted
+    embedding: Optional[list[float]] = None
+
+
+class CatalogChangesRequest(BaseModel):
+    """Cars to add/update and car IDs to remove, applied as one new catalog version."""
+    upserts: list[CarUpsert] = Field(default_factory=list)
+    removals: list[str] = Field(default_factory=list)
+
+
+class CatalogJobResponse(BaseModel):
+    """Background catalog build job."""
+    job_id: str
+    kind: str
+    status: str  # queued | running | done | failed
+    created_at: str
+    updated_at: Optional[str] = None
+    catalog_version: Optional[str] = None
+    error: Optional[str] = None
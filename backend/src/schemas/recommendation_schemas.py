@@ -7,6 +7,9 @@ class Recommendation(BaseModel):
     """Recommendation with scoring details."""
     car: Car
     similarity_score: float = Field(..., ge=0, le=1)
+    # What the similarity weight is applied to: the similarity in semantic
+    # search, the scaled reciprocal rank fusion score in hybrid / keyword search
+    relevance_score: float = Field(..., ge=0, le=1)
     distance_score: float = Field(..., ge=0, le=1)
     final_score: float = Field(..., ge=0, le=1)
     distance_km: Optional[float] = None
@@ -0,0 +1,251 @@
+"""
+Latency benchmark of the recommendation hot path on synthetic catalogs.
+
+Usage (from the backend directory):
+    python src/scripts/benchmark_recommendations.py --sizes 10000,100000 --out bench.json
+    python src/scripts/benchmark_recommendations.py --sizes 1000000 --requests 100 --neighbor-table
+
+For every catalog size a synthetic snapshot (see synthetic_catalog.py) is
+built once under --workdir and reused by later runs. Each scenario (no
+filters, selective filters, with location) drives
+RecommendationService.recommend_by_car_id / recommend_by_text and the
+/v1/recommendations endpoints in-process, with a deterministic stub
+embedding model. Result caches are cleared before every request, so each
+one pays the full hot path.
+
+The report is JSON: p50/p95/p99 latency (ms), throughput (requests/s) and
+peak RSS (MB, Linux) per scenario, plus the settings that shape the hot
+path, so two runs can be diffed.
+"""
+import argparse
+import hashlib
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from src.core.config import settings
+from src.repositories.catalog_snapshot import read_snapshot, write_snapshot
+from src.repositories.car_repository import CarRepository
+from src.repositories.embedding_repository import EmbeddingRepository
+from src.repositories.neighbor_table import build_neighbor_table, load_neighbor_table
+from src.schemas.car_schemas import CarFilters, Location
+from src.services.recommendation_service import RecommendationService
+from src.services.scoring_service import ScoringService
+from src.scripts.catalog_memory_report import read_memory
+from src.scripts.synthetic_catalog import synthetic_catalog
+
+SCENARIOS = {
+    "no_filters": {"filters": None, "location": None},
+    "selective_filters": {
+        "filters": {"manufacturers": ["tesla"], "types": ["coupe"], "max_price": 30_000},
+        "location": None,
+    },
+    "with_location": {
+        "filters": {"max_distance_km": 300},
+        "location": {"latitude": 39.74, "longitude": -104.99},
+    },
+}
+QUERIES = ["reliable family suv", "cheap commuter sedan", "4x4 pickup for towing", "electric hatchback",
+           "low mileage convertible", "diesel truck", "hybrid wagon", "sport coupe manual"]
+
+
+class StubEmbeddingModel:
+    """Deterministic unit vectors seeded by the text hash: no model download, negligible cost."""
+
+    model_name = "benchmark-stub"
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def embed(self, texts):
+        single = isinstance(texts, str)
+        vectors = []
+        for text in [texts] if single else texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dimension)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors[0] if single else vectors
+
+    embed_queries = embed
+
+
+class StubRAGService:
+    def __init__(self, dimension: int):
+        self.embedding = StubEmbeddingModel(dimension)
+
+
+def load_synthetic(n_cars: int, dimension: int, workdir: Path, neighbor_table: bool):
+    """Snapshot of a synthetic catalog, built on first use."""
+    snapshot_dir = workdir / f"catalog-{n_cars}-{dimension}"
+    version = f"synthetic-{n_cars}-{dimension}-0"
+    if not (snapshot_dir / version).exists():
+        start = time.perf_counter()
+        catalog = synthetic_catalog(n_cars, dimension, workdir=workdir / "tmp")
+        write_snapshot(catalog, snapshot_dir)
+        del catalog
+        print(f"✅ Built synthetic catalog of {n_cars} cars in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    snapshot_path = snapshot_dir / version
+    if neighbor_table and load_neighbor_table(snapshot_path) is None:
+        start = time.perf_counter()
+        build_neighbor_table(snapshot_path, settings.NEIGHBOR_TABLE_K, block_size=settings.EMBEDDING_BLOCK_SIZE)
+        print(f"✅ Built neighbour table in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return read_snapshot(snapshot_path)
+
+
+def reset_peak_rss():
+    """Reset the VmHWM high-water mark (Linux), so every scenario reports its own peak."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def run_scenario(call, arguments: list, requests: int, warmup: int) -> dict:
+    for i in range(warmup):
+        RecommendationService.clear_result_cache()
+        call(arguments[i % len(arguments)])
+
+    reset_peak_rss()
+    latencies = []
+    started = time.perf_counter()
+    for i in range(requests):
+        RecommendationService.clear_result_cache()
+        RecommendationService.clear_query_embedding_cache()
+        start = time.perf_counter()
+        call(arguments[i % len(arguments)])
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    memory = read_memory() if Path("/proc/self/status").exists() else {}
+    return {
+        "requests": requests,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "peak_rss_mb": memory.get("peak_rss_mb"),
+    }
+
+
+def endpoint_client(service: RecommendationService):
+    """TestClient over the /v1/recommendations router, bound to the benchmark service."""
+    try:
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from src.api.v1.endpoints import recommendations
+    except ImportError as e:
+        print(f"⚠️ Skipping endpoint scenarios: {e}", file=sys.stderr)
+        return None
+
+    recommendations.get_recommendation_service = lambda: service
+    app = FastAPI()
+    app.include_router(recommendations.router, prefix="/v1")
+    return TestClient(app)
+
+
+def post(client, path: str, body: dict) -> dict:
+    response = client.post(path, json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.text}")
+    return response.json()
+
+
+def benchmark_catalog(catalog, args) -> list[dict]:
+    service = RecommendationService(CarRepository(catalog), EmbeddingRepository(catalog), ScoringService())
+    client = None if args.no_endpoints else endpoint_client(service)
+    rng = np.random.default_rng(args.seed)
+    car_ids = [str(catalog.ids[row]) for row in rng.integers(0, len(catalog), max(args.requests, 1))]
+
+    results = []
+    for name, scenario in SCENARIOS.items():
+        filters = CarFilters(**scenario["filters"]) if scenario["filters"] else None
+        location = Location(**scenario["location"]) if scenario["location"] else None
+        body = {
+            **(scenario["filters"] or {}),
+            **({"user_latitude": location.latitude, "user_longitude": location.longitude} if location else {}),
+        }
+
+        calls = {
+            "service.recommend_by_car_id": (
+                lambda car_id: service.recommend_by_car_id(car_id, args.top_n, location, filters), car_ids
+            ),
+            "service.recommend_by_text": (
+                lambda query: service.recommend_by_text(query, args.top_n, location, filters), QUERIES
+            ),
+        }
+        if client is not None:
+            calls["POST /v1/recommendations/by-id"] = (
+                lambda car_id: post(client, "/v1/recommendations/by-id",
+                                    {**body, "car_id": car_id, "top_n": args.top_n}), car_ids
+            )
+            calls["POST /v1/recommendations/by-text"] = (
+                lambda query: post(client, "/v1/recommendations/by-text",
+                                   {**body, "query": query, "top_n": args.top_n}), QUERIES
+            )
+
+        for target, (call, arguments) in calls.items():
+            result = run_scenario(call, arguments, args.requests, args.warmup)
+            results.append({"n_cars": len(catalog), "scenario": name, "target": target, **result})
+            print(f"  {len(catalog):>8} {name:<18} {target:<34} p50={result['p50_ms']}ms "
+                  f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms {result['throughput_rps']}/s",
+                  file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated catalog sizes")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario and target")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default="/tmp/car_benchmark", help="synthetic snapshots are kept here")
+    parser.add_argument("--neighbor-table", action="store_true", help="build and use the neighbour table")
+    parser.add_argument("--no-endpoints", action="store_true", help="only benchmark the service layer")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    settings.USE_NEIGHBOR_TABLE = args.neighbor_table
+    settings.rag_service = StubRAGService(args.dim)
+    workdir = Path(args.workdir)
+
+    results = []
+    for n_cars in [int(size) for size in args.sizes.split(",")]:
+        catalog = load_synthetic(n_cars, args.dim, workdir, args.neighbor_table)
+        results.extend(benchmark_catalog(catalog, args))
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "dimension": args.dim,
+        "top_n": args.top_n,
+        "settings": {
+            key: getattr(settings, key) for key in (
+                "VECTOR_INDEX_PROVIDER", "EMBEDDING_STORAGE_MODE", "EMBEDDING_BLOCK_SIZE", "USE_NEIGHBOR_TABLE",
+                "DISTANCE_MODE", "SIMILARITY_THRESHOLD", "RANKING_MAX_CANDIDATES", "LEXICAL_INDEX",
+            )
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output)
+        print(f"✅ Report written to {args.out}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
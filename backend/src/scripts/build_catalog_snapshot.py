@@ -0,0 +1,35 @@
+"""
+Convert cars_embeddings.json into a versioned binary catalog snapshot.
+
+Usage (from the backend directory):
+    python src/scripts/build_catalog_snapshot.py --data src/data/cars_embeddings.json --out src/data/catalog
+
+The snapshot is written to <out>/<catalog_version>/ and <out>/CURRENT is
+pointed at it. CarRepository and EmbeddingRepository memory-map it on startup
+and only fall back to the JSON file when no snapshot exists.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.core.config import settings
+from src.repositories.catalog_snapshot import snapshot_from_json, write_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=settings.DATA_FILE_PATH)
+    parser.add_argument("--out", default=settings.CATALOG_SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = snapshot_from_json(Path(args.data))
+    write_snapshot(catalog, Path(args.out))
+    print(f"✅ Snapshot built in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
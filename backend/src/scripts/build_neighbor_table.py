@@ -0,0 +1,43 @@
+"""
+Precompute the item-to-item neighbour table used by recommend_by_car_id.
+
+Usage (from the backend directory):
+    python src/scripts/build_neighbor_table.py --k 200 --workers 8
+
+The table (top-k catalog rows as int32 plus float16 cosine scores) is
+written into the CURRENT catalog snapshot directory, so it is versioned with
+the catalog. Versions built by the catalog service derive their table from
+the previous one (lists shrink as neighbours change); run this again after
+build_catalog_snapshot.py, or to restore full top-k lists.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.core.config import settings
+from src.repositories.neighbor_table import build_neighbor_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshots", default=settings.CATALOG_SNAPSHOT_DIR)
+    parser.add_argument("--k", type=int, default=settings.NEIGHBOR_TABLE_K)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of cores")
+    parser.add_argument("--chunk-size", type=int, default=256, help="cars per worker task")
+    args = parser.parse_args()
+
+    snapshot_dir = Path(args.snapshots)
+    pointer = snapshot_dir / "CURRENT"
+    if not pointer.exists():
+        sys.exit(f"❌ No catalog snapshot in {snapshot_dir}, run build_catalog_snapshot.py first")
+
+    start = time.perf_counter()
+    table = build_neighbor_table(snapshot_dir / pointer.read_text().strip(), args.k, args.workers, args.chunk_size)
+    print(f"✅ Neighbour table ({len(table)} x {table.k}) built in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Resident memory of the car catalog: legacy JSON + pydantic representation
+versus the columnar, memory-mapped snapshot.
+
+Usage (from the backend directory):
+    python src/scripts/catalog_memory_report.py --data src/data/cars_embeddings.json
+    python src/scripts/catalog_memory_report.py --synthetic 1000000
+
+Every measurement runs in a fresh interpreter and reads /proc/self/status
+(Linux). "private" is anonymous memory owned by one worker; "shared" is
+file-backed memory (memory-mapped snapshot pages) that the page cache
+shares between all workers. The legacy layout (raw JSON dict kept alive, a
+Car per listing, an ndarray per embedding) is measured on at most
+--legacy-sample listings and extrapolated linearly beyond that.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+# Imported before any baseline reading, so both measurements start from the same modules
+import numpy as np
+from src.repositories.car_repository import CarRepository
+from src.repositories.catalog_snapshot import CATEGORICAL_COLUMNS, read_snapshot, snapshot_from_json, write_snapshot
+from src.repositories.embedding_repository import EmbeddingRepository
+from src.schemas.car_schemas import Car, Location
+from src.scripts.synthetic_catalog import synthetic_catalog
+
+
+def read_memory() -> dict:
+    """Current memory counters of this process, in MB."""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM", "RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0]) / 1024
+    return {
+        "rss_mb": round(fields["VmRSS"], 1),
+        "peak_rss_mb": round(fields["VmHWM"], 1),
+        "private_mb": round(fields["RssAnon"], 1),
+        "shared_mb": round(fields["RssFile"], 1),
+    }
+
+
+def legacy_load(data: dict) -> tuple:
+    """What the JSON-backed repositories kept alive: raw JSON, a Car per listing, an ndarray per embedding."""
+    cars, embeddings = {}, {}
+    for car_id, car_data in data['embeddings'].items():
+        metadata = car_data['metadata']
+        location = None
+        if metadata.get('lat') and metadata.get('long'):
+            location = Location(latitude=float(metadata['lat']), longitude=float(metadata['long']))
+        cars[str(metadata['id'])] = Car(
+            car_id=str(metadata['id']),
+            price=float(metadata['price']),
+            year=int(metadata['year']),
+            manufacturer=metadata['manufacturer'],
+            model=metadata['model'],
+            odometer=float(metadata['odometer']) if metadata.get('odometer') else None,
+            location=location,
+            **{key: metadata.get(key) for key in (
+                'url', 'region', 'condition', 'cylinders', 'fuel', 'title_status', 'transmission', 'vin',
+                'drive', 'size', 'type', 'paint_color', 'image_url', 'description', 'state', 'combined_text'
+            )},
+        )
+        embeddings[car_id] = np.array(car_data['embedding'], dtype=np.float32)
+    return data, cars, embeddings
+
+
+def synthetic_json(n_cars: int, dimension: int) -> dict:
+    """cars_embeddings.json-shaped dict for n synthetic cars."""
+    with tempfile.TemporaryDirectory() as workdir:
+        catalog = synthetic_catalog(n_cars, dimension, workdir=Path(workdir))
+        items = {}
+        for row in range(n_cars):
+            latitude = catalog.numeric['latitude'][row]
+            odometer = catalog.numeric['odometer'][row]
+            metadata = {
+                'id': str(catalog.ids[row]),
+                'price': float(catalog.numeric['price'][row]),
+                'year': int(catalog.numeric['year'][row]),
+                'odometer': None if np.isnan(odometer) else float(odometer),
+                'lat': None if np.isnan(latitude) else float(latitude),
+                'long': None if np.isnan(latitude) else float(catalog.numeric['longitude'][row]),
+                'description': catalog.text['description'].get(row),
+                'combined_text': catalog.text['combined_text'].get(row),
+                **{column: catalog.get_category(column, row) for column in CATEGORICAL_COLUMNS},
+            }
+            items[metadata['id']] = {'metadata': metadata, 'embedding': catalog.embeddings[row].tolist()}
+        return {'embeddings': items}
+
+
+def measure_legacy(args) -> dict:
+    before = read_memory()
+    if args.synthetic:
+        data = synthetic_json(min(args.synthetic, args.legacy_sample), args.dim)
+    else:
+        with open(args.data, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    kept = legacy_load(data)
+    return {"n_cars": len(kept[1]), "before": before, "after": read_memory()}
+
+
+def measure_columnar(args) -> dict:
+    before = read_memory()
+    catalog = read_snapshot(Path(args.snapshot))
+    car_repo = CarRepository(catalog)
+    embedding_repo = EmbeddingRepository(catalog)
+
+    # Serve a few requests so the scanned pages and the returned cars are resident
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        rows, _ = embedding_repo.search(rng.standard_normal(catalog.embeddings.shape[1]), 30)
+        for row in rows[:10]:
+            car_repo.find_by_row(row)
+    return {"n_cars": len(catalog), "before": before, "after": read_memory()}
+
+
+def run_measurement(mode: str, extra: list[str]) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", mode, *extra],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(label: str, n_cars: int, result: dict) -> dict:
+    """Memory attributable to the catalog (after - before), scaled to n_cars if it was sampled."""
+    scale = n_cars / result["n_cars"]
+    private = (result["after"]["private_mb"] - result["before"]["private_mb"]) * scale
+    shared = (result["after"]["shared_mb"] - result["before"]["shared_mb"]) * scale
+    return {
+        "layout": label,
+        "n_cars": n_cars,
+        "measured_cars": result["n_cars"],
+        "private_mb": round(private, 1),
+        "shared_mb": round(shared, 1),
+        "rss_mb": round(private + shared, 1),
+        "private_bytes_per_car": round(private * 1024 * 1024 / n_cars),
+        "extrapolated": scale != 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="src/data/cars_embeddings.json")
+    parser.add_argument("--synthetic", type=int, default=0, help="use a synthetic catalog of this many cars")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--legacy-sample", type=int, default=20_000)
+    parser.add_argument("--measure", choices=["legacy", "columnar"], help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        result = measure_legacy(args) if args.measure == "legacy" else measure_columnar(args)
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="catalog_memory_") as workdir:
+        workdir = Path(workdir)
+        if args.synthetic:
+            catalog = synthetic_catalog(args.synthetic, args.dim, workdir=workdir / "work")
+            legacy_args = ["--synthetic", str(args.synthetic), "--dim", str(args.dim),
+                           "--legacy-sample", str(args.legacy_sample)]
+        else:
+            catalog = snapshot_from_json(Path(args.data))
+            legacy_args = ["--data", args.data]
+        n_cars = len(catalog)
+        snapshot = write_snapshot(catalog, workdir / "snapshots")
+        del catalog
+
+        report = [
+            summarize("legacy json + pydantic", n_cars, run_measurement("legacy", legacy_args)),
+            summarize("columnar snapshot", n_cars, run_measurement("columnar", ["--snapshot", str(snapshot)])),
+        ]
+
+    for row in report:
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Recall-vs-exact report for the embedding storage modes.
+
+Usage (from the backend directory):
+    python src/scripts/embedding_recall_report.py --data src/data/cars_embeddings.json --k 10
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from src.stores.vectorindex.providers.flat_index import FlatIndex, STORAGE_MODES
+
+
+def load_matrix(data_file: Path) -> np.ndarray:
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return np.array([car['embedding'] for car in data['embeddings'].values()], dtype=np.float32)
+
+
+def recall_report(matrix: np.ndarray, k: int, n_queries: int, rescore_factor: int, seed: int = 0) -> list[dict]:
+    """Compare every storage mode against exact float32 search, using catalog rows as queries."""
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(matrix), size=min(n_queries, len(matrix)), replace=False)
+
+    exact = FlatIndex.from_matrix(matrix, storage_mode="float32")
+    truth = {int(row): set(exact.search(matrix[row], k, exclude_index=int(row))[0].tolist())
+             for row in query_rows}
+
+    report = []
+    for mode in STORAGE_MODES:
+        index = FlatIndex.from_matrix(matrix, storage_mode=mode, rescore_factor=rescore_factor)
+        hits = 0
+        start = time.perf_counter()
+        for row in query_rows:
+            found, _ = index.search(matrix[row], k, exclude_index=int(row))
+            hits += len(truth[int(row)] & set(found.tolist()))
+        elapsed = time.perf_counter() - start
+
+        report.append({
+            "mode": mode,
+            "memory_mb": round(index.nbytes / 1e6, 2),
+            "bytes_per_vector": round(index.nbytes / len(index), 1),
+            f"recall@{k}": round(hits / (k * len(query_rows)), 4),
+            "mean_latency_ms": round(1000 * elapsed / len(query_rows), 3),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="src/data/cars_embeddings.json")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    matrix = load_matrix(Path(args.data))
+    print(f"📂 {len(matrix)} embeddings, dim={matrix.shape[1]}")
+
+    report = recall_report(matrix, args.k, args.queries, args.rescore_factor)
+    for row in report:
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Load test of the RAG chat endpoints: do health checks and chats queue
+behind slow LLM calls?
+
+Usage (from the backend directory):
+    python src/scripts/load_test_rag.py
+    python src/scripts/load_test_rag.py --chats 32 --llm-latency 2 --out load.json
+
+The /v1/chat router and a /health route are served by uvicorn on a local
+port. settings.rag_service is a RAGService with stub providers: an LLM
+that blocks its thread for --llm-latency seconds (like a synchronous SDK
+call), a hashing embedding model, an empty vector store and in-memory
+messages. While --chats chats run concurrently, /health is probed every
+--probe-interval seconds.
+
+Targets:
+    blocking     the previous handler, an async endpoint calling RAGService.chat
+    async        POST /v1/chat/chat (RAGService.achat)
+    async_stream POST /v1/chat/chat/stream (RAGService.achat_stream)
+
+The JSON report has, per target, the health-check latency percentiles and
+the chat latencies and wall time of the batch. Without queueing, the batch
+takes about one --llm-latency (as long as --chats <= BLOCKING_POOL_SIZE)
+and health checks stay in the milliseconds.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import platform
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from src.api.v1.endpoints import query
+from src.core.config import settings
+from src.schemas.chat_schema import ChatRequest
+from src.services.rag_service import RAGService
+from src.stores.embedding.embedding_interface import EmbeddingInterface
+from src.stores.llm.llm_interface import LLMInterface
+from src.stores.vectordb.vectordb_interface import VectorDBInterface
+
+ANSWER = "Keep a two second gap to the car ahead and double it on wet roads."
+QUESTIONS = ["what is the safe following distance", "when should I rotate my tires",
+             "can I turn right on red", "how often should I change the oil"]
+TARGETS = {
+    "blocking": ("/blocking/chat", False),
+    "async": ("/v1/chat/chat", False),
+    "async_stream": ("/v1/chat/chat/stream", True),
+}
+
+
+class SlowLLM(LLMInterface):
+    """Blocks its thread for `latency` seconds per answer, like a synchronous SDK call."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate(self, prompt: str) -> str:
+        time.sleep(self.latency)
+        return ANSWER
+
+    def generate_stream(self, prompt: str):
+        words = ANSWER.split()
+        for word in words:
+            time.sleep(self.latency / len(words))
+            yield word + " "
+
+
+class HashEmbedding(EmbeddingInterface):
+    def embed(self, texts):
+        return [
+            np.random.default_rng(int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little"))
+            .standard_normal(64).tolist()
+            for text in texts
+        ]
+
+
+class EmptyVectorDB(VectorDBInterface):
+    def add_documents(self, texts, embeddings, metadata, ids):
+        pass
+
+    def search(self, query_embedding, top_k):
+        return []
+
+    def delete_by_pdf_id(self, pdf_id):
+        pass
+
+    def delete_by_conversation_id(self, conversation_id):
+        pass
+
+
+class InMemoryMessages:
+    """The two MessagesRepository methods used by chat."""
+
+    def __init__(self):
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def save_messages(self, conversation_id, role, content, metadata=None) -> str:
+        with self._lock:
+            self.messages.append({"conversation_id": conversation_id, "role": role, "content": content})
+            return str(len(self.messages))
+
+    def find_by_conversation(self, conversation_id, limit=20, ascending=True):
+        with self._lock:
+            return [m for m in self.messages if m["conversation_id"] == conversation_id][-limit:]
+
+
+def stub_rag_service(llm_latency: float) -> RAGService:
+    # Skips __init__: providers and repositories are the stubs, not the configured ones
+    service = RAGService.__new__(RAGService)
+    service.llm = SlowLLM(llm_latency)
+    service.embedding = HashEmbedding()
+    service.vectordb = EmptyVectorDB()
+    service.message_repo = InMemoryMessages()
+    return service
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(query.router, prefix="/v1")
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    @app.post("/blocking/chat")
+    async def blocking_chat(request: ChatRequest):
+        # The previous /v1/chat/chat handler: sync pipeline inside an async endpoint
+        return settings.rag_service.chat(
+            conversation_id=request.conversation_id,
+            message=request.message,
+            top_k=request.top_k,
+            history_limit=request.history_limit
+        )
+
+    return app
+
+
+class Server:
+    """uvicorn serving the app from a background thread, on a free local port."""
+
+    def __init__(self, app: FastAPI):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off"
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def percentiles(seconds: list[float]) -> dict:
+    ms = np.array(seconds) * 1000
+    return {
+        "count": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(ms.max()), 1),
+    }
+
+
+async def run_target(base_url: str, path: str, stream: bool, args) -> dict:
+    limits = httpx.Limits(max_connections=args.chats + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        stop = asyncio.Event()
+        health = []
+
+        async def probe():
+            while not stop.is_set():
+                start = time.perf_counter()
+                (await client.get("/health")).raise_for_status()
+                health.append(time.perf_counter() - start)
+                await asyncio.sleep(args.probe_interval)
+
+        async def chat(i: int) -> float:
+            body = {"conversation_id": f"load-{i}", "message": QUESTIONS[i % len(QUESTIONS)]}
+            start = time.perf_counter()
+            if stream:
+                async with client.stream("POST", path, json=body) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: error"):
+                            raise RuntimeError(f"{path} streamed an error event")
+            else:
+                (await client.post(path, json=body)).raise_for_status()
+            return time.perf_counter() - start
+
+        prober = asyncio.create_task(probe())
+        await asyncio.sleep(args.probe_interval * 5)
+        started = time.perf_counter()
+        chats = await asyncio.gather(*(chat(i) for i in range(args.chats)))
+        wall = time.perf_counter() - started
+        stop.set()
+        await prober
+
+    return {
+        "chat_wall_s": round(wall, 2),
+        "chat": percentiles(chats),
+        "health": percentiles(health),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=16, help="concurrent chat requests")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds the stub LLM blocks per answer")
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="seconds between health checks")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma-separated subset of " + ",".join(TARGETS))
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    settings.rag_service = stub_rag_service(args.llm_latency)
+    results = {}
+    with Server(build_app()) as base_url:
+        for target in args.targets.split(","):
+            path, stream = TARGETS[target]
+            results[target] = asyncio.run(run_target(base_url, path, stream, args))
+            print(f"  {target:<13} chats wall={results[target]['chat_wall_s']}s "
+                  f"health p50={results[target]['health']['p50_ms']}ms max={results[target]['health']['max_ms']}ms",
+                  file=sys.stderr)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "chats": args.chats,
+        "llm_latency_s": args.llm_latency,
+        "blocking_pool_size": settings.BLOCKING_POOL_SIZE,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output)
+        print(f"✅ Report written to {args.out}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
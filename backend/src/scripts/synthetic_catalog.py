@@ -0,0 +1,151 @@
+"""
+Generate a synthetic car catalog snapshot for memory and latency measurements.
+
+Usage (from the backend directory):
+    python src/scripts/synthetic_catalog.py --cars 1000000 --dim 384 --out /tmp/synthetic_catalog
+    python src/scripts/synthetic_catalog.py --cars 10000 --json /tmp/cars_embeddings.json
+
+Cars get random prices, years, locations (inside the continental US) and
+categories drawn from small vocabularies; embeddings are random unit
+vectors. Embeddings are generated block by block into a memory map, so a
+1M x 384 catalog can be built on a machine with a few GB of RAM.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from src.repositories.catalog_snapshot import (
+    CatalogSnapshot, StringColumn, CATEGORICAL_COLUMNS, write_snapshot
+)
+from src.stores.vectorindex.utils import l2_normalize
+
+MANUFACTURERS = ['ford', 'chevrolet', 'toyota', 'honda', 'nissan', 'jeep', 'ram', 'gmc', 'bmw', 'dodge',
+                 'mercedes-benz', 'hyundai', 'subaru', 'volkswagen', 'kia', 'lexus', 'audi', 'tesla']
+TYPES = ['sedan', 'SUV', 'pickup', 'truck', 'coupe', 'hatchback', 'wagon', 'van', 'convertible']
+FUELS = ['gas', 'diesel', 'hybrid', 'electric', 'other']
+STATES = ['ca', 'fl', 'tx', 'ny', 'oh', 'mi', 'or', 'wa', 'pa', 'nc', 'wi', 'co', 'tn', 'va', 'il']
+VOCABULARIES = {
+    'manufacturer': MANUFACTURERS,
+    'model': [f"model-{i}" for i in range(400)],
+    'type': TYPES,
+    'fuel': FUELS,
+    'transmission': ['automatic', 'manual', 'other'],
+    'state': STATES,
+    'region': [f"region-{i}" for i in range(300)],
+    'condition': ['new', 'like new', 'excellent', 'good', 'fair', 'salvage'],
+    'cylinders': ['4 cylinders', '6 cylinders', '8 cylinders', 'other'],
+    'title_status': ['clean', 'rebuilt', 'salvage', 'lien'],
+    'drive': ['fwd', 'rwd', '4wd'],
+    'size': ['compact', 'mid-size', 'full-size', 'sub-compact'],
+    'paint_color': ['white', 'black', 'silver', 'blue', 'red', 'grey', 'green'],
+}
+
+
+def synthetic_catalog(n_cars: int, dimension: int = 384, seed: int = 0,
+                      workdir: Path = None, block_size: int = 65536) -> CatalogSnapshot:
+    """Random in-memory catalog; embeddings live in a memory map under workdir."""
+    rng = np.random.default_rng(seed)
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="synthetic_catalog_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    embeddings = np.lib.format.open_memmap(workdir / "embeddings.npy", mode="w+",
+                                           dtype=np.float32, shape=(n_cars, dimension))
+    for start in range(0, n_cars, block_size):
+        end = min(start + block_size, n_cars)
+        embeddings[start:end] = l2_normalize(rng.standard_normal((end - start, dimension), dtype=np.float32))
+    embeddings.flush()
+
+    odometer = rng.uniform(0, 250_000, n_cars)
+    odometer[rng.random(n_cars) < 0.05] = np.nan
+    latitude = rng.uniform(25, 49, n_cars)
+    longitude = rng.uniform(-124, -67, n_cars)
+    missing_location = rng.random(n_cars) < 0.02
+    latitude[missing_location] = np.nan
+    longitude[missing_location] = np.nan
+
+    codes = {
+        column: rng.integers(0, len(VOCABULARIES[column]), n_cars).astype(np.int32)
+        for column in CATEGORICAL_COLUMNS
+    }
+    years = rng.integers(1995, 2025, n_cars).astype(np.int32)
+    descriptions = [
+        f"{year} {MANUFACTURERS[make]} {TYPES[kind]} {FUELS[fuel]}"
+        for year, make, kind, fuel in zip(years, codes['manufacturer'], codes['type'], codes['fuel'])
+    ]
+    empty = StringColumn.from_values([None] * n_cars)
+
+    return CatalogSnapshot(
+        version=f"synthetic-{n_cars}-{dimension}-{seed}",
+        ids=np.array([f"syn-{i}" for i in range(n_cars)]),
+        embeddings=embeddings,
+        numeric={
+            'price': rng.uniform(1_000, 80_000, n_cars).round(),
+            'year': years,
+            'odometer': odometer,
+            'latitude': latitude,
+            'longitude': longitude,
+        },
+        codes=codes,
+        vocabularies=VOCABULARIES,
+        text={
+            'url': empty,
+            'vin': empty,
+            'image_url': empty,
+            'description': StringColumn.from_values(descriptions),
+            'combined_text': StringColumn.from_values(descriptions),
+        },
+    )
+
+
+def write_json(catalog: CatalogSnapshot, path: Path):
+    """Write a catalog in the cars_embeddings.json schema, one car at a time."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"embeddings": {')
+        for row in range(len(catalog)):
+            latitude = catalog.numeric['latitude'][row]
+            odometer = catalog.numeric['odometer'][row]
+            metadata = {
+                'id': str(catalog.ids[row]),
+                'price': float(catalog.numeric['price'][row]),
+                'year': int(catalog.numeric['year'][row]),
+                'odometer': None if np.isnan(odometer) else float(odometer),
+                'lat': None if np.isnan(latitude) else float(latitude),
+                'long': None if np.isnan(latitude) else float(catalog.numeric['longitude'][row]),
+                **{column: catalog.get_category(column, row) for column in CATEGORICAL_COLUMNS},
+                **{column: catalog.text[column].get(row) for column in catalog.text},
+            }
+            record = {'metadata': metadata, 'embedding': catalog.embeddings[row].tolist()}
+            f.write(("," if row else "") + json.dumps(metadata['id']) + ": " + json.dumps(record))
+        f.write("}}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="snapshot directory (CURRENT is pointed at the new version)")
+    parser.add_argument("--json", help="also write the catalog as a cars_embeddings.json file")
+    args = parser.parse_args()
+    if not args.out and not args.json:
+        parser.error("--out and/or --json is required")
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="synthetic_catalog_") as workdir:
+        catalog = synthetic_catalog(args.cars, args.dim, args.seed, Path(workdir))
+        if args.out:
+            write_snapshot(catalog, Path(args.out))
+        if args.json:
+            write_json(catalog, Path(args.json))
+        del catalog
+    print(f"✅ Synthetic catalog built in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
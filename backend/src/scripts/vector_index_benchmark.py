@@ -0,0 +1,86 @@
+"""
+Recall@k and latency of the approximate vector indexes against exact search.
+
+Usage (from the backend directory):
+    python src/scripts/vector_index_benchmark.py --data src/data/cars_embeddings.json \\
+        --ef-search 16 32 64 128 --nprobe 1 4 8 16
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from src.stores.vectorindex.vectorindex_factory import VectorIndexFactory
+from src.scripts.embedding_recall_report import load_matrix
+
+
+def run_queries(index, matrix: np.ndarray, query_rows: np.ndarray, k: int) -> tuple[list[set], np.ndarray]:
+    results, latencies = [], []
+    for row in query_rows:
+        start = time.perf_counter()
+        found, _ = index.search(matrix[row], k, exclude_index=int(row))
+        latencies.append(time.perf_counter() - start)
+        results.append(set(found.tolist()))
+    return results, np.array(latencies) * 1000
+
+
+def summarize(name: str, build_s: float, results: list[set], truth: list[set],
+              latencies_ms: np.ndarray, k: int) -> dict:
+    hits = sum(len(found & expected) for found, expected in zip(results, truth))
+    return {
+        "index": name,
+        "build_s": round(build_s, 2),
+        f"recall@{k}": round(hits / (k * len(truth)), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="src/data/cars_embeddings.json")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    matrix = load_matrix(Path(args.data))
+    rng = np.random.default_rng(0)
+    query_rows = rng.choice(len(matrix), size=min(args.queries, len(matrix)), replace=False)
+    print(f"📂 {len(matrix)} embeddings, dim={matrix.shape[1]}, {len(query_rows)} queries")
+
+    start = time.perf_counter()
+    exact = VectorIndexFactory.create("flat", matrix)
+    build_s = time.perf_counter() - start
+    truth, latencies = run_queries(exact, matrix, query_rows, args.k)
+    report = [summarize("flat", build_s, truth, truth, latencies, args.k)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        hnsw = VectorIndexFactory.create("hnsw", matrix, index_path=f"{tmp}/hnsw.bin")
+        build_s = time.perf_counter() - start
+        for ef in args.ef_search:
+            hnsw.ef_search = ef
+            results, latencies = run_queries(hnsw, matrix, query_rows, args.k)
+            report.append(summarize(f"hnsw ef_search={ef}", build_s, results, truth, latencies, args.k))
+
+        start = time.perf_counter()
+        ivf = VectorIndexFactory.create("ivf", matrix, index_path=f"{tmp}/ivf.bin")
+        build_s = time.perf_counter() - start
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            results, latencies = run_queries(ivf, matrix, query_rows, args.k)
+            report.append(summarize(f"ivf nprobe={nprobe}", build_s, results, truth, latencies, args.k))
+
+    for row in report:
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+from src.core.config import settings
+from src.repositories.catalog_snapshot import (
+    CatalogSnapshot,
+    apply_changes,
+    current_version,
+    load_catalog,
+    prune_snapshots,
+    publish_json_snapshot,
+    read_current,
+    read_snapshot,
+    set_catalog,
+    snapshot_build_lock,
+    write_snapshot,
+)
+from src.repositories.car_repository import CarRepository
+from src.repositories.embedding_repository import EmbeddingRepository
+from src.repositories.neighbor_table import update_neighbor_table
+
+# Fields embedded when an upserted car comes without an embedding
+_EMBEDDING_TEXT_FIELDS = ('year', 'manufacturer', 'model', 'condition', 'type', 'fuel',
+                          'transmission', 'paint_color', 'description')
+
+
+class CatalogService:
+    """
+    Builds new catalog versions in the background and swaps them in atomically.
+    Builds run one at a time on a single worker thread (and under a file
+    lock across processes). A new version is written as a snapshot, its
+    neighbour table is derived from the previous version's, its repository
+    views and indexes are built, and only then is it made current.
+    Requests already running keep the version their repositories were bound to.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-build")
+    _jobs = {}
+    _jobs_lock = threading.Lock()
+    _watcher = None
+
+    def __init__(self):
+        self.settings = settings
+        self.snapshot_dir = Path.cwd() / self.settings.CATALOG_SNAPSHOT_DIR
+        self.data_file = Path.cwd() / self.settings.DATA_FILE_PATH
+
+    def submit_changes(self, upserts: list[dict], removals: list[str]) -> dict:
+        """
+        Queue an incremental update. upserts are car records shaped like
+        cars_embeddings.json metadata, with an optional 'embedding'.
+        """
+        return self._submit("changes", lambda: self._build_changes(upserts, removals))
+
+    def submit_reload(self) -> dict:
+        """Queue a full rebuild from DATA_FILE_PATH."""
+        return self._submit("reload", self._build_from_json)
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with CatalogService._jobs_lock:
+            job = CatalogService._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def status(self) -> dict:
+        catalog = load_catalog()
+        with CatalogService._jobs_lock:
+            jobs = [dict(job) for job in CatalogService._jobs.values()]
+        return {
+            "catalog_version": catalog.version,
+            "n_cars": len(catalog),
+            "watching": CatalogService._watcher is not None,
+            "jobs": jobs[-20:],
+        }
+
+    def start_watch(self):
+        """Start the watch thread (once per process)."""
+        if CatalogService._watcher is not None:
+            return
+        CatalogService._watcher = threading.Thread(target=self._watch, name="catalog-watch", daemon=True)
+        CatalogService._watcher.start()
+        print(f"👀 Watching {self.data_file} and {self.snapshot_dir / 'CURRENT'}")
+
+    def _submit(self, kind: str, build: Callable[[], Optional[CatalogSnapshot]]) -> dict:
+        job_id = uuid.uuid4().hex[:12]
+        job = {"job_id": job_id, "kind": kind, "status": "queued",
+               "created_at": datetime.utcnow().isoformat(), "catalog_version": None, "error": None}
+        with CatalogService._jobs_lock:
+            CatalogService._jobs[job_id] = job
+            # Forget the oldest finished jobs; queued and running ones are always kept
+            finished = [key for key, entry in CatalogService._jobs.items() if entry["status"] in ("done", "failed")]
+            for key in finished[:max(0, len(CatalogService._jobs) - 100)]:
+                del CatalogService._jobs[key]
+        CatalogService._executor.submit(self._run, job_id, build)
+        return dict(job)
+
+    def _run(self, job_id: str, build: Callable[[], Optional[CatalogSnapshot]]):
+        self._update_job(job_id, status="running")
+        try:
+            catalog = build()
+            self._update_job(job_id, status="done", catalog_version=catalog.version if catalog else None)
+        except Exception as e:
+            print(f"❌ Catalog job {job_id} failed: {e}")
+            self._update_job(job_id, status="failed", error=str(e))
+
+    def _update_job(self, job_id: str, **fields):
+        with CatalogService._jobs_lock:
+            job = CatalogService._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=datetime.utcnow().isoformat())
+
+    def _build_changes(self, upserts: list[dict], removals: list[str]) -> CatalogSnapshot:
+        records = self._to_records(upserts)
+        with snapshot_build_lock(self.snapshot_dir):
+            # Another worker may have published a newer version meanwhile: build on top of it
+            base = load_catalog()
+            if current_version(self.snapshot_dir) not in (None, base.version):
+                base = read_current(self.snapshot_dir) or base
+
+            catalog = apply_changes(base, records, removals)
+            catalog = read_snapshot(write_snapshot(catalog, self.snapshot_dir))
+            self._derive_neighbors(base, catalog)
+        self._activate(catalog)
+        return catalog
+
+    def _build_from_json(self) -> CatalogSnapshot:
+        with snapshot_build_lock(self.snapshot_dir):
+            previous = load_catalog()
+            # Reused when already built (e.g. by another worker watching the same file)
+            catalog = publish_json_snapshot(self.snapshot_dir, self.data_file)
+            self._derive_neighbors(previous, catalog)
+        self._activate(catalog)
+        return catalog
+
+    def _derive_neighbors(self, previous: CatalogSnapshot, catalog: CatalogSnapshot):
+        """Give a new version a neighbour table before it is activated (by-id requests scan without one)."""
+        if not self.settings.USE_NEIGHBOR_TABLE or catalog.version == previous.version:
+            return
+        try:
+            update_neighbor_table(previous, catalog)
+        except Exception as e:
+            print(f"⚠️ Could not derive the neighbour table of {catalog.version}: {e}")
+
+    def _activate(self, catalog: CatalogSnapshot):
+        """Warm the repositories for a version, then make it current."""
+        if catalog.version == load_catalog().version:
+            return
+        CarRepository(catalog)
+        EmbeddingRepository(catalog)
+        set_catalog(catalog)
+        prune_snapshots(self.snapshot_dir, self.settings.CATALOG_KEEP_VERSIONS)
+        print(f"🔄 Catalog swapped to {catalog.version} ({len(catalog)} cars)")
+
+    def _to_records(self, upserts: list[dict]) -> list[dict]:
+        """Car dicts -> cars_embeddings.json records, embedding the ones without an embedding."""
+        records = [{"metadata": {k: v for k, v in car.items() if k != "embedding"},
+                    "embedding": car.get("embedding")} for car in upserts]
+
+        missing = [record for record in records if not record["embedding"]]
+        if missing:
+            if settings.rag_service is None:
+                raise ValueError("Cars without an embedding need a configured embedding provider")
+            texts = []
+            for record in missing:
+                metadata = record["metadata"]
+                if not metadata.get("combined_text"):
+                    metadata["combined_text"] = " ".join(
+                        str(metadata[field]) for field in _EMBEDDING_TEXT_FIELDS if metadata.get(field)
+                    )
+                texts.append(metadata["combined_text"])
+            for record, embedding in zip(missing, settings.rag_service.embedding.embed(texts)):
+                record["embedding"] = list(map(float, embedding))
+        return records
+
+    def _watch(self):
+        last_mtime = self.data_file.stat().st_mtime if self.data_file.exists() else None
+        # Edits made before the watch started are picked up here (load_catalog compares versions)
+        load_catalog()
+        while True:
+            time.sleep(self.settings.CATALOG_WATCH_INTERVAL_SECONDS)
+            try:
+                # Follow versions published by other worker processes
+                version = current_version(self.snapshot_dir)
+                if version is not None and version != load_catalog().version:
+                    catalog = read_current(self.snapshot_dir)
+                    if catalog is not None:
+                        self._activate(catalog)
+
+                mtime = self.data_file.stat().st_mtime if self.data_file.exists() else None
+                if mtime != last_mtime:
+                    last_mtime = mtime
+                    print(f"📂 {self.data_file} changed, rebuilding the catalog")
+                    self.submit_reload()
+            except Exception as e:
+                print(f"⚠️ Catalog watch error: {e}")
@@ -3,6 +3,7 @@ from datetime import datetime
 from src.repositories.conversations_repository import ConversationRepository
 from src.repositories.messages_repository import MessagesRepository
 from src.repositories.pdf_repository import PDFRepository
+from src.core.config import settings
 
 
 class ConversationService:
@@ -33,8 +34,11 @@ class ConversationService:
         # Delete messages
         self.message_repo.delete_by_conversation(conversation_id)
         
-        # Delete PDFs
-        self.pdf_repo.delete_by_conversation(conversation_id)
+        # Delete PDFs, and the vectors no other conversation's duplicate still uses
+        orphaned = self.pdf_repo.delete_by_conversation(conversation_id)
+        if settings.rag_service is not None:
+            for vectors_pdf_id in orphaned:
+                settings.rag_service.vectordb.delete_by_pdf_id(vectors_pdf_id)
     
     def add_message(self, conversation_id: str, role: str, content: str):
         """Add a message to conversation"""
@@ -1,6 +1,8 @@
 # src/services/rag_service.py
+import asyncio
 import os
-from typing import Optional, List
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional, List
 from datetime import datetime
 from src.repositories.pdf_repository import PDFRepository
 from src.repositories.conversations_repository import ConversationRepository
@@ -8,9 +10,11 @@ from src.repositories.messages_repository import MessagesRepository
 from src.repositories.chunk_repository import ChunkRepository
 from src.stores.llm.llm_factory import LLMFactory
 from src.stores.embedding.embedding_factory import EmbeddingFactory
+from src.stores.embedding.embedding_cache import get_embedding_cache
 from src.stores.vectordb.vectordb_factory import VectorDBFactory
 from src.core.pdf_service import PDFService
 from src.core.config import settings
+from src.core.concurrency import run_blocking
 
 
 class RAGService:
@@ -37,7 +41,8 @@ class RAGService:
         )
         self.embedding = EmbeddingFactory.create(
             emb_prov,
-            settings.GEMINI_API_KEY if emb_prov == "gemini" else None
+            settings.GEMINI_API_KEY if emb_prov == "gemini" else None,
+            cache=get_embedding_cache(db)
         )
         self.vectordb = VectorDBFactory.create(
             vec_prov,
@@ -47,8 +52,24 @@ class RAGService:
         # Initialize PDF service
         self.pdf_service = PDFService()
 
-    def upload_pdf(self, pdf_path: str, conversation_id: Optional[str] = None) -> str:
-        """Process and upload a PDF file"""
+    def upload_pdf(self, pdf_path: str, conversation_id: Optional[str] = None,
+                   content_hash: Optional[str] = None, filename: Optional[str] = None) -> str:
+        """
+        Process and upload a PDF file (content_hash: sha256 of the file, computed
+        if not given; filename: name to record, defaults to the file's own name)
+        """
+        # Generate PDF ID
+        pdf_id = f"pdf_{datetime.now().timestamp()}"
+        filename = filename or os.path.basename(pdf_path)
+
+        # Same bytes already stored: reuse their blob and vectors
+        content_hash = content_hash or self.pdf_service.content_hash(pdf_path)
+        existing = self.pdf_repo.find_by_content_hash(content_hash)
+        if existing is not None:
+            self.pdf_repo.create_reference(pdf_id, filename, existing, conversation_id)
+            print(f"♻️ {filename} is a duplicate of {existing['pdf_id']}, reusing its blob and vectors")
+            return pdf_id
+
         # Extract and process text
         text = self.pdf_service.extract_text(pdf_path)
         chunks = self.pdf_service.split_text(text)
@@ -56,48 +77,117 @@ class RAGService:
         # Generate embeddings
         embeddings = self.embedding.embed(chunks)
         
-        # Generate PDF ID
-        pdf_id = f"pdf_{datetime.now().timestamp()}"
-        
         # Save PDF to MongoDB
         with open(pdf_path, 'rb') as f:
             content = f.read()
-        filename = os.path.basename(pdf_path)
         
-        self.pdf_repo.create(pdf_id, filename, content, conversation_id)
+        self.pdf_repo.create(pdf_id, filename, content, conversation_id, content_hash)
+        
+        # Store in vector database
+        metadata, ids = self._chunk_records(pdf_id, filename, conversation_id, len(chunks))
+        self.vectordb.add_documents(chunks, embeddings, metadata, ids)
         
-        # Prepare metadata for vector DB
+        return pdf_id
+
+    async def aupload_pdf(self, pdf_path: str, conversation_id: Optional[str] = None,
+                          content_hash: Optional[str] = None, filename: Optional[str] = None) -> str:
+        """Async upload_pdf: parsing and MongoDB writes run on the blocking pool"""
+        pdf_id = f"pdf_{datetime.now().timestamp()}"
+        filename = filename or os.path.basename(pdf_path)
+
+        content_hash = content_hash or await run_blocking(self.pdf_service.content_hash, pdf_path)
+        existing = await run_blocking(self.pdf_repo.find_by_content_hash, content_hash)
+        if existing is not None:
+            await run_blocking(self.pdf_repo.create_reference, pdf_id, filename, existing, conversation_id)
+            print(f"♻️ {filename} is a duplicate of {existing['pdf_id']}, reusing its blob and vectors")
+            return pdf_id
+
+        text = await run_blocking(self.pdf_service.extract_text, pdf_path)
+        chunks = await run_blocking(self.pdf_service.split_text, text)
+        embeddings = await self.embedding.aembed(chunks)
+
+        content = await run_blocking(Path(pdf_path).read_bytes)
+        await run_blocking(self.pdf_repo.create, pdf_id, filename, content, conversation_id, content_hash)
+
+        metadata, ids = self._chunk_records(pdf_id, filename, conversation_id, len(chunks))
+        await self.vectordb.aadd_documents(chunks, embeddings, metadata, ids)
+        return pdf_id
+
+    def _chunk_records(self, pdf_id: str, filename: str, conversation_id: Optional[str],
+                       n_chunks: int) -> tuple[List[dict], List[str]]:
+        """Vector DB metadata and ids of a PDF's chunks"""
         metadata = [
             {
                 "source": filename, 
                 "pdf_id": pdf_id, 
                 "conversation_id": conversation_id or ""
             }
-            for _ in chunks
+            for _ in range(n_chunks)
         ]
-        ids = [f"{pdf_id}_chunk_{i}" for i in range(len(chunks))]
-        
-        # Store in vector database
-        self.vectordb.add_documents(chunks, embeddings, metadata, ids)
-        
-        return pdf_id
+        ids = [f"{pdf_id}_chunk_{i}" for i in range(n_chunks)]
+        return metadata, ids
     
     def query(self, question: str, conversation_id: Optional[str] = None, 
               top_k: int = 3) -> str:
         """Query the RAG system"""
+        prompt = self._build_query_prompt(question, conversation_id, top_k)
+
+        # Generate response
+        return self.llm.generate(prompt)
+
+    async def aquery(self, question: str, conversation_id: Optional[str] = None,
+                     top_k: int = 3) -> str:
+        """Async query: the event loop is never blocked on retrieval or the LLM"""
+        prompt = await self._abuild_query_prompt(question, conversation_id, top_k)
+        return await self.llm.agenerate(prompt)
+
+    def query_stream(self, question: str, conversation_id: Optional[str] = None,
+                     top_k: int = 3) -> Iterator[str]:
+        """Query the RAG system, yielding the answer as the LLM produces it"""
+        prompt = self._build_query_prompt(question, conversation_id, top_k)
+        yield from self.llm.generate_stream(prompt)
+
+    async def aquery_stream(self, question: str, conversation_id: Optional[str] = None,
+                            top_k: int = 3) -> AsyncIterator[str]:
+        """Async query_stream"""
+        prompt = await self._abuild_query_prompt(question, conversation_id, top_k)
+        async for text in self.llm.agenerate_stream(prompt):
+            yield text
+
+    def _build_query_prompt(self, question: str, conversation_id: Optional[str], top_k: int) -> str:
+        """Retrieve the context of a question and build the query prompt"""
         # Embed question
-        query_embedding = self.embedding.embed([question])[0]
+        query_embedding = self.embedding.embed_queries([question])[0]
         
         # Search vector database
         results = self.vectordb.search(query_embedding, top_k)
 
+        # PDFs of the conversation and global ones (a duplicate upload uses the chunks of the first one)
+        pdf_ids = self.pdf_repo.find_vector_ids(conversation_id, include_global=True) if conversation_id else None
+        return self._query_prompt(question, conversation_id, results, pdf_ids)
+
+    async def _abuild_query_prompt(self, question: str, conversation_id: Optional[str], top_k: int) -> str:
+        async def retrieve() -> List[dict]:
+            query_embedding = (await self.embedding.aembed_queries([question]))[0]
+            return await self.vectordb.asearch(query_embedding, top_k)
+
+        if not conversation_id:
+            return self._query_prompt(question, conversation_id, await retrieve(), None)
+        results, pdf_ids = await asyncio.gather(
+            retrieve(),
+            run_blocking(self.pdf_repo.find_vector_ids, conversation_id, include_global=True),
+        )
+        return self._query_prompt(question, conversation_id, results, pdf_ids)
+
+    def _query_prompt(self, question: str, conversation_id: Optional[str], results: List[dict],
+                      pdf_ids: Optional[set]) -> str:
+        """Query prompt from the retrieved chunks (restricted to pdf_ids if given)"""
         print("Search Results:", results)
         print(f"Conversation ID: {conversation_id}")
         
         # Filter by conversation if specified
-        if conversation_id:
-            results = [r for r in results 
-                      if r['metadata'].get('conversation_id') == conversation_id or r['metadata'].get('conversation_id') == ""]
+        if pdf_ids is not None:
+            results = [r for r in results if r['metadata'].get('pdf_id') in pdf_ids]
         
         # Build context
         context = "\n\n".join([r['text'] for r in results])
@@ -120,27 +210,81 @@ class RAGService:
             If it's a legal question, mention what driving law or rule applies.
         """
         print(prompt)
-        # return ""
-        
-        # Generate response
-        return self.llm.generate(prompt)
+        return prompt
     
     def chat(self, conversation_id: str, message: str, top_k: int = 3, 
              history_limit: int = 20) -> dict:
         """Chat with context and history"""
+        user_msg_id, prompt = self._start_chat_turn(conversation_id, message, top_k, history_limit)
+        
+        # Generate answer
+        answer = self.llm.generate(prompt)
+        
+        # Save assistant message
+        assistant_msg_id = self.message_repo.save_messages(conversation_id, "assistant", answer)
+        
+        return {
+            "user_message_id": user_msg_id,
+            "assistant_message_id": assistant_msg_id,
+            "answer": answer,
+        }
+
+    async def achat(self, conversation_id: str, message: str, top_k: int = 3,
+                    history_limit: int = 20) -> dict:
+        """Async chat: the event loop is never blocked on retrieval, MongoDB or the LLM"""
+        user_msg_id, prompt = await self._astart_chat_turn(conversation_id, message, top_k, history_limit)
+        answer = await self.llm.agenerate(prompt)
+        assistant_msg_id = await run_blocking(self.message_repo.save_messages, conversation_id, "assistant", answer)
+        return {
+            "user_message_id": user_msg_id,
+            "assistant_message_id": assistant_msg_id,
+            "answer": answer,
+        }
+
+    def chat_stream(self, conversation_id: str, message: str, top_k: int = 3,
+                    history_limit: int = 20) -> Iterator[dict]:
+        """
+        Chat with the answer streamed as events: start (user_message_id),
+        token (text) for every chunk, then done (assistant_message_id, answer).
+        The assistant message is saved once the stream completes.
+        """
+        user_msg_id, prompt = self._start_chat_turn(conversation_id, message, top_k, history_limit)
+        yield {"event": "start", "user_message_id": user_msg_id}
+
+        chunks = []
+        for text in self.llm.generate_stream(prompt):
+            chunks.append(text)
+            yield {"event": "token", "text": text}
+
+        answer = "".join(chunks).strip()
+        assistant_msg_id = self.message_repo.save_messages(conversation_id, "assistant", answer)
+        yield {"event": "done", "assistant_message_id": assistant_msg_id, "answer": answer}
+
+    async def achat_stream(self, conversation_id: str, message: str, top_k: int = 3,
+                           history_limit: int = 20) -> AsyncIterator[dict]:
+        """Async chat_stream (same events)"""
+        user_msg_id, prompt = await self._astart_chat_turn(conversation_id, message, top_k, history_limit)
+        yield {"event": "start", "user_message_id": user_msg_id}
+
+        chunks = []
+        async for text in self.llm.agenerate_stream(prompt):
+            chunks.append(text)
+            yield {"event": "token", "text": text}
+
+        answer = "".join(chunks).strip()
+        assistant_msg_id = await run_blocking(self.message_repo.save_messages, conversation_id, "assistant", answer)
+        yield {"event": "done", "assistant_message_id": assistant_msg_id, "answer": answer}
+
+    def _start_chat_turn(self, conversation_id: str, message: str, top_k: int,
+                         history_limit: int) -> tuple[str, str]:
+        """Save the user message and build the chat prompt; returns (user message id, prompt)"""
         # Save user message
-        user_msg_id = self.message_repo.create(conversation_id, "user", message)
+        user_msg_id = self.message_repo.save_messages(conversation_id, "user", message)
         
         # Get query embedding and search
-        query_embedding = self.embedding.embed([message])[0]
+        query_embedding = self.embedding.embed_queries([message])[0]
         results = self.vectordb.search(query_embedding, top_k)
-        
-        # Filter by conversation
-        results = [r for r in results 
-                  if r['metadata'].get('conversation_id') == conversation_id]
-        
-        # Build context
-        context = "\n\n".join([r['text'] for r in results])
+        pdf_ids = self.pdf_repo.find_vector_ids(conversation_id)
         
         # Get conversation history
         history = self.message_repo.find_by_conversation(
@@ -148,19 +292,35 @@ class RAGService:
         )
         
         # Build prompt with history and context
-        prompt = self._build_prompt_with_history_and_context(history, context, message)
-        
-        # Generate answer
-        answer = self.llm.generate(prompt)
-        
-        # Save assistant message
-        assistant_msg_id = self.message_repo.create(conversation_id, "assistant", answer)
+        prompt = self._chat_prompt(message, results, pdf_ids, history)
+        return user_msg_id, prompt
+
+    async def _astart_chat_turn(self, conversation_id: str, message: str, top_k: int,
+                                history_limit: int) -> tuple[str, str]:
+        """Async _start_chat_turn; retrieval and the history read run concurrently"""
+        user_msg_id = await run_blocking(self.message_repo.save_messages, conversation_id, "user", message)
+
+        async def retrieve() -> List[dict]:
+            query_embedding = (await self.embedding.aembed_queries([message]))[0]
+            return await self.vectordb.asearch(query_embedding, top_k)
+
+        results, pdf_ids, history = await asyncio.gather(
+            retrieve(),
+            run_blocking(self.pdf_repo.find_vector_ids, conversation_id),
+            run_blocking(self.message_repo.find_by_conversation,
+                         conversation_id, limit=history_limit, ascending=True),
+        )
+        return user_msg_id, self._chat_prompt(message, results, pdf_ids, history)
+
+    def _chat_prompt(self, message: str, results: List[dict], pdf_ids: set,
+                     history: List[dict]) -> str:
+        # Filter by conversation: chunks of its PDFs (a duplicate upload uses the chunks of the first one)
+        results = [r for r in results 
+                  if r['metadata'].get('pdf_id') in pdf_ids]
         
-        return {
-            "user_message_id": user_msg_id,
-            "assistant_message_id": assistant_msg_id,
-            "answer": answer,
-        }
+        # Build context
+        context = "\n\n".join([r['text'] for r in results])
+        return self._build_prompt_with_history_and_context(history, context, message)
     
     def _build_prompt_with_history_and_context(self, history: List[dict], 
                                               context: str, question: str) -> str:
@@ -189,10 +349,16 @@ class RAGService:
     #     return self.pdf_repo.find_global_pdfs()
     
     def delete_pdf(self, pdf_id: str):
-        """Delete a PDF"""
-        self.pdf_repo.delete(pdf_id)
-        self.vectordb.delete_by_pdf_id(pdf_id)
-        # TODO: Also delete from vector DB
+        """Delete a PDF, and its vectors once no duplicate upload uses them"""
+        vectors_pdf_id = self.pdf_repo.delete(pdf_id)
+        if vectors_pdf_id:
+            self.vectordb.delete_by_pdf_id(vectors_pdf_id)
+
+    async def adelete_pdf(self, pdf_id: str):
+        """Async delete_pdf"""
+        vectors_pdf_id = await run_blocking(self.pdf_repo.delete, pdf_id)
+        if vectors_pdf_id:
+            await self.vectordb.adelete_by_pdf_id(vectors_pdf_id)
     
     def get_statistics(self) -> dict:
         """Get system statistics"""
@@ -204,5 +370,6 @@ class RAGService:
             "total_conversations": len(conversations),
             "total_pdfs": total_pdfs,
             "global_pdfs": len(global_pdfs),
-            "conversation_pdfs": total_pdfs - len(global_pdfs)
+            "conversation_pdfs": total_pdfs - len(global_pdfs),
+            "embedding_cache": self.embedding.cache.stats() if hasattr(self.embedding, "cache") else None
         }
@@ -1,3 +1,6 @@
+import hashlib
+import json
+import numpy as np
 from typing import Optional
 from src.repositories.car_repository import CarRepository
 from src.repositories.embedding_repository import EmbeddingRepository
@@ -6,10 +9,21 @@ from src.services.scoring_service import ScoringService
 from src.schemas.car_schemas import Location, CarFilters
 from src.schemas.recommendation_schemas import Recommendation
 from src.core.config import settings
+from src.core.cache import LRUCache
 
 
 class RecommendationService:
     """Service for generating car recommendations."""
+
+    # Query text embeddings, keyed by (embedding model name, normalized text)
+    _query_embedding_cache = LRUCache(
+        settings.QUERY_EMBEDDING_CACHE_SIZE,
+        settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS or None
+    )
+    # Scored (row, scores...) lists, keyed by catalog version + canonical request hash.
+    # Car objects are rebuilt on a hit instead of being kept alive by the cache.
+    _result_cache = LRUCache(settings.RESULT_CACHE_SIZE)
+    _result_cache_version = None
     
     def __init__(
         self,
@@ -32,30 +46,29 @@ class RecommendationService:
         user_location: Optional[Location] = None,
         filters: Optional[CarFilters] = None,
         similarity_weight: Optional[float] = None,
-        distance_weight: Optional[float] = None
+        distance_weight: Optional[float] = None,
+        price_weight: Optional[float] = None,
+        recency_weight: Optional[float] = None
     ) -> list[Recommendation]:
         """Recommend similar cars based on car ID."""
         top_n = min(top_n , self.settings.MAX_TOP_N)
+        weights = (similarity_weight, distance_weight, price_weight, recency_weight)
+        cache_key = self._result_cache_key("by_id", car_id, top_n, user_location, filters, weights)
+        cached = RecommendationService._result_cache.get(cache_key)
+        if cached is not None:
+            return self._to_recommendations(self._relocate(cached, user_location))
+
         query_embedding = self.embedding_repo.get_embedding(car_id)
         if query_embedding is None:
             raise ValueError(f"No embedding found for car_id: {car_id}")
 
-        all_embeddings = self.embedding_repo.get_all_embeddings()
-        similarities = {}
-
-        for cid , embedding in all_embeddings.items():
-            if cid == car_id:
-                continue
-            sim_score = self.scoring_service.calculate_cosine_similarity(query_embedding , embedding)
-            if sim_score >= self.settings.SIMILARITY_THRESHOLD:
-                similarities[cid]  = sim_score
-
-        sorted_cars = sorted(similarities.items() , key = lambda x :x[1] , reverse=True)[:top_n*3]
-
-        recommendations = self._build_recommendations(
-            sorted_cars , user_location , filters , similarity_weight , distance_weight , top_n
+        index = self.embedding_repo.get_index(car_id)
+        rows, similarities = self._rank_by_id(
+            index, query_embedding, self._ranking_pool(top_n, user_location, weights), filters, user_location
         )
-        return recommendations
+        scored = self._score_rows(rows, similarities, user_location, weights, top_n)
+        RecommendationService._result_cache.set(cache_key, scored)
+        return self._to_recommendations(scored)
     
 
     def recommend_by_text(
@@ -65,98 +78,462 @@ class RecommendationService:
             user_location:Optional[Location] = None,
             filters:Optional[CarFilters] = None,
             similarity_weight : Optional[float] = None,
-            distance_weight : Optional[float] = None
+            distance_weight : Optional[float] = None,
+            search_mode: str = "semantic",
+            price_weight: Optional[float] = None,
+            recency_weight: Optional[float] = None
     ) -> list[Recommendation]:
-        """Recommend cars based on text query."""
+        """
+        Recommend cars based on text query.
+        search_mode: semantic (embeddings only), hybrid (BM25 and embedding
+        rankings fused) or keyword (BM25 picks the candidates, embeddings
+        re-rank them; no catalog scan). In hybrid and keyword mode the
+        similarity weight applies to the fused relevance_score, while
+        similarity_score stays the embedding similarity.
+        """
         top_n = min(top_n , self.settings.MAX_TOP_N)
-        query_embeddings = self.embedding_model.embed(query_text)
-        all_embeddings = self.embedding_repo.get_all_embeddings()
-
-        similarities = {}
-        for car_id , embedding in all_embeddings.items():
-            sim_score = self.scoring_service.calculate_cosine_similarity(query_embeddings , embedding)
-            if sim_score >= self.settings.SIMILARITY_THRESHOLD:
-                similarities[car_id] = sim_score
-
-        sorted_cars = sorted(similarities.items() , key= lambda x:x[1],reverse=True)[:top_n * 3]
-        recommendations = self._build_recommendations(
-            sorted_cars, user_location, filters, similarity_weight, distance_weight, top_n
+        weights = (similarity_weight, distance_weight, price_weight, recency_weight)
+        model_name = getattr(self.embedding_model, "model_name", type(self.embedding_model).__name__)
+        cache_key = self._result_cache_key(
+            "by_text", [model_name, search_mode, " ".join(query_text.lower().split())],
+            top_n, user_location, filters, weights
         )
-        return recommendations
+        cached = RecommendationService._result_cache.get(cache_key)
+        if cached is not None:
+            return self._to_recommendations(self._relocate(cached, user_location))
+
+        query_embeddings = self._embed_queries([query_text])[0]
+        top_k = self._ranking_pool(top_n, user_location, weights)
+        if search_mode == "semantic":
+            rows, similarities = self._rank_by_similarity(query_embeddings , top_k , filters , user_location)
+            relevance = None
+        else:
+            rows, similarities, relevance = self._rank_hybrid(
+                query_text , query_embeddings , top_k , filters , user_location , search_mode
+            )
+
+        scored = self._score_rows(rows, similarities, user_location, weights, top_n, relevance)
+        RecommendationService._result_cache.set(cache_key, scored)
+        return self._to_recommendations(scored)
     
-    def _build_recommendations(
+    def recommend_batch_by_car_ids(
+        self,
+        car_ids: list[str],
+        top_n: int = 10,
+        user_location: Optional[Location] = None,
+        filters: Optional[CarFilters] = None,
+        similarity_weight: Optional[float] = None,
+        distance_weight: Optional[float] = None,
+        price_weight: Optional[float] = None,
+        recency_weight: Optional[float] = None
+    ) -> list[Optional[list[Recommendation]]]:
+        """Recommend similar cars for several car IDs at once (None for unknown IDs)."""
+        top_n = min(top_n , self.settings.MAX_TOP_N)
+        weights = (similarity_weight, distance_weight, price_weight, recency_weight)
+        top_k = self._ranking_pool(top_n, user_location, weights)
+        indices = [self.embedding_repo.get_index(car_id) for car_id in car_ids]
+        known = [position for position, index in enumerate(indices) if index is not None]
+
+        results = [None] * len(car_ids)
+        for position in known:
+            ranked = self._rank_by_neighbors(indices[position] , top_k , filters , user_location)
+            if ranked is not None:
+                results[position] = self._to_recommendations(
+                    self._score_rows(*ranked, user_location, weights, top_n)
+                )
+
+        known = [position for position in known if results[position] is None]
+        if not known:
+            return results
+
+        exclude_indices = np.array([indices[position] for position in known], dtype=np.int64)
+        query_embeddings = np.array([self.embedding_repo.get_embedding(car_ids[position]) for position in known])
+        ranked = self._rank_batch_by_similarity(
+            query_embeddings , top_k , filters , user_location , exclude_indices
+        )
+        for position, (rows, similarities) in zip(known, ranked):
+            results[position] = self._to_recommendations(
+                self._score_rows(rows, similarities, user_location, weights, top_n)
+            )
+        return results
+
+    def recommend_batch_by_text(
+            self,
+            queries: list[str],
+            top_n: int = 10,
+            user_location: Optional[Location] = None,
+            filters: Optional[CarFilters] = None,
+            similarity_weight: Optional[float] = None,
+            distance_weight: Optional[float] = None,
+            price_weight: Optional[float] = None,
+            recency_weight: Optional[float] = None
+    ) -> list[list[Recommendation]]:
+        """Recommend cars for several text queries, embedded in a single call."""
+        top_n = min(top_n , self.settings.MAX_TOP_N)
+        weights = (similarity_weight, distance_weight, price_weight, recency_weight)
+        query_embeddings = self._embed_queries(queries)
+        ranked = self._rank_batch_by_similarity(
+            query_embeddings , self._ranking_pool(top_n, user_location, weights) , filters , user_location
+        )
+        return [
+            self._to_recommendations(self._score_rows(rows, similarities, user_location, weights, top_n))
+            for rows, similarities in ranked
+        ]
+
+    def _ranking_pool(self, top_n: int, user_location: Optional[Location], weights: tuple) -> Optional[int]:
+        """
+        How many similarity-ranked candidates the blended ranking needs: top_n
+        when the final score only varies with similarity (no user location,
+        price or recency term), else None for every car above the threshold.
+        """
+        _, _, price_weight, recency_weight = self.scoring_service.get_weights(*weights)
+        if user_location is None and not price_weight and not recency_weight:
+            return top_n
+        return None
+
+    def _rank_by_id(self, index: int, query_embedding, top_k: Optional[int],
+                    filters: Optional[CarFilters], user_location: Optional[Location]) -> tuple[np.ndarray, np.ndarray]:
+        """Similarity ranking of a car's neighbours: the precomputed table when it is exact, else a scan."""
+        ranked = self._rank_by_neighbors(index , top_k , filters , user_location)
+        if ranked is None:
+            ranked = self._rank_by_similarity(
+                query_embedding , top_k , filters , user_location , exclude_index=index
+            )
+        return ranked
+
+    def _rank_by_similarity(
+        self,
+        query_embedding,
+        top_k: Optional[int],
+        filters: Optional[CarFilters] = None,
+        user_location: Optional[Location] = None,
+        exclude_index: Optional[int] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the catalog rows and 0-1 similarity scores of the top_k cars,
+        best first, or with top_k None of every car above the similarity
+        threshold, in row order. Filters (including the max_distance_km
+        radius around the user) are applied first, so only matching cars are scored.
+        """
+        candidates = self.car_repo.find_candidate_rows(filters, user_location)
+        if candidates is not None and len(candidates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if top_k is None:
+            rows, cosines = self.embedding_repo.search_above(
+                query_embedding,
+                self.scoring_service.similarity_to_cosine(self.settings.SIMILARITY_THRESHOLD),
+                None if exclude_index is None else np.array([exclude_index], dtype=np.int64),
+                candidates=candidates
+            )[0]
+        else:
+            rows, cosines = self.embedding_repo.search(
+                query_embedding, top_k, exclude_index, candidates=candidates
+            )
+        similarities = self.scoring_service.calculate_similarity_scores(cosines)
+
+        keep = similarities >= self.settings.SIMILARITY_THRESHOLD
+        return rows[keep], similarities[keep]
+
+    def _rank_hybrid(
         self,
-        sorted_cars: list[tuple[str, float]],
+        query_text: str,
+        query_embedding,
+        top_k: Optional[int],
+        filters: Optional[CarFilters] = None,
+        user_location: Optional[Location] = None,
+        search_mode: str = "hybrid"
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fuse the BM25 ranking of query_text with the embedding ranking by
+        reciprocal rank fusion. In keyword mode the BM25 hits are the only
+        candidates, so the vector stage scores a few hundred rows instead of
+        the catalog. Falls back to the semantic ranking when nothing matches
+        lexically (or the lexical index is disabled).
+        Returns rows, their 0-1 similarity scores and their fused 0-1
+        relevance scores, best first by relevance (every fused row when
+        top_k is None). The final score blends the relevance, not the similarity.
+        """
+        candidates = self.car_repo.find_candidate_rows(filters, user_location)
+        if candidates is not None and len(candidates) == 0:
+            empty = np.empty(0, dtype=np.float32)
+            return np.empty(0, dtype=np.int64), empty, empty
+
+        pool = max(top_k or 0, self.settings.HYBRID_CANDIDATE_POOL)
+        lexical = self.car_repo.search_text(query_text, pool, candidates)
+        if lexical is None or len(lexical[0]) == 0:
+            rows, similarities = self._rank_by_similarity(query_embedding, top_k, filters, user_location)
+            return rows, similarities, similarities
+        lexical_rows = lexical[0]
+
+        if search_mode == "keyword":
+            vector_rows, _ = self.embedding_repo.search(
+                query_embedding, len(lexical_rows), candidates=np.sort(lexical_rows)
+            )
+        else:
+            vector_rows, _ = self._rank_by_similarity(query_embedding, pool, filters, user_location)
+        rows, relevance = self._fuse_rankings([lexical_rows, vector_rows], top_k)
+        similarities = self.scoring_service.calculate_similarity_scores(
+            self.embedding_repo.get_similarities(query_embedding, rows)
+        )
+        return rows, similarities, relevance
+
+    def _fuse_rankings(self, rankings: list[np.ndarray], top_k: Optional[int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Reciprocal rank fusion: sum of 1 / (RRF_K + rank) over the rankings,
+        scaled so that 1.0 means first in every ranking.
+        """
+        k = self.settings.RRF_K
+        rows = np.concatenate(rankings)
+        ranks = np.concatenate([np.arange(1, len(ranking) + 1) for ranking in rankings])
+        rows, inverse = np.unique(rows, return_inverse=True)
+        fused = np.bincount(inverse, weights=1.0 / (k + ranks), minlength=len(rows))
+        fused *= (k + 1) / len(rankings)
+
+        order = np.lexsort((rows, -fused))[:top_k]
+        return rows[order], fused[order].astype(np.float32)
+
+    @classmethod
+    def clear_query_embedding_cache(cls):
+        """Forget cached query embeddings (e.g. after the embedding provider changes)."""
+        cls._query_embedding_cache.clear()
+
+    @classmethod
+    def query_embedding_cache_stats(cls) -> dict:
+        return cls._query_embedding_cache.stats()
+
+    @classmethod
+    def clear_result_cache(cls):
+        """Forget cached recommendation lists (e.g. after the catalog is reloaded)."""
+        cls._result_cache.clear()
+
+    @classmethod
+    def result_cache_stats(cls) -> dict:
+        return {**cls._result_cache.stats(), "catalog_version": cls._result_cache_version}
+
+    def _relocate(self, scored: list[tuple], user_location: Optional[Location]) -> list[tuple]:
+        """
+        A cached list with distance_km recomputed for the exact user location.
+        Requests in the same cache cell share the ranking and scores computed
+        for the first of them; only the reported distances are their own.
+        """
+        if user_location is None or not scored:
+            return scored
+        rows = np.array([entry[0] for entry in scored], dtype=np.int64)
+        latitudes = self.car_repo.get_column('latitude')[rows]
+        longitudes = self.car_repo.get_column('longitude')[rows]
+        distances = self.scoring_service.calculate_distances(user_location, latitudes, longitudes)
+        if self.settings.DISTANCE_MODE == "geodesic":
+            for i in np.flatnonzero(~np.isnan(distances)):
+                distances[i] = self.scoring_service.calculate_distance(
+                    user_location, Location(latitude=float(latitudes[i]), longitude=float(longitudes[i]))
+                )
+        return [
+            entry[:4] + (None if np.isnan(distance) else float(distance),) + entry[5:]
+            for entry, distance in zip(scored, distances)
+        ]
+
+    def _result_cache_key(self, kind: str, query, top_n: int, user_location: Optional[Location],
+                          filters: Optional[CarFilters], weights: tuple) -> tuple[str, str]:
+        """
+        (catalog version, sha256 of the canonical request). Entries of an older
+        catalog are dropped as soon as a request sees a new version, and the
+        version in the key keeps them from ever being served meanwhile.
+        The user location is rounded to RESULT_CACHE_LOCATION_DECIMALS here
+        only; scoring always uses the exact location.
+        """
+        catalog_version = self.car_repo.get_catalog_version()
+        if RecommendationService._result_cache_version != catalog_version:
+            RecommendationService._result_cache.clear()
+            RecommendationService._result_cache_version = catalog_version
+
+        canonical = json.dumps({
+            "kind": kind,
+            "query": query,
+            "top_n": top_n,
+            "location": [
+                round(user_location.latitude, self.settings.RESULT_CACHE_LOCATION_DECIMALS),
+                round(user_location.longitude, self.settings.RESULT_CACHE_LOCATION_DECIMALS)
+            ] if user_location else None,
+            "filters": filters.model_dump(exclude_none=True) if filters else None,
+            "weights": list(weights),
+        }, sort_keys=True)
+        return catalog_version, hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _embed_queries(self, queries: list[str]) -> np.ndarray:
+        """
+        Embed query texts through the LRU cache. Texts are normalized
+        (lowercased, whitespace collapsed) before lookup and embedding; all
+        misses are embedded in a single call.
+        """
+        model_name = getattr(self.embedding_model, "model_name", type(self.embedding_model).__name__)
+        cache = RecommendationService._query_embedding_cache
+        texts = [" ".join(query.lower().split()) for query in queries]
+        embeddings = [cache.get((model_name, text)) for text in texts]
+
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        if missing:
+            computed = dict(zip(missing, np.asarray(self.embedding_model.embed_queries(missing), dtype=np.float32)))
+            for text, embedding in computed.items():
+                cache.set((model_name, text), embedding)
+            embeddings = [computed[text] if embedding is None else embedding
+                          for text, embedding in zip(texts, embeddings)]
+        return np.array(embeddings, dtype=np.float32)
+
+    def _rank_by_neighbors(
+        self,
+        index: int,
+        top_k: Optional[int],
+        filters: Optional[CarFilters] = None,
+        user_location: Optional[Location] = None
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        First stage of the by-id path: rank a car's precomputed neighbours
+        instead of scanning the catalog. Returns None (scan instead) when the
+        table is missing or cannot guarantee the exact result: fewer than
+        top_k neighbours (with top_k None: not every car) survive the filters
+        while cars outside the table could still clear the similarity threshold.
+        """
+        neighbors = self.embedding_repo.get_neighbors(index)
+        if neighbors is None:
+            return None
+        rows, cosines = neighbors
+        if len(rows) == 0:
+            return None
+        similarities = self.scoring_service.calculate_similarity_scores(cosines)
+        table_floor = similarities[-1]
+
+        candidates = self.car_repo.find_candidate_rows(filters, user_location)
+        if candidates is not None:
+            in_filters = np.isin(rows, candidates)
+            rows, similarities = rows[in_filters], similarities[in_filters]
+
+        keep = similarities >= self.settings.SIMILARITY_THRESHOLD
+        rows, similarities = rows[keep], similarities[keep]
+        if table_floor < self.settings.SIMILARITY_THRESHOLD or (top_k is not None and len(rows) >= top_k):
+            return rows[:top_k], similarities[:top_k]
+        return None
+
+    def _rank_batch_by_similarity(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: Optional[int],
+        filters: Optional[CarFilters] = None,
+        user_location: Optional[Location] = None,
+        exclude_indices: Optional[np.ndarray] = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Batched _rank_by_similarity: the filters are evaluated once for all queries."""
+        candidates = self.car_repo.find_candidate_rows(filters, user_location)
+        if candidates is not None and len(candidates) == 0:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return [empty] * len(query_embeddings)
+
+        if top_k is None:
+            searched = self.embedding_repo.search_above(
+                query_embeddings,
+                self.scoring_service.similarity_to_cosine(self.settings.SIMILARITY_THRESHOLD),
+                exclude_indices, candidates=candidates
+            )
+        else:
+            searched = self.embedding_repo.search_batch(
+                query_embeddings, top_k, exclude_indices, candidates=candidates
+            )
+        ranked = []
+        for rows, cosines in searched:
+            similarities = self.scoring_service.calculate_similarity_scores(cosines)
+            keep = similarities >= self.settings.SIMILARITY_THRESHOLD
+            ranked.append((rows[keep], similarities[keep]))
+        return ranked
+
+    def _score_rows(
+        self,
+        rows: np.ndarray,
+        similarities: np.ndarray,
         user_location: Optional[Location],
-        filters: Optional[CarFilters],
-        similarity_weight: Optional[float],
-        distance_weight: Optional[float],
-        top_n: int
-    ) -> list[Recommendation]:
-        """Build recommendation objects from sorted cars."""
-        recommendations = []
-        
-        for car_id, sim_score in sorted_cars:
-            car = self.car_repo.find_by_id(car_id)
-            if car is None:
-                continue
-            if filters and not self._matches_filters(car, filters):
-                continue
-            
-            distance_km = None
-            dist_score = 1.0
-            
-            if user_location and car.location:
-                distance_km = self.scoring_service.calculate_distance(user_location, car.location)
-                dist_score = self.scoring_service.calculate_distance_score(distance_km)
-            
-            final_score = self.scoring_service.calculate_final_score(
-                sim_score, dist_score, similarity_weight, distance_weight
+        weights: tuple,
+        top_n: int,
+        relevance: Optional[np.ndarray] = None
+    ) -> list[tuple]:
+        """
+        Final scores of all candidate rows in one vectorized pass, top_n
+        selected on the blended score with argpartition (ties go to the more
+        relevant, then the more similar, then the lower row). The similarity weight applies to
+        relevance, the similarities unless given (hybrid fusion scores).
+        Returns compact (row, similarity, distance score, final score,
+        distance km, relevance) tuples, best first; no Car is built here.
+        """
+        if relevance is None:
+            relevance = similarities
+        _, _, price_weight, recency_weight = self.scoring_service.get_weights(*weights)
+
+        # Distances for every candidate in one vectorized pass (NaN = unknown location)
+        distances = np.full(len(rows), np.nan)
+        distance_scores = np.ones(len(rows))
+        if user_location and len(rows):
+            distances = self.scoring_service.calculate_distances(
+                user_location,
+                self.car_repo.get_column('latitude')[rows],
+                self.car_repo.get_column('longitude')[rows]
             )
-            
-            recommendations.append({
-                'car': car,
-                'similarity_score': sim_score,
-                'distance_score': dist_score,
-                'final_score': final_score,
-                'distance_km': distance_km
-            })
-            
-            if len(recommendations) >= top_n:
-                break
-        
-        # Sort by final score
-        recommendations.sort(key=lambda x: x['final_score'], reverse=True)
-        
-        # Create Recommendation objects with proper ranks
+            known = ~np.isnan(distances)
+            distance_scores[known] = self.scoring_service.calculate_distance_scores(distances[known])
+
+        price_scores = 1 - self.car_repo.get_percentiles('price', rows) if price_weight else None
+        recency_scores = self.car_repo.get_percentiles('year', rows) if recency_weight else None
+        final_scores = self.scoring_service.calculate_final_scores(
+            relevance, distance_scores, price_scores, recency_scores, *weights
+        )
+        best = self._top_scored(rows, relevance, similarities, final_scores, np.arange(len(rows)), top_n)
+
+        # Exact ellipsoidal distance for the few cars actually returned
+        if user_location and self.settings.DISTANCE_MODE == "geodesic" and len(best):
+            for i in best:
+                if np.isnan(distances[i]):
+                    continue
+                car_location = Location(
+                    latitude=float(self.car_repo.get_column('latitude')[rows[i]]),
+                    longitude=float(self.car_repo.get_column('longitude')[rows[i]])
+                )
+                distances[i] = self.scoring_service.calculate_distance(user_location, car_location)
+                distance_scores[i] = self.scoring_service.calculate_distance_score(distances[i])
+            final_scores[best] = self.scoring_service.calculate_final_scores(
+                relevance[best], distance_scores[best],
+                None if price_scores is None else price_scores[best],
+                None if recency_scores is None else recency_scores[best],
+                *weights
+            )
+            best = self._top_scored(rows, relevance, similarities, final_scores, best, top_n)
+
+        return [
+            (int(rows[i]), float(similarities[i]), float(distance_scores[i]), float(final_scores[i]),
+             None if np.isnan(distances[i]) else float(distances[i]), float(relevance[i]))
+            for i in best
+        ]
+
+    def _top_scored(self, rows: np.ndarray, relevance: np.ndarray, similarities: np.ndarray,
+                    final_scores: np.ndarray, positions: np.ndarray, top_n: int) -> np.ndarray:
+        """The top_n of the given positions by final score, best first."""
+        if len(positions) > top_n:
+            partitioned = positions[np.argpartition(-final_scores[positions], top_n - 1)[:top_n]]
+            # Keep every position tied with the n-th score, so the order does not depend on the partition
+            positions = positions[final_scores[positions] >= final_scores[partitioned].min()]
+        order = np.lexsort((
+            rows[positions], -similarities[positions], -relevance[positions], -final_scores[positions]
+        ))
+        return positions[order][:top_n]
+
+    def _to_recommendations(self, scored: list[tuple]) -> list[Recommendation]:
+        """Create Recommendation objects with proper ranks (Cars are built only for these rows)."""
         result = []
-        for i, rec_data in enumerate(recommendations[:top_n], start=1):
+        for i, (row, sim_score, dist_score, final_score, distance_km, relevance) in enumerate(scored, start=1):
             result.append(Recommendation(
-                car=rec_data['car'],
-                similarity_score=rec_data['similarity_score'],
-                distance_score=rec_data['distance_score'],
-                final_score=rec_data['final_score'],
-                distance_km=rec_data['distance_km'],
+                car=self.car_repo.find_by_row(row),
+                similarity_score=sim_score,
+                relevance_score=relevance,
+                distance_score=dist_score,
+                final_score=final_score,
+                distance_km=distance_km,
                 rank=i
             ))
         
         return result
-    
-    def _matches_filters(self, car, filters: CarFilters) -> bool:
-        """Check if car matches filters."""
-        if filters.min_price and car.price < filters.min_price:
-            return False
-        if filters.max_price and car.price > filters.max_price:
-            return False
-        if filters.min_year and car.year < filters.min_year:
-            return False
-        if filters.max_year and car.year > filters.max_year:
-            return False
-        if filters.manufacturers and car.manufacturer not in filters.manufacturers:
-            return False
-        if filters.types and car.type not in filters.types:
-            return False
-        if filters.states and car.state not in filters.states:
-            return False
-        return True
-
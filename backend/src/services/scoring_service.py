@@ -3,6 +3,7 @@ from typing import Optional
 from sklearn.metrics.pairwise import cosine_similarity
 from src.schemas.car_schemas import Location
 from src.core.config import settings
+from src.repositories.spatial_index import haversine_km
 from geopy.distance import geodesic
 
 
@@ -12,6 +13,8 @@ class ScoringService :
         self.settings = settings
         self.similarity_weight = self.settings.SIMILARITY_WEIGHT
         self.distance_weight = self.settings.DISTANCE_WEIGHT
+        self.price_weight = self.settings.PRICE_WEIGHT
+        self.recency_weight = self.settings.RECENCY_WEIGHT
         self.max_distance_km = self.settings.MAX_DISTANCE_KM
 
     def calculate_cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
@@ -33,6 +36,17 @@ class ScoringService :
         # Normalize to 0-1 range (cosine_similarity returns -1 to 1)
         # For embeddings, typically positive, but we ensure 0-1 range
         return max(0.0, min(1.0, (similarity + 1) / 2))
+
+    def calculate_similarity_scores(self, cosines: np.ndarray) -> np.ndarray:
+        """
+        Map raw cosine similarities to the 0-1 range used by
+        calculate_cosine_similarity, for a whole array at once.
+        """
+        return np.clip((np.asarray(cosines, dtype=np.float32) + 1) / 2, 0.0, 1.0)
+    
+    def similarity_to_cosine(self, similarity: float) -> float:
+        """Inverse of calculate_similarity_scores: the raw cosine a 0-1 similarity corresponds to."""
+        return 2 * similarity - 1
     
     def calculate_distance_score(self, distance_km: float, max_distance: Optional[float] = None) -> float:
         """Calculate distance score (inverse of distance)."""
@@ -44,6 +58,12 @@ class ScoringService :
             return 0.0
         return 1.0 - (distance_km / max_distance)
     
+    def calculate_distance_scores(self, distances_km: np.ndarray, max_distance: Optional[float] = None) -> np.ndarray:
+        """Vectorized calculate_distance_score for an array of distances."""
+        if max_distance is None:
+            max_distance = self.max_distance_km
+        return np.clip(1.0 - np.asarray(distances_km, dtype=np.float64) / max_distance, 0.0, 1.0)
+    
     def calculate_final_score(
         self,
         similarity_score: float,
@@ -57,9 +77,63 @@ class ScoringService :
         final = (sim_weight * similarity_score) + (dist_weight * distance_score)
         return max(0.0, min(1.0, final))
     
+    def get_weights(
+        self,
+        custom_similarity_weight: Optional[float] = None,
+        custom_distance_weight: Optional[float] = None,
+        custom_price_weight: Optional[float] = None,
+        custom_recency_weight: Optional[float] = None
+    ) -> tuple[float, float, float, float]:
+        """(similarity, distance, price, recency) weights, custom values falling back to the defaults."""
+        return (
+            custom_similarity_weight or self.similarity_weight,
+            custom_distance_weight or self.distance_weight,
+            custom_price_weight or self.price_weight,
+            custom_recency_weight or self.recency_weight,
+        )
+
+    def calculate_final_scores(
+        self,
+        similarity_scores: np.ndarray,
+        distance_scores: np.ndarray,
+        price_scores: Optional[np.ndarray] = None,
+        recency_scores: Optional[np.ndarray] = None,
+        custom_similarity_weight: Optional[float] = None,
+        custom_distance_weight: Optional[float] = None,
+        custom_price_weight: Optional[float] = None,
+        custom_recency_weight: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Vectorized weighted blend of the 0-1 scores for all candidates at
+        once, with optional price and recency terms (higher is better).
+        The weights of the blended terms are normalized to sum to 1, so the
+        final score stays in 0-1 without clipping and a strong price or
+        recency weight reorders candidates instead of saturating them at 1.
+        """
+        sim_weight, dist_weight, price_weight, recency_weight = self.get_weights(
+            custom_similarity_weight, custom_distance_weight, custom_price_weight, custom_recency_weight
+        )
+        terms = [(sim_weight, similarity_scores), (dist_weight, distance_scores)]
+        if price_scores is not None and price_weight:
+            terms.append((price_weight, price_scores))
+        if recency_scores is not None and recency_weight:
+            terms.append((recency_weight, recency_scores))
+
+        total_weight = sum(weight for weight, _ in terms) or 1.0
+        final = np.zeros(np.shape(similarity_scores), dtype=np.float64)
+        for weight, scores in terms:
+            final += (weight / total_weight) * np.asarray(scores, dtype=np.float64)
+        return final
+
     def calculate_distance(self, loc1: Location, loc2: Location) -> float:
         """Calculate distance between two locations in km."""
         point1 = (loc1.latitude, loc1.longitude)
         point2 = (loc2.latitude, loc2.longitude)
-        return geodesic(point1, point2).kilometers       
+        return geodesic(point1, point2).kilometers
 
+    def calculate_distances(self, loc: Location, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """
+        Haversine distance in km from a location to arrays of coordinates,
+        in one NumPy pass. NaN coordinates give NaN distances.
+        """
+        return haversine_km(loc.latitude, loc.longitude, latitudes, longitudes)
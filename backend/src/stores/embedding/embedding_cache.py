@@ -0,0 +1,305 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from src.core.concurrency import run_blocking
+from src.core.config import settings
+from src.stores.embedding.embedding_interface import EmbeddingInterface
+
+# Rows per SQL statement / Mongo query, below SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+# Eviction trims the store to this fraction of max_entries, so it does not run on every write
+_EVICT_TO = 0.9
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache(ABC):
+    """
+    Persistent, content-addressed embedding store: entries are keyed by
+    (model, sha256 of the text) and hold float32 vectors. Lookups and writes
+    are bulk operations; beyond max_entries the least recently used entries
+    are evicted.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached embedding of every text, None for misses."""
+        digests = [text_digest(text) for text in texts]
+        found = {}
+        unique = list(dict.fromkeys(digests))
+        for start in range(0, len(unique), _LOOKUP_BATCH):
+            found.update(self._lookup(model, unique[start:start + _LOOKUP_BATCH]))
+
+        with self._lock:
+            hits = sum(digest in found for digest in digests)
+            self.hits += hits
+            self.misses += len(digests) - hits
+        return [np.frombuffer(found[digest], dtype=np.float32).tolist() if digest in found else None
+                for digest in digests]
+
+    def set_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        records = {
+            text_digest(text): np.asarray(embedding, dtype=np.float32).tobytes()
+            for text, embedding in zip(texts, embeddings)
+        }
+        items = list(records.items())
+        added = 0
+        for start in range(0, len(items), _LOOKUP_BATCH):
+            added += self._store(model, dict(items[start:start + _LOOKUP_BATCH]))
+
+        with self._lock:
+            self.writes += added
+        size = self._size()
+        if 0 < self.max_entries < size:
+            evicted = self._evict(size - int(self.max_entries * _EVICT_TO))
+            with self._lock:
+                self.evictions += evicted
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": self._size(),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    @abstractmethod
+    def _lookup(self, model: str, digests: List[bytes]) -> Dict[bytes, bytes]:
+        """Vectors found for these digests (and mark them as used)."""
+
+    @abstractmethod
+    def _store(self, model: str, records: Dict[bytes, bytes]) -> int:
+        """Insert the records that are not stored yet; returns how many were added."""
+
+    @abstractmethod
+    def _size(self) -> int:
+        pass
+
+    @abstractmethod
+    def _evict(self, count: int) -> int:
+        """Delete the count least recently used entries; returns how many were deleted."""
+
+
+class SQLiteEmbeddingCache(EmbeddingCache):
+    """On-disk cache in a single SQLite file (WAL mode, shareable between workers)."""
+
+    backend = "disk"
+
+    def __init__(self, path: Path, max_entries: int):
+        super().__init__(max_entries)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._db_lock = threading.Lock()
+        with self._db_lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, digest BLOB NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, digest)) WITHOUT ROWID"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _lookup(self, model: str, digests: List[bytes]) -> Dict[bytes, bytes]:
+        placeholders = ",".join("?" * len(digests))
+        with self._db_lock, self._connection:
+            rows = self._connection.execute(
+                f"SELECT digest, vector FROM embeddings WHERE model = ? AND digest IN ({placeholders})",
+                [model, *digests],
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND digest = ?",
+                    [(now, model, digest) for digest, _ in rows],
+                )
+        return {bytes(digest): bytes(vector) for digest, vector in rows}
+
+    def _store(self, model: str, records: Dict[bytes, bytes]) -> int:
+        now = time.time()
+        with self._db_lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, digest, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, digest, vector, now) for digest, vector in records.items()],
+            )
+            added = self._connection.total_changes - before
+            self._count += added
+        return added
+
+    def _size(self) -> int:
+        return self._count
+
+    def _evict(self, count: int) -> int:
+        with self._db_lock, self._connection:
+            # Other workers write to the same file: recount before trimming
+            self._count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            count = min(count, self._count - int(self.max_entries * _EVICT_TO))
+            if count <= 0:
+                return 0
+            deleted = self._connection.execute(
+                "DELETE FROM embeddings WHERE (model, digest) IN "
+                "(SELECT model, digest FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count,),
+            ).rowcount
+            self._count -= deleted
+        print(f"🧹 Evicted {deleted} embeddings from the disk cache")
+        return deleted
+
+
+class MongoEmbeddingCache(EmbeddingCache):
+    """Cache in a MongoDB collection, shared by every instance of the app."""
+
+    backend = "mongo"
+
+    def __init__(self, collection, max_entries: int):
+        super().__init__(max_entries)
+        self.collection = collection
+        self.collection.create_index("last_used")
+
+    def _id(self, model: str, digest: bytes) -> str:
+        return f"{model}:{digest.hex()}"
+
+    def _lookup(self, model: str, digests: List[bytes]) -> Dict[bytes, bytes]:
+        ids = [self._id(model, digest) for digest in digests]
+        found = {
+            bytes.fromhex(doc["_id"].rsplit(":", 1)[1]): bytes(doc["vector"])
+            for doc in self.collection.find({"_id": {"$in": ids}}, {"vector": 1})
+        }
+        if found:
+            self.collection.update_many(
+                {"_id": {"$in": [self._id(model, digest) for digest in found]}},
+                {"$set": {"last_used": time.time()}},
+            )
+        return found
+
+    def _store(self, model: str, records: Dict[bytes, bytes]) -> int:
+        from bson import Binary
+        from pymongo import UpdateOne
+
+        now = time.time()
+        result = self.collection.bulk_write([
+            UpdateOne(
+                {"_id": self._id(model, digest)},
+                {"$setOnInsert": {"model": model, "vector": Binary(vector), "last_used": now}},
+                upsert=True,
+            )
+            for digest, vector in records.items()
+        ], ordered=False)
+        return result.upserted_count
+
+    def _size(self) -> int:
+        return self.collection.estimated_document_count()
+
+    def _evict(self, count: int) -> int:
+        oldest = [doc["_id"] for doc in self.collection.find({}, {"_id": 1}).sort("last_used", 1).limit(count)]
+        deleted = self.collection.delete_many({"_id": {"$in": oldest}}).deleted_count if oldest else 0
+        print(f"🧹 Evicted {deleted} embeddings from the MongoDB cache")
+        return deleted
+
+
+class CachedEmbedding(EmbeddingInterface):
+    """
+    Embedding provider behind a persistent cache. Document embeddings are
+    looked up in bulk, only the misses reach the model (in one call) and are
+    written back in bulk. Query embeddings are passed through. Other
+    attributes (model_name, get_dimension, ...) are the provider's.
+    """
+
+    def __init__(self, embedding: EmbeddingInterface, cache: EmbeddingCache):
+        self.embedding = embedding
+        self.cache = cache
+        # Namespaced by provider: two providers may serve models with the same name
+        self.cache_model = f"{type(embedding).__name__}/{getattr(embedding, 'model_name', '')}"
+
+    def __getattr__(self, name):
+        if name == "embedding":
+            raise AttributeError(name)
+        return getattr(self.embedding, name)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        cached = self._cached(texts)
+        missing = self._missing(texts, cached)
+        if not missing:
+            return cached
+        computed = dict(zip(missing, self.embedding.embed(missing)))
+        self._write_back(computed)
+        return [computed[text] if embedding is None else embedding for text, embedding in zip(texts, cached)]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        cached = await run_blocking(self._cached, texts)
+        missing = self._missing(texts, cached)
+        if not missing:
+            return cached
+        computed = dict(zip(missing, await self.embedding.aembed(missing)))
+        await run_blocking(self._write_back, computed)
+        return [computed[text] if embedding is None else embedding for text, embedding in zip(texts, cached)]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding.embed_queries(texts)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await self.embedding.aembed_queries(texts)
+
+    def _cached(self, texts: List[str]) -> List[Optional[List[float]]]:
+        # A failing cache must not fail the embedding: everything is a miss then
+        try:
+            return self.cache.get_many(self.cache_model, texts)
+        except Exception as e:
+            print(f"⚠️ Embedding cache lookup failed: {e}")
+            return [None] * len(texts)
+
+    def _missing(self, texts: List[str], cached: List[Optional[List[float]]]) -> List[str]:
+        return list(dict.fromkeys(text for text, embedding in zip(texts, cached) if embedding is None))
+
+    def _write_back(self, computed: Dict[str, List[float]]):
+        try:
+            self.cache.set_many(self.cache_model, list(computed), list(computed.values()))
+        except Exception as e:
+            print(f"⚠️ Embedding cache write failed: {e}")
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(db=None) -> Optional[EmbeddingCache]:
+    """
+    Process-wide cache selected by EMBEDDING_CACHE (disk | mongo | off), so
+    the counters survive provider swaps. The mongo backend needs db.
+    """
+    backend = settings.EMBEDDING_CACHE
+    if backend == "off" or (backend == "mongo" and db is None):
+        return None
+    with _caches_lock:
+        if backend not in _caches:
+            if backend == "disk":
+                _caches[backend] = SQLiteEmbeddingCache(
+                    Path(settings.EMBEDDING_CACHE_DIR) / "embeddings.sqlite3", settings.EMBEDDING_CACHE_MAX_ENTRIES
+                )
+            elif backend == "mongo":
+                _caches[backend] = MongoEmbeddingCache(db["embedding_cache"], settings.EMBEDDING_CACHE_MAX_ENTRIES)
+            else:
+                raise ValueError(f"Unknown embedding cache: {backend}")
+        return _caches[backend]
@@ -1,12 +1,17 @@
 from src.stores.embedding.embedding_interface import EmbeddingInterface
+from src.stores.embedding.embedding_cache import CachedEmbedding
 from src.stores.embedding.providers import GeminiEmbedding , HuggingFaceEmbedding
 
 class EmbeddingFactory:
     @staticmethod
     def create(provider: str, api_key: str = None, **kwargs) -> EmbeddingInterface:
         if provider == "gemini":
-            return GeminiEmbedding(api_key)
+            embedding = GeminiEmbedding(api_key)
         elif provider == "huggingface":
-            return HuggingFaceEmbedding(api_key, kwargs.get("model_name", "all-MiniLM-L6-v2"))
+            embedding = HuggingFaceEmbedding(api_key, kwargs.get("model_name", "all-MiniLM-L6-v2"))
         else:
             raise ValueError(f"Unknown embedding provider: {provider}")
+
+        # Optional persistent cache in front of the provider (see embedding_cache.py)
+        cache = kwargs.get("cache")
+        return CachedEmbedding(embedding, cache) if cache is not None else embedding
@@ -1,7 +1,20 @@
 from abc import ABC, abstractmethod
 from typing import List
+from src.core.concurrency import run_blocking
 
 class EmbeddingInterface(ABC):
     @abstractmethod
     def embed(self, texts: List[str]) -> List[List[float]]:
-        pass
\ No newline at end of file
+        """Embed documents (ingested chunks, catalog texts)."""
+        pass
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed search queries; providers with asymmetric models use a query task type."""
+        return self.embed(texts)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Async embed; providers without an async client run embed on the blocking pool."""
+        return await run_blocking(self.embed, texts)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await run_blocking(self.embed_queries, texts)
@@ -1,18 +1,140 @@
-import google.generativeai as genai
-from typing import List
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import httpx
+from src.core.config import settings
 from src.stores.embedding.embedding_interface import EmbeddingInterface
 
+# batchEmbedContents accepts at most this many texts per request
+MAX_BATCH_SIZE = 100
+# Rate limited (429) or temporarily unavailable: worth retrying
+RETRYABLE_STATUS = {429, 500, 503}
+
+
 class GeminiEmbedding(EmbeddingInterface):
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-    
+    """
+    Gemini embeddings through the REST batchEmbedContents API. Texts are
+    sent batch_size at a time with at most max_concurrency batches in
+    flight; rate-limited and unavailable responses are retried with
+    exponential backoff. Documents use the retrieval_document task type and
+    queries retrieval_query. base_url can point at a local fake endpoint.
+    """
+
+    def __init__(self, api_key: str, model_name: str = None, base_url: str = None,
+                 batch_size: int = None, max_concurrency: int = None, max_retries: int = None):
+        self.api_key = api_key
+        self.model_name = model_name or settings.GEMINI_EMBEDDING_MODEL
+        self.base_url = (base_url or settings.GEMINI_API_BASE_URL).rstrip('/')
+        self.batch_size = min(max(1, batch_size or settings.EMBEDDING_BATCH_SIZE), MAX_BATCH_SIZE)
+        self.max_concurrency = max(1, max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY)
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self._client = httpx.Client(timeout=60)
+        # Created on first async call, inside the serving event loop
+        self._async_client: Optional[httpx.AsyncClient] = None
+
     def embed(self, texts: List[str]) -> List[List[float]]:
-        embeddings = []
-        for text in texts:
-            result = genai.embed_content(
-                model="models/embedding-001",
-                content=text,
-                task_type="retrieval_document"
-            )
-            embeddings.append(result['embedding'])
-        return embeddings
\ No newline at end of file
+        return self._embed(texts, "RETRIEVAL_DOCUMENT")
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "RETRIEVAL_QUERY")
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed(texts, "RETRIEVAL_DOCUMENT")
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed(texts, "RETRIEVAL_QUERY")
+
+    def _embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        batches = self._batches(texts)
+        if len(batches) <= 1 or self.max_concurrency == 1:
+            results = [self._post_batch(batch, task_type) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as pool:
+                results = list(pool.map(lambda batch: self._post_batch(batch, task_type), batches))
+        return [embedding for result in results for embedding in result]
+
+    async def _aembed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def post(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._apost_batch(batch, task_type)
+
+        results = await asyncio.gather(*(post(batch) for batch in self._batches(texts)))
+        return [embedding for result in results for embedding in result]
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def _post_batch(self, batch: List[str], task_type: str) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._client.post(self._url(), headers=self._headers(),
+                                             json=self._request_body(batch, task_type))
+            except httpx.TransportError as e:
+                response, reason = None, str(e)
+            else:
+                if response.status_code == 200:
+                    return self._parse(response, len(batch))
+                reason = f"HTTP {response.status_code}"
+            delay = self._retry_delay(attempt, response, reason)
+            time.sleep(delay)
+
+    async def _apost_batch(self, batch: List[str], task_type: str) -> List[List[float]]:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=60)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._async_client.post(self._url(), headers=self._headers(),
+                                                         json=self._request_body(batch, task_type))
+            except httpx.TransportError as e:
+                response, reason = None, str(e)
+            else:
+                if response.status_code == 200:
+                    return self._parse(response, len(batch))
+                reason = f"HTTP {response.status_code}"
+            delay = self._retry_delay(attempt, response, reason)
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response], reason: str) -> float:
+        """
+        Seconds to wait before retrying a failed batch: Retry-After when the
+        server sends it, else exponential backoff with jitter. Raises when
+        the error is not retryable or the retries are exhausted.
+        """
+        if response is not None and response.status_code not in RETRYABLE_STATUS:
+            raise RuntimeError(f"Gemini embedding request failed: {reason} - {response.text}")
+        if attempt >= self.max_retries:
+            raise RuntimeError(f"Gemini embedding request failed after {attempt + 1} attempts: {reason}")
+
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.replace(".", "", 1).isdigit():
+            delay = float(retry_after)
+        else:
+            delay = settings.EMBEDDING_RETRY_BASE_SECONDS * 2 ** attempt * random.uniform(0.5, 1.0)
+        delay = min(delay, settings.EMBEDDING_RETRY_MAX_SECONDS)
+        print(f"⚠️ Gemini embedding {reason}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+        return delay
+
+    def _url(self) -> str:
+        return f"{self.base_url}/v1beta/{self.model_name}:batchEmbedContents"
+
+    def _headers(self) -> dict:
+        return {"x-goog-api-key": self.api_key or ""}
+
+    def _request_body(self, batch: List[str], task_type: str) -> dict:
+        return {
+            "requests": [
+                {"model": self.model_name, "content": {"parts": [{"text": text}]}, "taskType": task_type}
+                for text in batch
+            ]
+        }
+
+    def _parse(self, response: httpx.Response, expected: int) -> List[List[float]]:
+        embeddings = [item["values"] for item in response.json().get("embeddings", [])]
+        if len(embeddings) != expected:
+            raise RuntimeError(f"Gemini returned {len(embeddings)} embeddings for {expected} texts")
+        return embeddings
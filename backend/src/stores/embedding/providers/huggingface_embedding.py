@@ -11,6 +11,7 @@ class HuggingFaceEmbedding(EmbeddingInterface):
         - all-mpnet-base-v2: Best quality, 768 dimensions
         - paraphrase-multilingual-MiniLM-L12-v2: Multilingual
         """
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
         self.dimension = self.model.get_sentence_embedding_dimension()
     
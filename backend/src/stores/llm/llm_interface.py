@@ -1,6 +1,21 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterator
+from src.core.concurrency import iterate_blocking, run_blocking
 
 class LLMInterface(ABC):
     @abstractmethod
     def generate(self, prompt: str) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Yield the answer in text chunks as they are produced (providers without streaming yield it whole)."""
+        yield self.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        """Async generate; providers without an async client run generate on the blocking pool."""
+        return await run_blocking(self.generate, prompt)
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Async generate_stream; providers without an async client drive generate_stream from the blocking pool."""
+        async for text in iterate_blocking(self.generate_stream(prompt)):
+            yield text
@@ -1,4 +1,5 @@
 import google.generativeai as genai
+from typing import AsyncIterator, Iterator
 from src.stores.llm.llm_interface import LLMInterface 
 
 class GeminiLLM(LLMInterface):
@@ -24,12 +25,23 @@ class GeminiLLM(LLMInterface):
         ],
     })
     
-    def generate(self, prompt: str) -> str:
+    def _split_prompt(self, prompt: str) -> list[str]:
+        """Context and question as separate content parts."""
         parts = prompt.split("Question:", 1)
         context_block = parts[0] if parts else ""
         question_block = "Question:" + parts[1] if len(parts) == 2 else prompt
+        return [context_block.strip(), question_block.strip()]
+
+    def generate(self, prompt: str) -> str:
+        response = self.model.generate_content(self._split_prompt(prompt))
+        return self._answer_text(response)
 
-        response = self.model.generate_content([context_block.strip(), question_block.strip()])
+    async def agenerate(self, prompt: str) -> str:
+        """Native async generation (the SDK's async client), no thread needed."""
+        response = await self.model.generate_content_async(self._split_prompt(prompt))
+        return self._answer_text(response)
+
+    def _answer_text(self, response) -> str:
         print("response")
         print(response)
         print("response")
@@ -54,4 +66,36 @@ class GeminiLLM(LLMInterface):
         # return response.text.strip()        
         # response = self.model.generate_content(prompt)
         # return response.text
-    
\ No newline at end of file
+    
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Yield the answer chunk by chunk as Gemini produces it."""
+        produced = False
+        for chunk in self.model.generate_content(self._split_prompt(prompt), stream=True):
+            text = self._chunk_text(chunk)
+            if text:
+                produced = True
+                yield text
+        if not produced:
+            yield "I'm not sure based on the context."
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Async generate_stream over the SDK's async streaming response."""
+        produced = False
+        response = await self.model.generate_content_async(self._split_prompt(prompt), stream=True)
+        async for chunk in response:
+            text = self._chunk_text(chunk)
+            if text:
+                produced = True
+                yield text
+        if not produced:
+            yield "I'm not sure based on the context."
+
+    def _chunk_text(self, chunk) -> str:
+        try:
+            return chunk.text
+        except ValueError:
+            # Chunk without text parts (e.g. the last one when a stop sequence or safety filter hit)
+            finish_reason = getattr(chunk.candidates[0], "finish_reason", None) if chunk.candidates else None
+            print(f"⚠️ Gemini chunk without text. Finish reason: {finish_reason}")
+            return ""
@@ -1,5 +1,7 @@
+from typing import Iterator
 from transformers import pipeline
 from src.stores.llm.llm_interface import LLMInterface
+from src.stores.llm.providers.transformers_streaming import stream_generate
 
 class HuggingFaceLLM(LLMInterface):
     def __init__(self, api_key: str = None, model_name: str = "ihebmbarek/llama3-healthcare-full"):
@@ -31,3 +33,15 @@ class HuggingFaceLLM(LLMInterface):
             num_return_sequences=1
         )
         return result[0]['generated_text']
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Stream the generated text (without the prompt) token by token"""
+        yield from stream_generate(
+            self.pipeline.model,
+            self.pipeline.tokenizer,
+            prompt,
+            max_new_tokens=500,
+            do_sample=True,
+            temperature=0.7,
+            top_p=0.9
+        )
@@ -1,5 +1,7 @@
+from typing import Iterator
 from transformers import pipeline , AutoModelForCausalLM , AutoTokenizer
 from src.stores.llm.llm_interface import LLMInterface
+from src.stores.llm.providers.transformers_streaming import stream_generate
 
 from peft import PeftModel, PeftConfig
 # from unsloth.chat_templates import get_chat_template
@@ -84,3 +86,15 @@ class HuggingFaceTransformerLLM(LLMInterface):
             num_return_sequences=1
         )
         return result[0]['generated_text']
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Stream the generated text (without the prompt) token by token"""
+        yield from stream_generate(
+            self.model,
+            self.tokenizer,
+            prompt,
+            max_new_tokens=500,
+            do_sample=True,
+            temperature=0.7,
+            top_p=0.9
+        )
@@ -1,4 +1,6 @@
+import httpx
 import requests
+from typing import AsyncIterator, Iterator, Optional
 from src.stores.llm.llm_interface import LLMInterface
 
 class NgrokLLM(LLMInterface):
@@ -14,6 +16,8 @@ class NgrokLLM(LLMInterface):
         """
         # self.api_key = api_key
         self.ngrok_url = ngrok_url.rstrip('/')  # Remove trailing slash if exists
+        # Created on first async call, inside the serving event loop
+        self._async_client: Optional[httpx.AsyncClient] = None
         print(f"🔗 Connected to remote LLM endpoint: {self.ngrok_url}")
 
     def generate(self, prompt: str, max_tokens: int = 300, temperature: float = 0.7) -> str:
@@ -40,8 +44,7 @@ class NgrokLLM(LLMInterface):
             )
 
             if response.status_code == 200:
-                data = response.json()
-                return data.get("answer", "").strip().split("assistant")[-1].strip()
+                return self._clean_answer(response.json())
 
             print(f"❌ Request failed: {response.status_code} - {response.text}")
             return "Error generating response from remote LLM."
@@ -49,3 +52,122 @@ class NgrokLLM(LLMInterface):
         except requests.exceptions.RequestException as e:
             print(f"⚠️ Connection error with ngrok: {e}")
             return "Failed to connect to the remote LLM."
+
+    def generate_stream(self, prompt: str, max_tokens: int = 300, temperature: float = 0.7) -> Iterator[str]:
+        """
+        Streams the answer from the remote model. Servers that answer with
+        text/event-stream (data: lines) or chunked text are relayed as the
+        chunks arrive; a server that only returns JSON is yielded whole.
+        """
+        try:
+            with requests.post(
+                f"{self.ngrok_url}/ask",
+                json={
+                    "query": prompt,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                    "stream": True
+                },
+                timeout=60,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    print(f"❌ Request failed: {response.status_code} - {response.text}")
+                    yield "Error generating response from remote LLM."
+                    return
+
+                content_type = response.headers.get("content-type", "")
+                if content_type.startswith("application/json"):
+                    yield self._clean_answer(response.json())
+                elif content_type.startswith("text/event-stream"):
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line or not line.startswith("data:"):
+                            continue
+                        data = self._sse_data(line)
+                        if data == "[DONE]":
+                            break
+                        yield data
+                else:
+                    for text in response.iter_content(chunk_size=None, decode_unicode=True):
+                        if text:
+                            yield text
+
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Connection error with ngrok: {e}")
+            yield "Failed to connect to the remote LLM."
+
+    async def agenerate(self, prompt: str, max_tokens: int = 300, temperature: float = 0.7) -> str:
+        """Async generate over a pooled httpx client: waiting on the remote model holds no thread."""
+        try:
+            response = await self._client().post(
+                f"{self.ngrok_url}/ask",
+                json={
+                    "query": prompt,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature
+                },
+            )
+
+            if response.status_code == 200:
+                return self._clean_answer(response.json())
+
+            print(f"❌ Request failed: {response.status_code} - {response.text}")
+            return "Error generating response from remote LLM."
+
+        except httpx.HTTPError as e:
+            print(f"⚠️ Connection error with ngrok: {e}")
+            return "Failed to connect to the remote LLM."
+
+    async def agenerate_stream(self, prompt: str, max_tokens: int = 300,
+                               temperature: float = 0.7) -> AsyncIterator[str]:
+        """Async generate_stream, with the same JSON / event-stream / chunked text handling."""
+        try:
+            async with self._client().stream(
+                "POST",
+                f"{self.ngrok_url}/ask",
+                json={
+                    "query": prompt,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                    "stream": True
+                },
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    print(f"❌ Request failed: {response.status_code} - {response.text}")
+                    yield "Error generating response from remote LLM."
+                    return
+
+                content_type = response.headers.get("content-type", "")
+                if content_type.startswith("application/json"):
+                    await response.aread()
+                    yield self._clean_answer(response.json())
+                elif content_type.startswith("text/event-stream"):
+                    async for line in response.aiter_lines():
+                        if not line or not line.startswith("data:"):
+                            continue
+                        data = self._sse_data(line)
+                        if data == "[DONE]":
+                            break
+                        yield data
+                else:
+                    async for text in response.aiter_text():
+                        if text:
+                            yield text
+
+        except httpx.HTTPError as e:
+            print(f"⚠️ Connection error with ngrok: {e}")
+            yield "Failed to connect to the remote LLM."
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=60)
+        return self._async_client
+
+    def _sse_data(self, line: str) -> str:
+        """Payload of a "data:" line (one optional leading space dropped)."""
+        return line[5:][1:] if line[5:].startswith(" ") else line[5:]
+
+    def _clean_answer(self, data: dict) -> str:
+        """Keep only the assistant turn of the returned text."""
+        return data.get("answer", "").strip().split("assistant")[-1].strip()
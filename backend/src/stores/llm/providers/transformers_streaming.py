@@ -0,0 +1,42 @@
+import threading
+from typing import Iterator
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+
+class _StopWhenSet(StoppingCriteria):
+    """Stops generation once the consumer of the stream has gone away."""
+
+    def __init__(self, stop: threading.Event):
+        self.stop = stop
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.stop.is_set()
+
+
+def stream_generate(model, tokenizer, prompt: str, timeout: float = 120.0, **generate_kwargs) -> Iterator[str]:
+    """
+    Run model.generate in a background thread and yield the decoded new
+    text as tokens arrive (TextIteratorStreamer). Closing the iterator early
+    stops the generation.
+    """
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout)
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=model.generate,
+        kwargs={
+            **inputs,
+            **generate_kwargs,
+            "streamer": streamer,
+            "stopping_criteria": StoppingCriteriaList([_StopWhenSet(stop)]),
+        },
+        daemon=True,
+    )
+    thread.start()
+    try:
+        for text in streamer:
+            if text:
+                yield text
+    finally:
+        stop.set()
+        thread.join()
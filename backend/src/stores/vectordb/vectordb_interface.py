@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict
+from src.core.concurrency import run_blocking
 
 class VectorDBInterface(ABC):
     @abstractmethod
@@ -17,4 +18,19 @@ class VectorDBInterface(ABC):
 
     @abstractmethod
     def delete_by_conversation_id(self, conversation_id: str) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    # Async counterparts: run on the blocking pool unless a provider has an async client
+
+    async def aadd_documents(self, texts: List[str], embeddings: List[List[float]],
+                             metadata: List[Dict], ids: List[str]):
+        return await run_blocking(self.add_documents, texts, embeddings, metadata, ids)
+
+    async def asearch(self, query_embedding: List[float], top_k: int) -> List[Dict]:
+        return await run_blocking(self.search, query_embedding, top_k)
+
+    async def adelete_by_pdf_id(self, pdf_id: str) -> None:
+        return await run_blocking(self.delete_by_pdf_id, pdf_id)
+
+    async def adelete_by_conversation_id(self, conversation_id: str) -> None:
+        return await run_blocking(self.delete_by_conversation_id, conversation_id)
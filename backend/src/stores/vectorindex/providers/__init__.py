@@ -0,0 +1,3 @@
+from .flat_index import FlatIndex
+from .hnsw_index import HNSWIndex
+from .ivf_index import IVFFlatIndex
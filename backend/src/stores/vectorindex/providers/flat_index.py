@@ -0,0 +1,257 @@
+import heapq
+import numpy as np
+from typing import Optional
+from src.stores.vectorindex.vectorindex_interface import VectorIndexInterface
+from src.stores.vectorindex.utils import l2_normalize, top_k_indices, quantize_int8, quantize_storage
+
+STORAGE_MODES = ("float32", "float16", "int8")
+# Bound on the error of a float16 dot product of two unit vectors (half an ulp per component)
+FLOAT16_SCORE_ERROR = float(np.finfo(np.float16).eps) / 2 + 1e-6
+
+
+class FlatIndex(VectorIndexInterface):
+    def __init__(self, vectors: np.ndarray, storage_mode: str = "float32",
+                 scales: Optional[np.ndarray] = None, rescore_vectors: Optional[np.ndarray] = None,
+                 rescore_factor: int = 4, block_size: int = 65536):
+        """
+        Exact (brute-force) index over L2-normalized vectors, so cosine
+        similarity is a plain dot product.
+        Storage modes:
+        - float32: 4 bytes per dimension, exact scores
+        - float16: 2 bytes per dimension
+        - int8: 1 byte per dimension plus one float32 scale per row
+        Quantized modes score every row in a cheap first pass, then rescore a
+        shortlist of top_k * rescore_factor rows in float32 (rescore_vectors
+        when given, otherwise the dequantized rows).
+
+        vectors may be a read-only memory map shared by several processes:
+        rows are scored block_size at a time with a running top-k heap, so at
+        most one block is materialized per query.
+        """
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown embedding storage mode: {storage_mode}")
+
+        self.vectors = vectors
+        self.storage_mode = storage_mode
+        self.scales = scales
+        self.rescore_vectors = rescore_vectors
+        self.rescore_factor = max(1, rescore_factor)
+        self.block_size = block_size
+        self.dimension = vectors.shape[1]
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray, storage_mode: str = "float32",
+                    rescore_factor: int = 4, block_size: int = 65536) -> "FlatIndex":
+        """Normalize (and quantize) a raw embedding matrix in memory."""
+        vectors, scales = quantize_storage(l2_normalize(matrix), storage_mode)
+        return cls(vectors, storage_mode, scales, rescore_factor=rescore_factor, block_size=block_size)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the stored vectors."""
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def search(self, query: np.ndarray, top_k: int,
+               exclude_index: Optional[int] = None,
+               candidates: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score every row, or only the given candidate rows when a
+        pre-filtered candidate list is passed.
+        """
+        query = l2_normalize(np.asarray(query, dtype=np.float32).ravel())
+        if candidates is not None:
+            candidates = np.asarray(candidates, dtype=np.int64)
+
+        if self.storage_mode == "float32":
+            return self._scan(query, top_k, exclude_index, candidates)
+
+        # Cheap first pass over the quantized vectors
+        shortlist, _ = self._scan(query, top_k * self.rescore_factor, exclude_index, candidates)
+
+        # Rescore the shortlist in float32 against the unquantized query
+        exact = self.get_vectors(shortlist) @ query
+        order = top_k_indices(exact, top_k)
+        return shortlist[order], exact[order]
+
+    def search_batch(self, queries: np.ndarray, top_k: int,
+                     exclude_indices: Optional[np.ndarray] = None,
+                     candidates: Optional[np.ndarray] = None) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Search several queries at once: each block is scored against every
+        query in one matrix-matrix product. exclude_indices holds one row per
+        query to skip (-1 for none). Returns one (rows, cosines) pair per query.
+        """
+        queries = l2_normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if candidates is not None:
+            candidates = np.asarray(candidates, dtype=np.int64)
+        if exclude_indices is None:
+            exclude_indices = np.full(len(queries), -1, dtype=np.int64)
+
+        if self.storage_mode == "float32":
+            return self._scan_batch(queries, top_k, exclude_indices, candidates)
+
+        results = []
+        for query, (shortlist, _) in zip(
+            queries, self._scan_batch(queries, top_k * self.rescore_factor, exclude_indices, candidates)
+        ):
+            exact = self.get_vectors(shortlist) @ query
+            order = top_k_indices(exact, top_k)
+            results.append((shortlist[order], exact[order]))
+        return results
+
+    def search_above(self, queries: np.ndarray, min_score: float,
+                     exclude_indices: Optional[np.ndarray] = None,
+                     candidates: Optional[np.ndarray] = None) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Every row whose cosine similarity to a query is at least min_score,
+        as one (rows, cosines) pair per query, in row order. Each block is
+        scored against every query in one matrix-matrix product. Quantized
+        modes keep the rows whose approximate score is within the
+        quantization error of min_score and rescore them in float32.
+        """
+        queries = l2_normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if candidates is not None:
+            candidates = np.asarray(candidates, dtype=np.int64)
+        if exclude_indices is None:
+            exclude_indices = np.full(len(queries), -1, dtype=np.int64)
+
+        scan_queries, query_scales = queries, None
+        if self.storage_mode == "int8":
+            query_codes, query_scales = quantize_int8(queries)
+            scan_queries = query_codes.astype(np.float32)
+        half_sqrt_dim = np.sqrt(self.dimension) / 2
+
+        n_rows = len(self) if candidates is None else len(candidates)
+        found = [([], []) for _ in queries]
+        for start in range(0, n_rows, self.block_size):
+            if candidates is None:
+                rows = np.arange(start, min(start + self.block_size, n_rows))
+                block = self.vectors[start:start + self.block_size]
+            else:
+                rows = candidates[start:start + self.block_size]
+                block = self.vectors[rows]
+
+            scores = scan_queries @ block.astype(np.float32, copy=False).T
+            error = 0.0
+            if self.storage_mode == "int8":
+                scores *= self.scales[rows][None, :] * query_scales[:, None]
+                # Rounding moves each component by at most half a scale step
+                row_error = self.scales[rows][None, :] * half_sqrt_dim
+                query_error = query_scales[:, None] * half_sqrt_dim
+                error = row_error + query_error * (1 + row_error)
+            elif self.storage_mode == "float16":
+                error = FLOAT16_SCORE_ERROR
+            scores[rows[None, :] == exclude_indices[:, None]] = -np.inf
+            hits = scores >= min_score - error
+
+            for q, (found_rows, found_scores) in enumerate(found):
+                keep = np.flatnonzero(hits[q])
+                if not len(keep):
+                    continue
+                block_rows, block_scores = rows[keep], scores[q, keep]
+                if self.storage_mode != "float32":
+                    block_scores = self.get_vectors(block_rows) @ queries[q]
+                    exact = block_scores >= min_score
+                    block_rows, block_scores = block_rows[exact], block_scores[exact]
+                found_rows.append(block_rows)
+                found_scores.append(block_scores)
+
+        return [
+            (np.concatenate(found_rows).astype(np.int64, copy=False),
+             np.concatenate(found_scores).astype(np.float32, copy=False))
+            if found_rows else (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            for found_rows, found_scores in found
+        ]
+
+    def get_vector(self, index: int) -> np.ndarray:
+        return self.get_vectors(np.array([index]))[0]
+
+    def get_vectors(self, indices: np.ndarray) -> np.ndarray:
+        """Return float32 vectors for a set of rows."""
+        if self.rescore_vectors is not None:
+            return np.asarray(self.rescore_vectors[indices], dtype=np.float32)
+        rows = self.vectors[indices].astype(np.float32)
+        if self.scales is not None:
+            rows *= self.scales[indices][:, None]
+        return rows
+
+    def _scan(self, query: np.ndarray, k: int, exclude_index: Optional[int],
+              candidates: Optional[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        """Walk the stored vectors block by block, keeping the k best rows in a min-heap."""
+        scale = 1.0
+        if self.storage_mode == "int8":
+            query_codes, query_scale = quantize_int8(query)
+            query = query_codes[0].astype(np.float32)
+            scale = query_scale[0]
+
+        n_rows = len(self) if candidates is None else len(candidates)
+        heap = []
+        for start in range(0, n_rows, self.block_size):
+            if candidates is None:
+                rows = np.arange(start, min(start + self.block_size, n_rows))
+                block = self.vectors[start:start + self.block_size]
+            else:
+                rows = candidates[start:start + self.block_size]
+                block = self.vectors[rows]
+
+            scores = block.astype(np.float32, copy=False) @ query
+            if self.scales is not None:
+                scores *= self.scales[rows] * scale
+            if exclude_index is not None:
+                scores[rows == exclude_index] = -np.inf
+
+            for i in top_k_indices(scores, k):
+                item = (float(scores[i]), int(rows[i]))
+                if not np.isfinite(item[0]):
+                    break
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+                else:
+                    break  # block results are sorted, nothing better follows
+
+        heap.sort(reverse=True)
+        return (np.array([row for _, row in heap], dtype=np.int64),
+                np.array([score for score, _ in heap], dtype=np.float32))
+
+    def _scan_batch(self, queries: np.ndarray, k: int, exclude_indices: np.ndarray,
+                    candidates: Optional[np.ndarray]) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Blockwise scan for a batch of queries, merging each block into a running (queries x k) top-k."""
+        query_scales = 1.0
+        if self.storage_mode == "int8":
+            query_codes, query_scales = quantize_int8(queries)
+            queries = query_codes.astype(np.float32)
+
+        n_rows = len(self) if candidates is None else len(candidates)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, n_rows, self.block_size):
+            if candidates is None:
+                rows = np.arange(start, min(start + self.block_size, n_rows))
+                block = self.vectors[start:start + self.block_size]
+            else:
+                rows = candidates[start:start + self.block_size]
+                block = self.vectors[rows]
+
+            scores = queries @ block.astype(np.float32, copy=False).T
+            if self.scales is not None:
+                scores *= self.scales[rows][None, :] * np.reshape(query_scales, (-1, 1))
+            scores[rows[None, :] == exclude_indices[:, None]] = -np.inf
+
+            best_rows = np.concatenate([best_rows, np.broadcast_to(rows, scores.shape)], axis=1)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        results = []
+        for rows, scores in zip(best_rows, best_scores):
+            order = np.lexsort((rows, -scores))
+            order = order[np.isfinite(scores[order])]
+            results.append((rows[order], scores[order]))
+        return results
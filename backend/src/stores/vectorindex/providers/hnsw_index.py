@@ -0,0 +1,54 @@
+import hnswlib
+import numpy as np
+from pathlib import Path
+from typing import Optional
+from src.stores.vectorindex.vectorindex_interface import VectorIndexInterface
+from src.stores.vectorindex.utils import l2_normalize
+
+
+class HNSWIndex(VectorIndexInterface):
+    def __init__(self, matrix: np.ndarray, index_path: Optional[str] = None,
+                 m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        """
+        Hierarchical navigable small world graph (hnswlib, inner product space).
+        - m / ef_construction: graph degree and build-time beam width
+        - ef_search: query-time beam width, the recall/latency knob
+        The graph is persisted to index_path and reused when it matches.
+        """
+        vectors = l2_normalize(matrix)
+        self.dimension = vectors.shape[1]
+        self.ef_search = ef_search
+        self.index = hnswlib.Index(space="ip", dim=self.dimension)
+
+        if index_path and Path(index_path).exists():
+            self.index.load_index(index_path, max_elements=len(vectors))
+            print(f"📂 Loaded HNSW index from {index_path}")
+        else:
+            print(f"🔨 Building HNSW index over {len(vectors)} vectors...")
+            self.index.init_index(max_elements=len(vectors), ef_construction=ef_construction, M=m)
+            self.index.add_items(vectors, np.arange(len(vectors)))
+            if index_path:
+                Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+                self.index.save_index(index_path)
+                print(f"💾 Saved HNSW index to {index_path}")
+
+    def __len__(self) -> int:
+        return self.index.get_current_count()
+
+    def search(self, query: np.ndarray, top_k: int,
+               exclude_index: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        query = l2_normalize(np.asarray(query, dtype=np.float32).ravel())
+        k = min(top_k + (1 if exclude_index is not None else 0), len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(query, k=k)
+        rows = labels[0].astype(np.int64)
+        scores = 1.0 - distances[0]  # "ip" distance is 1 - dot product
+
+        keep = rows != exclude_index if exclude_index is not None else np.ones(len(rows), dtype=bool)
+        return rows[keep][:top_k], scores[keep][:top_k]
+
+    def get_vector(self, index: int) -> np.ndarray:
+        return np.asarray(self.index.get_items([index], return_type="numpy")[0], dtype=np.float32)
@@ -0,0 +1,96 @@
+import numpy as np
+from pathlib import Path
+from typing import Optional
+from src.stores.vectorindex.vectorindex_interface import VectorIndexInterface
+from src.stores.vectorindex.utils import l2_normalize, top_k_indices
+
+
+class IVFFlatIndex(VectorIndexInterface):
+    def __init__(self, matrix: np.ndarray, index_path: Optional[str] = None,
+                 n_lists: int = 0, nprobe: int = 8, n_iter: int = 20,
+                 sample_size: int = 100_000, seed: int = 0):
+        """
+        Inverted-file index with flat (uncompressed) lists.
+        Rows are clustered with spherical k-means; a query only scores the
+        rows of its nprobe closest lists.
+        - n_lists: number of clusters (0 = 4 * sqrt(n_rows))
+        - nprobe: lists scanned per query, the recall/latency knob
+        The clustering is persisted to index_path and reused when it matches.
+        """
+        vectors = l2_normalize(matrix)
+        self.dimension = vectors.shape[1]
+        self.nprobe = nprobe
+        self.order = None
+
+        if index_path and Path(index_path).exists():
+            self._load(index_path)
+        if self.order is None or len(self.order) != len(vectors):
+            n_lists = n_lists or max(1, int(4 * np.sqrt(len(vectors))))
+            self._build(vectors, min(n_lists, len(vectors)), n_iter, sample_size, seed)
+            if index_path:
+                self._save(index_path)
+
+        # Rows stored list by list so each probe is one contiguous slice
+        self.vectors = np.ascontiguousarray(vectors[self.order])
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def search(self, query: np.ndarray, top_k: int,
+               exclude_index: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        query = l2_normalize(np.asarray(query, dtype=np.float32).ravel())
+
+        lists = top_k_indices(self.centroids @ query, self.nprobe)
+        positions = np.concatenate([
+            np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists
+        ]) if len(lists) else np.empty(0, dtype=np.int64)
+
+        scores = self.vectors[positions] @ query
+        rows = self.order[positions]
+        if exclude_index is not None:
+            scores[rows == exclude_index] = -np.inf
+
+        best = top_k_indices(scores, top_k)
+        best = best[np.isfinite(scores[best])]
+        return rows[best], scores[best]
+
+    def get_vector(self, index: int) -> np.ndarray:
+        return self.vectors[self.positions[index]]
+
+    def _build(self, vectors: np.ndarray, n_lists: int, n_iter: int, sample_size: int, seed: int):
+        """Spherical k-means on a sample, then assign every row to its closest centroid."""
+        print(f"🔨 Building IVF index ({n_lists} lists over {len(vectors)} vectors)...")
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = l2_normalize(sums)
+
+        assignment = np.concatenate([
+            np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), 65536)
+        ])
+        self.centroids = centroids
+        self.order = np.argsort(assignment, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        self.positions = np.argsort(self.order)
+
+    def _save(self, index_path: str):
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(index_path, "wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets)
+        print(f"💾 Saved IVF index to {index_path}")
+
+    def _load(self, index_path: str):
+        with np.load(index_path) as data:
+            self.centroids = data["centroids"]
+            self.order = data["order"]
+            self.offsets = data["offsets"]
+        self.positions = np.argsort(self.order)
+        print(f"📂 Loaded IVF index from {index_path}")
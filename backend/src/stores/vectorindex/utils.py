@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize vectors along the last axis (zero vectors stay zero)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, using a partial sort."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def quantize_int8(matrix: np.ndarray, block_size: int = 65536) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row scalar quantization.
+    Returns int8 codes and float32 scales so that row ~= codes * scale.
+    Rows are processed in blocks, so a memory-mapped matrix is never copied whole.
+    """
+    matrix = np.atleast_2d(matrix)
+    codes = np.empty(matrix.shape, dtype=np.int8)
+    scales = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), block_size):
+        block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+        block_scales = np.abs(block).max(axis=1) / 127.0
+        block_scales[block_scales == 0] = 1.0
+        codes[start:start + block_size] = np.clip(np.rint(block / block_scales[:, None]), -127, 127)
+        scales[start:start + block_size] = block_scales
+    return codes, scales
+
+
+def quantize_storage(normalized: np.ndarray, storage_mode: str) -> tuple[np.ndarray, "np.ndarray | None"]:
+    """Stored vectors (and int8 scales) for a storage mode, from L2-normalized float32 rows."""
+    if storage_mode == "float32":
+        return normalized, None
+    if storage_mode == "float16":
+        return normalized.astype(np.float16), None
+    if storage_mode == "int8":
+        return quantize_int8(normalized)
+    raise ValueError(f"Unknown embedding storage mode: {storage_mode}")
@@ -0,0 +1,25 @@
+from src.stores.vectorindex.vectorindex_interface import VectorIndexInterface
+from src.stores.vectorindex.providers import FlatIndex , HNSWIndex , IVFFlatIndex
+
+class VectorIndexFactory:
+    @staticmethod
+    def create(provider: str, matrix, **kwargs) -> VectorIndexInterface:
+        if provider == "flat":
+            return FlatIndex.from_matrix(matrix, kwargs.get("storage_mode", "float32"), kwargs.get("rescore_factor", 4))
+        elif provider == "hnsw":
+            return HNSWIndex(
+                matrix,
+                kwargs.get("index_path"),
+                m=kwargs.get("m", 16),
+                ef_construction=kwargs.get("ef_construction", 200),
+                ef_search=kwargs.get("ef_search", 64)
+            )
+        elif provider == "ivf":
+            return IVFFlatIndex(
+                matrix,
+                kwargs.get("index_path"),
+                n_lists=kwargs.get("n_lists", 0),
+                nprobe=kwargs.get("nprobe", 8)
+            )
+        else:
+            raise ValueError(f"Unknown vector index provider: {provider}")
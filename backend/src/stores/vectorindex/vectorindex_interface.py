@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import numpy as np
+
+class VectorIndexInterface(ABC):
+    @abstractmethod
+    def search(self, query: np.ndarray, top_k: int,
+               exclude_index: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Return (row indices, cosine similarities) of the top_k rows, best first."""
+        pass
+
+    @abstractmethod
+    def get_vector(self, index: int) -> np.ndarray:
+        """Return the float32 vector stored at a row."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
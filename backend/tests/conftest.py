@@ -0,0 +1,78 @@
+"""
+Shared fixtures for the backend tests (run from the backend directory:
+python -m pytest -q). Catalogs are small synthetic snapshots, and query
+texts are embedded by a deterministic stand-in for the RAG embedding
+provider, so no model, API key or database is needed.
+"""
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.config import settings
+
+
+class HashEmbedding:
+    """Deterministic unit vectors derived from the text, one per query."""
+    model_name = "test-hash-embedding"
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def _embed_one(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed(self, texts):
+        if isinstance(texts, str):
+            return self._embed_one(texts)
+        return [self._embed_one(text) for text in texts]
+
+    embed_queries = embed
+
+
+class StubRagService:
+    def __init__(self, dimension: int):
+        self.embedding = HashEmbedding(dimension)
+
+
+@pytest.fixture
+def synthetic(tmp_path):
+    from src.scripts.synthetic_catalog import synthetic_catalog
+    return synthetic_catalog(2000, dimension=32, seed=7, workdir=tmp_path / "synthetic")
+
+
+@pytest.fixture
+def json_catalog(tmp_path, monkeypatch):
+    """A small cars_embeddings.json plus an empty snapshot directory, as load_catalog sees them."""
+    from src.repositories.catalog_snapshot import set_catalog
+    from src.scripts.synthetic_catalog import synthetic_catalog, write_json
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "DATA_FILE_PATH", "cars_embeddings.json")
+    monkeypatch.setattr(settings, "CATALOG_SNAPSHOT_DIR", "catalog")
+    write_json(synthetic_catalog(50, dimension=8, seed=1, workdir=tmp_path / "work"), tmp_path / "cars_embeddings.json")
+    set_catalog(None)
+    yield tmp_path / "cars_embeddings.json"
+    set_catalog(None)
+
+
+@pytest.fixture
+def recommendation_service(synthetic, monkeypatch):
+    """A RecommendationService over the synthetic catalog with exact flat search."""
+    from src.repositories.car_repository import CarRepository
+    from src.repositories.embedding_repository import EmbeddingRepository
+    from src.services.recommendation_service import RecommendationService
+    from src.services.scoring_service import ScoringService
+
+    monkeypatch.setattr(settings, "rag_service", StubRagService(synthetic.embeddings.shape[1]))
+    monkeypatch.setattr(settings, "VECTOR_INDEX_PROVIDER", "flat")
+    monkeypatch.setattr(settings, "EMBEDDING_STORAGE_MODE", "float32")
+    RecommendationService.clear_result_cache()
+    RecommendationService.clear_query_embedding_cache()
+    return RecommendationService(CarRepository(synthetic), EmbeddingRepository(synthetic), ScoringService())
@@ -0,0 +1,71 @@
+import pytest
+
+from src.repositories.car_repository import CarRepository
+from src.schemas.car_schemas import CarFilters, Location
+
+
+@pytest.fixture
+def repo(synthetic):
+    return CarRepository(synthetic)
+
+
+def _keyset_walk(repo, limit, **query):
+    ids, after = [], -1
+    while True:
+        cars, after = repo.find_page(after=after, limit=limit, **query)
+        ids += [car.car_id for car in cars]
+        if after is None:
+            return ids
+
+
+def _offset_walk(repo, limit, **query):
+    ids, skip = [], 0
+    while True:
+        cars = repo.find_all(skip=skip, limit=limit, **query)
+        if not cars:
+            return ids
+        ids += [car.car_id for car in cars]
+        skip += limit
+
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"sort_by": "price"},
+    {"sort_by": "year", "descending": True},
+    {"filters": CarFilters(max_price=30_000, types=["SUV", "sedan"]), "sort_by": "odometer"},
+    {"filters": CarFilters(max_distance_km=800), "user_location": Location(latitude=40, longitude=-95)},
+])
+def test_keyset_walk_matches_offset_walk(repo, query):
+    keyset = _keyset_walk(repo, 37, **query)
+
+    assert keyset == _offset_walk(repo, 37, **query)
+    assert len(keyset) == len(set(keyset)) == repo.count(query.get("filters"), query.get("user_location"))
+
+
+@pytest.fixture
+def cars_endpoint():
+    pytest.importorskip("google.generativeai")
+    from src.api.v1.endpoints import cars
+    return cars
+
+
+def test_cursor_is_bound_to_its_filters(cars_endpoint):
+    from fastapi import HTTPException
+
+    filters = CarFilters(max_price=20_000)
+    digest = cars_endpoint._filters_digest(filters, None)
+    cursor = cars_endpoint._encode_cursor("v1", "price", False, digest, 41)
+
+    assert cars_endpoint._decode_cursor(cursor, "v1", "price", False, digest) == 41
+    other = cars_endpoint._filters_digest(CarFilters(max_price=30_000), None)
+    with pytest.raises(HTTPException) as error:
+        cars_endpoint._decode_cursor(cursor, "v1", "price", False, other)
+    assert error.value.status_code == 400
+
+
+def test_location_only_binds_the_cursor_with_a_radius(cars_endpoint):
+    here, there = Location(latitude=40, longitude=-95), Location(latitude=41, longitude=-95)
+
+    assert cars_endpoint._filters_digest(CarFilters(), here) == cars_endpoint._filters_digest(CarFilters(), there)
+    radius = CarFilters(max_distance_km=100)
+    assert cars_endpoint._filters_digest(radius, here) != cars_endpoint._filters_digest(radius, there)
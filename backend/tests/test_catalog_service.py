@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.repositories.catalog_snapshot import apply_changes, current_version, load_catalog
+from src.repositories.neighbor_table import build_neighbor_table, load_neighbor_table
+from src.services.catalog_service import CatalogService
+
+
+def _car(car_id, price, embedding):
+    return {"id": car_id, "price": price, "year": 2019, "manufacturer": "ford", "model": "model-1",
+            "embedding": list(map(float, embedding))}
+
+
+def _wait(service, job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = service.get_job(job["job_id"])
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"catalog job {job['job_id']} did not finish")
+
+
+@pytest.fixture
+def service(json_catalog):
+    load_catalog()
+    return CatalogService()
+
+
+def test_incremental_version_applies_upserts_and_removals(service):
+    base = load_catalog()
+    rng = np.random.default_rng(0)
+    updated, removed = str(base.ids[3]), str(base.ids[4])
+
+    job = _wait(service, service.submit_changes(
+        [_car(updated, 111.0, rng.standard_normal(8)), _car("new-car", 222.0, rng.standard_normal(8))], [removed]
+    ))
+
+    assert job["status"] == "done"
+    catalog = load_catalog()
+    assert catalog.version == job["catalog_version"] != base.version
+    assert current_version(service.snapshot_dir) == catalog.version
+    assert catalog.source_version == base.source_version
+    assert len(catalog) == len(base)
+    assert catalog.row_of(removed) is None
+    assert catalog.numeric["price"][catalog.row_of(updated)] == 111.0
+    assert catalog.numeric["price"][catalog.row_of("new-car")] == 222.0
+    # Unchanged cars keep their relative order
+    unchanged = [str(car_id) for car_id in base.ids if str(car_id) not in (updated, removed)]
+    assert [str(car_id) for car_id in catalog.ids[:len(unchanged)]] == unchanged
+
+
+def test_duplicate_upserts_keep_the_last_record(service):
+    base = load_catalog()
+    embedding = np.ones(8)
+
+    job = _wait(service, service.submit_changes(
+        [_car("dup", 1.0, embedding), _car("other", 5.0, embedding), _car("dup", 2.0, embedding)], []
+    ))
+
+    catalog = load_catalog()
+    assert job["status"] == "done"
+    assert len(catalog) == len(base) + 2
+    assert list(map(str, catalog.ids)).count("dup") == 1
+    assert catalog.numeric["price"][catalog.row_of("dup")] == 2.0
+
+
+def test_versions_are_deterministic_and_chain(service):
+    base = load_catalog()
+    upserts = [{"metadata": {"id": "a", "price": 1.0, "year": 2020}, "embedding": [1.0] * 8}]
+    assert apply_changes(base, upserts, []).version == apply_changes(base, upserts, []).version
+
+    first = _wait(service, service.submit_changes([_car("a", 1.0, np.ones(8))], []))
+    second = _wait(service, service.submit_changes([], ["a"]))
+
+    catalog = load_catalog()
+    assert catalog.version == second["catalog_version"] != first["catalog_version"]
+    assert catalog.row_of("a") is None
+    assert len(catalog) == len(base)
+    assert (service.snapshot_dir / first["catalog_version"]).exists()
+
+
+def test_new_version_gets_a_neighbor_table(service):
+    base = load_catalog()
+    build_neighbor_table(base.path, k=10, workers=1)
+
+    job = _wait(service, service.submit_changes([_car("near", 1.0, np.asarray(base.embeddings[0]))], []))
+
+    table = load_neighbor_table(load_catalog().path)
+    assert job["status"] == "done" and table is not None
+    catalog = load_catalog()
+    assert catalog.row_of("near") in np.asarray(table.rows[0])
+
+
+def test_finished_jobs_are_evicted_but_pending_ones_are_kept(service, monkeypatch):
+    class IdleExecutor:
+        def submit(self, *args):
+            pass
+
+    monkeypatch.setattr(CatalogService, "_executor", IdleExecutor())
+    monkeypatch.setattr(CatalogService, "_jobs", {})
+    pending = [service.submit_reload()["job_id"] for _ in range(120)]
+    assert all(service.get_job(job_id) for job_id in pending)
+
+    for job_id in pending[:60]:
+        service._update_job(job_id, status="done")
+    service.submit_reload()
+    assert len(CatalogService._jobs) == 100
+    assert all(service.get_job(job_id) for job_id in pending[60:])
+
+    service._update_job("forgotten", status="done")
@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from src.repositories import catalog_snapshot
+from src.repositories.catalog_snapshot import load_catalog, set_catalog
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    calls = []
+    json_catalog_version = catalog_snapshot.json_catalog_version
+
+    def counting(data_file):
+        calls.append(data_file)
+        return json_catalog_version(data_file)
+
+    monkeypatch.setattr(catalog_snapshot, "json_catalog_version", counting)
+    return calls
+
+
+def _restart():
+    set_catalog(None)
+    return load_catalog()
+
+
+def test_unchanged_json_is_not_hashed_on_restart(json_catalog, hash_calls):
+    first = load_catalog()
+    assert first.path is not None
+    hash_calls.clear()
+
+    assert _restart().version == first.version
+    assert hash_calls == []
+
+
+def test_touched_json_is_hashed_once_and_the_stamp_recorded(json_catalog, hash_calls):
+    first = load_catalog()
+    stat = json_catalog.stat()
+    os.utime(json_catalog, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    hash_calls.clear()
+
+    assert _restart().version == first.version
+    assert len(hash_calls) == 1
+
+    hash_calls.clear()
+    assert _restart().version == first.version
+    assert hash_calls == []
+
+
+def test_edited_json_rebuilds_the_snapshot(json_catalog):
+    first = load_catalog()
+    data = json.loads(json_catalog.read_text())
+    car_id = next(iter(data["embeddings"]))
+    data["embeddings"][car_id]["metadata"]["price"] = 1.0
+    json_catalog.write_text(json.dumps(data))
+
+    rebuilt = _restart()
+
+    assert rebuilt.version != first.version
+    assert rebuilt.numeric["price"][rebuilt.row_of(car_id)] == 1.0
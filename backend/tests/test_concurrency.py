@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+from src.core.concurrency import iterate_blocking
+from src.stores.llm.llm_interface import LLMInterface
+
+
+class ChunkedLLM(LLMInterface):
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def generate(self, prompt: str) -> str:
+        return "".join(self.chunks)
+
+    def generate_stream(self, prompt: str):
+        yield from self.chunks
+
+
+class SlowIterator:
+    """Blocks in next() until released, and records whether close() overlapped it."""
+
+    def __init__(self):
+        self.in_next = threading.Event()
+        self.release = threading.Event()
+        self.busy = False
+        self.closed_while_busy = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.busy = True
+        self.in_next.set()
+        self.release.wait(5)
+        self.busy = False
+        return "chunk"
+
+    def close(self):
+        self.closed_while_busy = self.busy
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+def test_agenerate_stream_yields_chunks_in_order():
+    llm = ChunkedLLM(["Hel", "lo ", "world"])
+
+    assert asyncio.run(_collect(llm.agenerate_stream("hi"))) == ["Hel", "lo ", "world"]
+
+
+def test_cancelled_consumer_waits_for_in_flight_next_before_close():
+    source = SlowIterator()
+
+    async def scenario():
+        task = asyncio.create_task(_collect(iterate_blocking(source)))
+        await asyncio.get_running_loop().run_in_executor(None, source.in_next.wait, 5)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        assert source.closed_while_busy is None
+        source.release.set()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    assert source.closed_while_busy is False
+
+
+def test_consumer_stopping_early_closes_iterator():
+    closed = []
+
+    def numbers():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    async def first_two():
+        stream = iterate_blocking(numbers())
+        items = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return items
+
+    assert asyncio.run(first_two()) == [0, 1]
+    assert closed == [True]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.stores.vectorindex.providers import FlatIndex
+from src.stores.vectorindex.utils import l2_normalize, quantize_storage
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(11)
+    return l2_normalize(rng.standard_normal((3000, 48)).astype(np.float32))
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = np.random.default_rng(12)
+    return rng.standard_normal((40, 48)).astype(np.float32)
+
+
+def _index(vectors, storage_mode, block_size=512):
+    stored, scales = quantize_storage(vectors, storage_mode)
+    rescore = vectors if storage_mode != "float32" else None
+    return FlatIndex(stored, storage_mode, scales, rescore_vectors=rescore, block_size=block_size)
+
+
+def _exact_top_k(vectors, query, k, candidates=None, exclude=None):
+    rows = np.arange(len(vectors)) if candidates is None else np.asarray(candidates)
+    rows = rows[rows != exclude]
+    cosines = vectors[rows] @ l2_normalize(query)
+    order = np.lexsort((rows, -cosines))[:k]
+    return rows[order], cosines[order]
+
+
+def test_float32_search_is_exact(vectors, queries):
+    index = _index(vectors, "float32")
+    candidates = np.arange(0, len(vectors), 3)
+    for i, query in enumerate(queries):
+        rows, cosines = index.search(query, 10, exclude_index=i)
+        expected_rows, expected_cosines = _exact_top_k(vectors, query, 10, exclude=i)
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(cosines, expected_cosines, atol=1e-6)
+
+        rows, _ = index.search(query, 10, candidates=candidates)
+        np.testing.assert_array_equal(rows, _exact_top_k(vectors, query, 10, candidates=candidates)[0])
+
+
+@pytest.mark.parametrize("storage_mode", ["float16", "int8"])
+def test_quantized_search_recall_and_exact_scores(vectors, queries, storage_mode):
+    index = _index(vectors, storage_mode)
+    hits = 0
+    for query in queries:
+        rows, cosines = index.search(query, 10)
+        expected_rows, _ = _exact_top_k(vectors, query, 10)
+        hits += len(set(rows) & set(expected_rows))
+        # Returned scores come from the float32 rescoring pass
+        np.testing.assert_allclose(cosines, vectors[rows] @ l2_normalize(query), atol=1e-6)
+    assert hits / (10 * len(queries)) >= 0.98
+
+
+@pytest.mark.parametrize("storage_mode", ["float32", "float16", "int8"])
+def test_search_above_returns_every_row_above_the_score(vectors, queries, storage_mode):
+    index = _index(vectors, storage_mode)
+    exclude = np.arange(len(queries))
+    results = index.search_above(queries, 0.2, exclude_indices=exclude)
+
+    for i, (query, (rows, cosines)) in enumerate(zip(queries, results)):
+        exact = vectors @ l2_normalize(query)
+        expected = np.flatnonzero(exact >= 0.2)
+        expected = expected[expected != i]
+        np.testing.assert_array_equal(np.sort(rows), expected)
+        np.testing.assert_allclose(cosines, exact[rows], atol=1e-6)
+
+
+def test_search_batch_matches_single_searches(vectors, queries):
+    for storage_mode in ("float32", "int8"):
+        index = _index(vectors, storage_mode)
+        batch = index.search_batch(queries, 5, exclude_indices=np.arange(len(queries)))
+        for i, (query, (rows, _)) in enumerate(zip(queries, batch)):
+            np.testing.assert_array_equal(rows, index.search(query, 5, exclude_index=i)[0])
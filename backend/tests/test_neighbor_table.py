@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from src.repositories.catalog_snapshot import apply_changes, read_snapshot, write_snapshot
+from src.repositories.neighbor_table import build_neighbor_table, load_neighbor_table, update_neighbor_table
+from src.scripts.synthetic_catalog import synthetic_catalog
+
+
+def _record(car_id, embedding):
+    metadata = {"id": car_id, "price": 1000.0, "year": 2020, "manufacturer": "ford", "model": "model-1"}
+    return {"metadata": metadata, "embedding": list(map(float, embedding))}
+
+
+def _assert_exact_prefixes(catalog, table):
+    """Every list is the exact top-m of the catalog: no car outside it scores above its last entry."""
+    embeddings = np.asarray(catalog.embeddings)
+    for row in range(len(catalog)):
+        listed = np.asarray(table.rows[row], dtype=np.int64)
+        listed = listed[listed >= 0]
+        if len(listed) == 0:
+            continue
+        cosines = embeddings @ embeddings[row]
+        outside = np.ones(len(catalog), dtype=bool)
+        outside[listed] = False
+        outside[row] = False
+        assert row not in listed
+        assert cosines[outside].max(initial=-1.0) <= cosines[listed].min() + 1e-6
+
+
+@pytest.fixture
+def versions(tmp_path):
+    base = read_snapshot(write_snapshot(synthetic_catalog(400, dimension=16, seed=3, workdir=tmp_path / "w"),
+                                        tmp_path / "catalog"))
+    build_neighbor_table(base.path, k=20, workers=1)
+    rng = np.random.default_rng(0)
+    upserts = [_record("new-1", rng.standard_normal(16)), _record("new-2", rng.standard_normal(16)),
+               # An update moves an existing car elsewhere in the embedding space
+               _record(str(base.ids[5]), rng.standard_normal(16)),
+               # A near copy of car 10 must enter the lists of car 10's neighbours
+               _record("near-10", np.asarray(base.embeddings[10]) + 0.01 * rng.standard_normal(16))]
+    removals = [str(base.ids[row]) for row in range(20, 40)]
+    catalog = read_snapshot(write_snapshot(apply_changes(base, upserts, removals), tmp_path / "catalog"))
+    return base, catalog
+
+
+def test_derived_table_lists_are_exact(versions):
+    base, catalog = versions
+
+    table = update_neighbor_table(base, catalog)
+
+    assert table is not None and len(table) == len(catalog)
+    _assert_exact_prefixes(catalog, table)
+    near = catalog.row_of("near-10")
+    assert near in np.asarray(table.rows[catalog.row_of(str(base.ids[10]))])
+    for car_id in ("new-1", "new-2", "near-10", str(base.ids[5])):
+        assert (np.asarray(table.rows[catalog.row_of(car_id)]) >= 0).all()
+    assert load_neighbor_table(catalog.path) is not None
+
+
+def test_no_table_derived_without_a_previous_table(tmp_path):
+    base = read_snapshot(write_snapshot(synthetic_catalog(50, dimension=8, workdir=tmp_path / "w"), tmp_path / "c"))
+    catalog = read_snapshot(write_snapshot(apply_changes(base, [], [str(base.ids[0])]), tmp_path / "c"))
+
+    assert update_neighbor_table(base, catalog) is None
+    assert load_neighbor_table(catalog.path) is None
+
+
+def test_by_id_recommendations_match_a_scan_on_a_derived_version(versions, monkeypatch):
+    from src.core.config import settings
+    from tests.conftest import StubRagService
+    from src.repositories.car_repository import CarRepository
+    from src.repositories.embedding_repository import EmbeddingRepository
+    from src.services.recommendation_service import RecommendationService
+    from src.services.scoring_service import ScoringService
+
+    base, catalog = versions
+    update_neighbor_table(base, catalog)
+    monkeypatch.setattr(settings, "rag_service", StubRagService(16))
+    monkeypatch.setattr(settings, "VECTOR_INDEX_PROVIDER", "flat")
+    monkeypatch.setattr(settings, "SIMILARITY_THRESHOLD", 0.0)
+
+    def recommend(use_table):
+        monkeypatch.setattr(settings, "USE_NEIGHBOR_TABLE", use_table)
+        EmbeddingRepository._views.clear()
+        RecommendationService.clear_result_cache()
+        service = RecommendationService(CarRepository(catalog), EmbeddingRepository(catalog), ScoringService())
+        return [[rec.car.car_id for rec in service.recommend_by_car_id(str(car_id), top_n=10)]
+                for car_id in catalog.ids[::7]]
+
+    assert recommend(True) == recommend(False)
@@ -0,0 +1,72 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from src.repositories.pdf_repository import PDFRepository
+
+
+@pytest.fixture
+def repo():
+    return PDFRepository(mongomock.MongoClient()["test"])
+
+
+def _upload(repo, pdf_id, content=b"%PDF-1.4 same bytes", content_hash="hash-a", conversation_id="c1"):
+    """What RAGService.upload_pdf does: reference an existing copy, else store the bytes."""
+    existing = repo.find_by_content_hash(content_hash)
+    if existing is not None:
+        repo.create_reference(pdf_id, f"{pdf_id}.pdf", existing, conversation_id)
+    else:
+        repo.create(pdf_id, f"{pdf_id}.pdf", content, conversation_id, content_hash)
+
+
+def test_duplicate_upload_shares_blob_and_vectors(repo):
+    _upload(repo, "pdf_1")
+    _upload(repo, "pdf_2", conversation_id="c2")
+
+    duplicate = repo.find_by_id("pdf_2")
+    assert duplicate["content"] is None
+    assert duplicate["blob_pdf_id"] == "pdf_1"
+    assert duplicate["vectors_pdf_id"] == "pdf_1"
+    assert repo.find_vector_ids("c2") == {"pdf_1"}
+
+
+def test_deleting_original_hands_blob_to_duplicate_and_keeps_vectors(repo):
+    _upload(repo, "pdf_1")
+    _upload(repo, "pdf_2")
+    _upload(repo, "pdf_3")
+
+    assert repo.delete("pdf_1") is None
+
+    heir = repo.find_by_id("pdf_2")
+    assert bytes(heir["content"]) == b"%PDF-1.4 same bytes"
+    assert "blob_pdf_id" not in heir
+    assert repo.find_by_id("pdf_3")["blob_pdf_id"] == "pdf_2"
+
+    assert repo.delete("pdf_3") is None
+    assert repo.delete("pdf_2") == "pdf_1"
+    assert repo.count_all() == 0
+
+
+def test_concurrent_copies_of_same_bytes_do_not_leak_vectors(repo):
+    # Both uploads missed each other's find_by_content_hash and stored their own copy
+    repo.create("pdf_1", "a.pdf", b"same", "c1", "hash-a")
+    repo.create("pdf_2", "b.pdf", b"same", "c1", "hash-a")
+    _upload(repo, "pdf_3", content=b"same")
+
+    referenced = repo.find_by_id("pdf_3")["vectors_pdf_id"]
+    unreferenced = ({"pdf_1", "pdf_2"} - {referenced}).pop()
+
+    assert repo.delete(unreferenced) == unreferenced
+    assert repo.delete(referenced) is None
+    assert bytes(repo.find_by_id("pdf_3")["content"]) == b"same"
+    assert repo.delete("pdf_3") == referenced
+
+
+def test_delete_by_conversation_returns_only_orphaned_vectors(repo):
+    _upload(repo, "pdf_1", conversation_id="c1")
+    _upload(repo, "pdf_2", conversation_id="c2")
+    _upload(repo, "pdf_3", content=b"other", content_hash="hash-b", conversation_id="c1")
+
+    assert sorted(repo.delete_by_conversation("c1")) == ["pdf_3"]
+    assert repo.find_by_id("pdf_2")["content"] is not None
+    assert repo.delete_by_conversation("c2") == ["pdf_1"]
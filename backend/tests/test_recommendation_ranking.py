@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.repositories.spatial_index import haversine_km
+from src.schemas.car_schemas import CarFilters, Location
+
+
+def _brute_force(service, query, weights, user_location=None, filters=None, exclude=None):
+    """Blended final scores of every eligible car, best first, from the raw catalog columns."""
+    catalog = service.car_repo.catalog
+    embeddings = np.asarray(catalog.embeddings, dtype=np.float64)
+    similarity = (embeddings @ (query / np.linalg.norm(query)) + 1) / 2
+
+    rows = service.car_repo.find_rows(filters, user_location)
+    rows = rows[(similarity[rows] >= settings.SIMILARITY_THRESHOLD) & (rows != exclude)]
+
+    similarity_weight, distance_weight, price_weight, recency_weight = service.scoring_service.get_weights(*weights)
+    terms = [(similarity_weight, similarity[rows]), (distance_weight, np.ones(len(rows)))]
+    if user_location is not None:
+        distances = haversine_km(user_location.latitude, user_location.longitude,
+                                 catalog.numeric["latitude"][rows], catalog.numeric["longitude"][rows])
+        terms[1] = (distance_weight, np.where(np.isnan(distances), 1.0,
+                                              np.clip(1 - distances / settings.MAX_DISTANCE_KM, 0, 1)))
+    if price_weight:
+        terms.append((price_weight, 1 - service.car_repo.get_percentiles("price", rows)))
+    if recency_weight:
+        terms.append((recency_weight, service.car_repo.get_percentiles("year", rows)))
+
+    final = sum(weight * scores for weight, scores in terms) / sum(weight for weight, _ in terms)
+    order = np.lexsort((rows, -final))
+    return [str(car_id) for car_id in catalog.ids[rows[order]]], final[order]
+
+
+REQUESTS = [
+    dict(weights=(None, None, None, None)),
+    dict(weights=(None, 0.6, None, None), user_location=Location(latitude=38, longitude=-97)),
+    dict(weights=(0.5, 0.2, 0.4, None), filters=CarFilters(max_price=40_000)),
+    dict(weights=(None, None, 0.2, 0.3), user_location=Location(latitude=33, longitude=-84),
+         filters=CarFilters(types=["SUV", "pickup", "sedan"], max_distance_km=1500)),
+]
+
+
+@pytest.mark.parametrize("request_args", REQUESTS)
+def test_by_id_ranking_matches_brute_force(recommendation_service, request_args):
+    service = recommendation_service
+    weights = request_args["weights"]
+    location, filters = request_args.get("user_location"), request_args.get("filters")
+    for row in (0, 17, 911):
+        car_id = str(service.car_repo.catalog.ids[row])
+        recommendations = service.recommend_by_car_id(car_id, 10, location, filters, *weights)
+
+        expected_ids, expected_scores = _brute_force(
+            service, np.asarray(service.car_repo.catalog.embeddings[row]), weights, location, filters, exclude=row
+        )
+        assert [rec.car.car_id for rec in recommendations] == expected_ids[:10]
+        np.testing.assert_allclose([rec.final_score for rec in recommendations], expected_scores[:10], atol=1e-6)
+
+
+@pytest.mark.parametrize("request_args", REQUESTS)
+def test_by_text_ranking_matches_brute_force(recommendation_service, request_args):
+    service = recommendation_service
+    weights = request_args["weights"]
+    location, filters = request_args.get("user_location"), request_args.get("filters")
+    recommendations = service.recommend_by_text(
+        "red pickup", 10, location, filters, weights[0], weights[1], price_weight=weights[2], recency_weight=weights[3]
+    )
+
+    query = np.asarray(settings.rag_service.embedding.embed("red pickup"))
+    expected_ids, expected_scores = _brute_force(service, query, weights, location, filters)
+    assert [rec.car.car_id for rec in recommendations] == expected_ids[:10]
+    np.testing.assert_allclose([rec.final_score for rec in recommendations], expected_scores[:10], atol=1e-6)
+
+
+def test_batch_matches_single_requests(recommendation_service):
+    service = recommendation_service
+    car_ids = [str(car_id) for car_id in service.car_repo.catalog.ids[:5]]
+    location = Location(latitude=40, longitude=-100)
+
+    batch = service.recommend_batch_by_car_ids(car_ids, 10, location, None, None, None, 0.3, None)
+
+    for car_id, recommendations in zip(car_ids, batch):
+        single = service.recommend_by_car_id(car_id, 10, location, None, None, None, 0.3, None)
+        assert [rec.car.car_id for rec in recommendations] == [rec.car.car_id for rec in single]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.services.scoring_service import ScoringService
+
+
+@pytest.fixture
+def scoring():
+    return ScoringService()
+
+
+def test_final_scores_normalize_weights_instead_of_clipping(scoring):
+    similarity = np.array([0.95, 0.80, 0.70])
+    distance = np.ones(3)
+    price = np.array([0.0, 1.0, 1.0])
+
+    final = scoring.calculate_final_scores(
+        similarity, distance, price, None,
+        custom_similarity_weight=0.9, custom_distance_weight=0.9, custom_price_weight=0.9
+    )
+
+    expected = (0.9 * similarity + 0.9 * distance + 0.9 * price) / 2.7
+    np.testing.assert_allclose(final, expected)
+    assert final.max() < 1.0
+    # The cheaper cars outrank the more similar one, and stay ordered by similarity
+    assert final[1] > final[0]
+    assert final[1] > final[2]
+
+
+def test_final_scores_default_weights_are_unchanged(scoring):
+    similarity = np.array([0.9, 0.6])
+    distance = np.array([0.2, 1.0])
+
+    final = scoring.calculate_final_scores(similarity, distance)
+
+    total = scoring.similarity_weight + scoring.distance_weight
+    np.testing.assert_allclose(
+        final, (scoring.similarity_weight * similarity + scoring.distance_weight * distance) / total
+    )
+
+
+def test_price_weight_ranks_cheaper_car_above_more_similar_one(recommendation_service):
+    service = recommendation_service
+    car_id = str(service.car_repo.catalog.ids[0])
+    plain = service.recommend_by_car_id(car_id, top_n=10)
+    most_similar = plain[0]
+
+    priced = service.recommend_by_car_id(car_id, top_n=10, price_weight=2.0)
+
+    assert all(0.0 <= rec.final_score < 1.0 for rec in priced)
+    assert len({round(rec.final_score, 9) for rec in priced}) == len(priced)
+    assert priced[0].car.car_id != most_similar.car.car_id
+    assert priced[0].car.price < most_similar.car.price
+    assert priced[0].similarity_score < most_similar.similarity_score